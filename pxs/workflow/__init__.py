@@ -9,6 +9,8 @@ def create_workflow(
     pp_option: Optional[PaddlePredictorOption] = None,
     use_hpip: Optional[bool] = None,
     hpi_config: Optional[Union[Dict[str, Any], HPIConfig]] = None,
+    max_workers: Optional[int] = None,
+    pipelined: Optional[bool] = None,
     *args: Any,
     **kwargs: Any,
 ) -> WorkflowPipeline:
@@ -29,6 +31,14 @@ def create_workflow(
         hpi_config (Optional[Union[Dict[str, Any], HPIConfig]], optional): The
             high-performance inference configuration dictionary.
             Defaults to None.
+        max_workers (Optional[int], optional): The number of threads used to
+            run independent regular nodes concurrently. 0 or 1 runs nodes
+            sequentially. If set to None, the setting from `config` will be
+            used. Defaults to None.
+        pipelined (Optional[bool], optional): Whether to run each compute node
+            as a pipeline stage with its own bounded input queue and worker
+            threads. If set to None, the setting from `config` will be used.
+            Defaults to None.
         *args: Additional positional arguments.
         **kwargs: Additional keyword arguments.
 
@@ -45,6 +55,14 @@ def create_workflow(
         hpi_config = config.pop("hpi_config", None)
     else:
         config.pop("hpi_config", None)
+    if max_workers is None:
+        max_workers = config.pop("max_workers", 0)
+    else:
+        config.pop("max_workers", None)
+    if pipelined is None:
+        pipelined = config.pop("pipelined", False)
+    else:
+        config.pop("pipelined", None)
 
     pipeline = WorkflowPipeline(
         config=config,
@@ -52,6 +70,8 @@ def create_workflow(
         pp_option=pp_option,
         use_hpip=use_hpip,
         hpi_config=hpi_config,
+        max_workers=max_workers,
+        pipelined=pipelined,
         *args,
         **kwargs,
     )
@@ -0,0 +1,291 @@
+from typing import Any, Dict, List, Optional, Tuple
+import ast
+import json
+import os
+
+import numpy as np
+
+"""
+定长数组的.npy分片存储，写入时通过内存映射直接填充预分配的分片，读取时内存映射加载，不复制数据
+"""
+
+# 分片文件名中序号的位数
+SHARD_DIGITS = 5
+
+
+def resize_npy(path: str, rows: int) -> None:
+    """
+    修改.npy文件第一维的长度，原地改写文件头并截断或扩展数据区
+
+    新的文件头用空格补齐到原长度，数据区的偏移不变；第一维变短时文件头只会更短，
+    因此分片按最大行数创建后可以反复缩短和恢复。
+
+    Args:
+        path (str): .npy文件路径
+        rows (int): 新的第一维长度
+
+    Raises:
+        ValueError: 当新的文件头超过原文件头长度时抛出异常
+    """
+    with open(path, 'r+b') as f:
+        major, _ = np.lib.format.read_magic(f)
+        length_size = 2 if major == 1 else 4
+        header_length = int.from_bytes(f.read(length_size), 'little')
+        header_offset = f.tell()
+        header = ast.literal_eval(f.read(header_length).decode('latin1'))
+        shape = (rows,) + tuple(header['shape'][1:])
+        text = repr({'descr': header['descr'], 'fortran_order': header['fortran_order'], 'shape': shape})
+        if len(text) + 1 > header_length:
+            raise ValueError(f"{path} 的文件头无法容纳形状 {shape}")
+        f.seek(header_offset)
+        f.write((text.ljust(header_length - 1) + '\n').encode('latin1'))
+        dtype = np.lib.format.descr_to_dtype(header['descr'])
+        row_bytes = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        f.truncate(header_offset + header_length + rows * row_bytes)
+
+
+class NpyShardWriter:
+    """.npy分片写入器
+
+    数组按行追加到预分配shard_size行的分片 {prefix}_{序号}.npy 中，写入通过np.lib.format.open_memmap
+    直接填充文件映射，不经过中间缓冲。每行在索引文件 {prefix}_index.jsonl 中记录所在分片、行号、来源和来源内索引。
+
+    flush时把当前分片缩短到已写入的行数（下次写入时恢复原长度继续填充），并写入描述全部分片的
+    {prefix}_meta.json，此后每个分片都是形状准确的.npy文件，可直接用np.load(mmap_mode='r')加载。
+
+    写入器不是线程安全的，由调用方加锁。
+    """
+
+    def __init__(self, directory: str, prefix: str, shard_size: int = 10000, dtype: Optional[str] = None) -> None:
+        """
+        初始化.npy分片写入器
+
+        Args:
+            directory (str): 输出目录
+            prefix (str): 文件名前缀
+            shard_size (int, optional): 每个分片的行数. Defaults to 10000
+            dtype (Optional[str], optional): 保存的数据类型，None表示使用第一行的数据类型. Defaults to None
+        """
+        if shard_size < 1:
+            raise ValueError(f"分片行数必须大于0，当前为 {shard_size}")
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.dtype = np.dtype(dtype) if dtype else None
+        self.item_shape: Optional[Tuple[int, ...]] = None  # 每行的形状，由第一行确定
+        self.shard = 0  # 当前分片序号
+        self.rows = 0  # 当前分片已写入的行数
+        self.array = None  # 当前分片的内存映射
+        self.index_handle = None  # 索引文件句柄
+        self.index_bytes = 0  # 索引文件已写入的字节数
+        self.started = False  # 本次运行是否已打开过文件
+        self.resume = False  # 是否从恢复的状态继续写入
+
+    def shard_path(self, shard: int) -> str:
+        """
+        获取分片文件路径
+
+        Args:
+            shard (int): 分片序号
+
+        Returns:
+            str: 分片文件路径
+        """
+        return os.path.join(self.directory, f"{self.prefix}_{shard:0{SHARD_DIGITS}d}.npy")
+
+    @property
+    def index_path(self) -> str:
+        """索引文件路径"""
+        return os.path.join(self.directory, f"{self.prefix}_index.jsonl")
+
+    @property
+    def meta_path(self) -> str:
+        """分片描述文件路径"""
+        return os.path.join(self.directory, f"{self.prefix}_meta.json")
+
+    def append(self, items: List[Tuple[np.ndarray, Any]], source: Any = None) -> List[Tuple[str, int]]:
+        """
+        追加若干行
+
+        Args:
+            items (List[Tuple[np.ndarray, Any]]): (数组, 来源内索引) 列表，所有数组的形状必须相同
+            source (Any, optional): 来源（如图像文件名），记录到索引文件. Defaults to None
+
+        Returns:
+            List[Tuple[str, int]]: 每行所在的分片路径和行号
+
+        Raises:
+            ValueError: 当数组形状与已写入的行或同批的行不一致，或无法转换为保存的数据类型时抛出异常，
+                此时本批的行都不写入
+        """
+        if not self.started:
+            self._start()
+        if not items:
+            return []
+        # 写入任何一行之前先检查整批数据，避免部分行已写入分片但没有索引记录
+        values = [np.asarray(value) for value, _ in items]
+        item_shape = self.item_shape if self.item_shape is not None else tuple(values[0].shape)
+        dtype = self.dtype if self.dtype is not None else values[0].dtype
+        for position, value in enumerate(values):
+            if tuple(value.shape) != item_shape:
+                raise ValueError(f"第 {position} 个数组的形状 {tuple(value.shape)} 与已写入的形状 {item_shape} 不一致")
+            try:
+                values[position] = value.astype(dtype, copy=False)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"第 {position} 个数组无法转换为数据类型 {dtype}: {str(e)}")
+        self.item_shape = item_shape
+        self.dtype = dtype
+
+        positions = []
+        lines = []
+        for value, (_, index) in zip(values, items):
+            if self.array is None:
+                self._open_shard()
+            self.array[self.rows] = value
+            path = self.shard_path(self.shard)
+            positions.append((path, self.rows))
+            lines.append(json.dumps({"shard": os.path.basename(path), "row": self.rows, "source": source,
+                                     "index": index}, ensure_ascii=False, default=str) + "\n")
+            self.rows += 1
+            if self.rows == self.shard_size:
+                # 当前分片已满，下一行写入新的分片
+                self.array.flush()
+                self.array = None
+                self.shard += 1
+                self.rows = 0
+        content = "".join(lines).encode("utf-8")
+        self.index_handle.write(content)
+        self.index_bytes += len(content)
+        return positions
+
+    def _start(self) -> None:
+        """本次运行首次写入时打开索引文件，删除上次运行遗留的后续分片"""
+        if self.resume and os.path.exists(self.index_path):
+            # 丢弃恢复的状态之后写入的索引
+            os.truncate(self.index_path, self.index_bytes)
+            self.index_handle = open(self.index_path, 'ab')
+        else:
+            self.index_handle = open(self.index_path, 'wb')
+            self.index_bytes = 0
+        # 续跑时保留已写入部分行的当前分片，其后的分片都是未提交的内容
+        stale = self.shard + 1 if self.resume and self.rows > 0 else self.shard
+        while os.path.exists(self.shard_path(stale)):
+            os.remove(self.shard_path(stale))
+            stale += 1
+        self.started = True
+
+    def _open_shard(self) -> None:
+        """打开当前分片的内存映射，已写入部分行的分片恢复原长度后继续填充"""
+        path = self.shard_path(self.shard)
+        if self.rows > 0 and os.path.exists(path):
+            resize_npy(path, self.shard_size)
+            self.array = np.load(path, mmap_mode='r+')
+            if self.array.dtype != self.dtype or tuple(self.array.shape[1:]) != self.item_shape:
+                raise ValueError(f"分片 {path} 的数据类型或形状与写入的数组不一致")
+        else:
+            self.rows = 0
+            self.array = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype,
+                                                   shape=(self.shard_size,) + self.item_shape)
+
+    def flush(self) -> None:
+        """把已写入的行写入文件，缩短当前分片到已写入的行数，并更新分片描述文件"""
+        if not self.started:
+            return
+        if self.array is not None:
+            self.array.flush()
+            # 释放映射后才能修改文件长度
+            self.array = None
+            resize_npy(self.shard_path(self.shard), self.rows)
+        self.index_handle.flush()
+        shards = [{"file": os.path.basename(self.shard_path(shard)), "rows": self.shard_size}
+                  for shard in range(self.shard)]
+        if self.rows > 0:
+            shards.append({"file": os.path.basename(self.shard_path(self.shard)), "rows": self.rows})
+        meta = {
+            "dtype": self.dtype.str if self.dtype is not None else None,
+            "shape": list(self.item_shape) if self.item_shape is not None else None,
+            "shard_size": self.shard_size,
+            "rows": self.shard * self.shard_size + self.rows,
+            "shards": shards,
+        }
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.meta_path)
+
+    def close(self) -> None:
+        """写入已写入的行并关闭文件"""
+        self.flush()
+        if self.index_handle is not None:
+            self.index_handle.close()
+            self.index_handle = None
+        self.started = False
+
+    def state(self) -> Dict[str, Any]:
+        """
+        获取写入位置，用于断点续跑
+
+        Returns:
+            Dict[str, Any]: 当前分片序号、行数、索引文件字节数、数据类型和形状
+        """
+        return {
+            "shard": self.shard,
+            "rows": self.rows,
+            "index_bytes": self.index_bytes,
+            "dtype": self.dtype.str if self.dtype is not None else None,
+            "shape": list(self.item_shape) if self.item_shape is not None else None,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        恢复写入位置，之后写入的行接在记录的位置之后，记录之后写入的内容被覆盖
+
+        Args:
+            state (Dict[str, Any]): state返回的写入位置
+        """
+        self.close()
+        self.shard = state.get("shard", 0)
+        self.rows = state.get("rows", 0)
+        self.index_bytes = state.get("index_bytes", 0)
+        if state.get("dtype"):
+            self.dtype = np.dtype(state["dtype"])
+        if state.get("shape") is not None:
+            self.item_shape = tuple(state["shape"])
+        self.resume = True
+
+    def reset(self) -> None:
+        """关闭文件并回到起始位置，下次写入时从第一个分片重新开始"""
+        self.close()
+        self.shard = 0
+        self.rows = 0
+        self.index_bytes = 0
+        self.item_shape = None
+        self.resume = False
+
+
+def load_shards(directory: str, prefix: str, mmap: bool = True) -> Tuple[List[np.ndarray], List[Dict[str, Any]]]:
+    """
+    加载NpyShardWriter写入的分片和索引
+
+    Args:
+        directory (str): 输出目录
+        prefix (str): 文件名前缀
+        mmap (bool, optional): 是否以只读内存映射方式加载，不复制数据. Defaults to True
+
+    Returns:
+        Tuple[List[np.ndarray], List[Dict[str, Any]]]: 按顺序排列的分片数组和每行的索引记录
+            （shard、row、source、index），索引记录与分片中的行按顺序一一对应
+    """
+    with open(os.path.join(directory, f"{prefix}_meta.json"), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    arrays = []
+    for shard in meta["shards"]:
+        array = np.load(os.path.join(directory, shard["file"]), mmap_mode='r' if mmap else None)
+        arrays.append(array[:shard["rows"]])
+    entries = []
+    with open(os.path.join(directory, f"{prefix}_index.jsonl"), 'r', encoding='utf-8') as f:
+        for line in f:
+            if len(entries) == meta["rows"]:
+                break
+            entries.append(json.loads(line))
+    return arrays, entries
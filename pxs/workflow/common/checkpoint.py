@@ -0,0 +1,176 @@
+from typing import Any, Dict, List, Optional, Set
+import json
+import logging
+import os
+import threading
+import time
+
+"""
+流式工作流的断点续跑记录，保存已完成的输入和汇节点（保存文件节点）的计数器
+"""
+
+# 断点记录文件名，保存在工作流目录中
+CHECKPOINT_FILE = "checkpoint.jsonl"
+# 默认的提交间隔（秒）
+DEFAULT_CHECKPOINT_INTERVAL = 5.0
+# 默认的停止时等待未完成任务的最长时间（秒）
+DEFAULT_DRAIN_TIMEOUT = 30.0
+
+
+def input_key(file_path: str) -> str:
+    """
+    计算输入文件的断点键
+
+    Args:
+        file_path (str): 输入文件路径
+
+    Returns:
+        str: 文件路径、大小和修改时间组成的键，文件被替换或修改后键随之变化
+    """
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+class RunCheckpoint:
+    """断点续跑记录
+
+    记录文件为追加写入的JSON行：首行为工作流定义哈希，之后每次提交追加一行，
+    包含本次新完成的输入键和各节点的状态。加载时合并所有行，末尾写了一半的行被忽略。
+
+    调度器把流式结果交给下游后调用handed，在没有未完成任务（所有已交出的结果都已处理完）
+    时调用commit，此时汇节点的计数器与已完成的输入严格对应。
+    """
+
+    def __init__(self, directory: str, definition_hash: str, resume: bool = True,
+                 interval: float = DEFAULT_CHECKPOINT_INTERVAL, drain_timeout: float = DEFAULT_DRAIN_TIMEOUT) -> None:
+        """
+        初始化断点续跑记录
+
+        Args:
+            directory (str): 保存记录文件的目录
+            definition_hash (str): 工作流定义哈希，与记录中的不一致时不续跑
+            resume (bool, optional): 是否从已有记录续跑，为False时清空记录重新开始. Defaults to True
+            interval (float, optional): 提交间隔（秒）. Defaults to 5.0
+            drain_timeout (float, optional): 被停止时等待已交出的结果处理完毕再提交的最长时间（秒），
+                超时则不提交. Defaults to 30.0
+        """
+        self.path = os.path.join(directory, CHECKPOINT_FILE)
+        self.definition_hash = definition_hash
+        self.interval = interval
+        self.drain_timeout = drain_timeout
+        self.done: Set[str] = set()  # 已完成的输入键
+        self.node_states: Dict[str, Dict[str, Any]] = {}  # 上次提交时各节点的状态
+        self.resumed = False  # 是否从已有记录续跑
+        self.pending: List[str] = []  # 已交给下游但尚未提交的输入键
+        self.lock = threading.Lock()
+        self.committed = threading.Condition(self.lock)
+        self.last_commit = time.monotonic()
+
+        if resume:
+            self._load()
+        if not self.resumed:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'definition_hash': definition_hash}) + '\n')
+
+    def _load(self) -> None:
+        """读取已有的记录文件，定义哈希一致时恢复已完成的输入和节点状态"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('definition_hash') != self.definition_hash:
+                    logging.info('工作流定义已变化，不从断点续跑')
+                    return
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 写入过程中中断的最后一行
+                        break
+                    self.done.update(record.get('keys', []))
+                    self.node_states.update(record.get('states', {}))
+        except Exception as e:
+            logging.warning(f'读取断点记录失败，重新开始运行：{str(e)}')
+            self.done = set()
+            self.node_states = {}
+            return
+        self.resumed = True
+
+    def is_done(self, key: str) -> bool:
+        """
+        检查输入是否已在之前的运行中完成
+
+        Args:
+            key (str): 输入键
+
+        Returns:
+            bool: 是否已完成
+        """
+        return key in self.done
+
+    def handed(self, key: Optional[str]) -> None:
+        """
+        记录一条流式结果已交给下游
+
+        Args:
+            key (Optional[str]): 输入键，为None时忽略
+        """
+        if key is None:
+            return
+        with self.lock:
+            self.pending.append(key)
+
+    def due(self) -> bool:
+        """
+        检查是否到了提交时间
+
+        Returns:
+            bool: 有待提交的输入且距上次提交超过提交间隔
+        """
+        return bool(self.pending) and time.monotonic() - self.last_commit >= self.interval
+
+    def wait_commit(self, stop_event: threading.Event, timeout: float) -> None:
+        """
+        到了提交时间时阻塞等待下一次提交，给调度器清空未完成任务的机会
+
+        流水线和并发模式下任务持续流动，流式节点在此短暂暂停，保证记录按提交间隔推进
+
+        Args:
+            stop_event (threading.Event): 停止信号
+            timeout (float): 检查停止信号的间隔（秒）
+        """
+        with self.committed:
+            while self.due() and not stop_event.is_set():
+                self.committed.wait(timeout)
+
+    def commit(self, node_states: Dict[str, Dict[str, Any]]) -> None:
+        """
+        提交已交给下游的输入，调用时所有已交出的结果必须已处理完毕
+
+        Args:
+            node_states (Dict[str, Dict[str, Any]]): 各节点的状态（如保存文件节点的计数器）
+        """
+        with self.lock:
+            keys = self.pending
+            self.pending = []
+            self.last_commit = time.monotonic()
+            if keys:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps({'keys': keys, 'states': node_states}, ensure_ascii=False) + '\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+                except Exception as e:
+                    logging.error(f'写入断点记录失败：{str(e)}')
+                self.done.update(keys)
+                self.node_states.update(node_states)
+            self.committed.notify_all()
+
+    def finish(self) -> None:
+        """工作流正常完成，删除记录文件，下次运行从头开始"""
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception as e:
+            logging.warning(f'删除断点记录失败：{str(e)}')
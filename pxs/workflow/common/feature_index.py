@@ -0,0 +1,315 @@
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from pxs.workflow.common.features import FEATURE_DTYPE
+from pxs.workflow.common.feature_library import FeatureLibrary
+
+"""
+特征库的近似最近邻索引（IVF倒排索引，可选乘积量化），纯NumPy实现
+"""
+
+# 支持的索引类型，exact为逐个比较所有特征（精确结果）
+INDEX_TYPES = ("exact", "ivf", "ivfpq")
+# 乘积量化每个子空间的聚类中心数（编码为uint8）
+PQ_CENTROIDS = 256
+# 训练聚类中心时每个中心最多使用的样本数
+TRAIN_SAMPLES_PER_CENTROID = 64
+# 分配聚类中心时每块的行数，限制临时距离矩阵占用的内存
+ASSIGN_CHUNK_ROWS = 8192
+# 索引文件格式版本
+INDEX_VERSION = 1
+
+
+def _assign(data: np.ndarray, centroids: np.ndarray, spherical: bool) -> np.ndarray:
+    """
+    把每行分配到最近的聚类中心
+
+    Args:
+        data (np.ndarray): 数据矩阵
+        centroids (np.ndarray): 聚类中心
+        spherical (bool): 是否按内积（单位向量的余弦相似度）分配，否则按欧氏距离分配
+
+    Returns:
+        np.ndarray: 每行所属的聚类中心序号
+    """
+    labels = np.empty(len(data), dtype=np.int64)
+    squared = None if spherical else (centroids.astype(np.float64) ** 2).sum(axis=1)
+    for start in range(0, len(data), ASSIGN_CHUNK_ROWS):
+        dots = data[start:start + ASSIGN_CHUNK_ROWS] @ centroids.T
+        if spherical:
+            labels[start:start + ASSIGN_CHUNK_ROWS] = np.argmax(dots, axis=1)
+        else:
+            # |x-c|^2 = |x|^2 + |c|^2 - 2x·c，|x|^2对每行相同，不影响最近中心
+            labels[start:start + ASSIGN_CHUNK_ROWS] = np.argmin(squared - 2 * dots, axis=1)
+    return labels
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, spherical: bool = False,
+           seed: int = 0) -> np.ndarray:
+    """
+    k-means聚类（Lloyd算法），距离由矩阵乘法计算
+
+    Args:
+        data (np.ndarray): 训练数据，形状为 (样本数, 维度)
+        k (int): 聚类中心数，不能超过样本数
+        iterations (int, optional): 迭代次数. Defaults to 10
+        spherical (bool, optional): 是否为球面k-means（数据为单位向量，中心归一化，按内积分配）. Defaults to False
+        seed (int, optional): 随机种子. Defaults to 0
+
+    Returns:
+        np.ndarray: 形状为 (k, 维度) 的float32聚类中心
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(data, dtype=FEATURE_DTYPE)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(data, centroids, spherical)
+        counts = np.bincount(labels, minlength=k)
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        nonempty = counts > 0
+        sums = np.add.reduceat(data[order], starts[nonempty], axis=0, dtype=np.float64)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        # 空的聚类中心重新取随机样本
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        if spherical:
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms > 0, norms, 1)
+    return centroids
+
+
+def library_fingerprint(library: FeatureLibrary) -> str:
+    """
+    计算特征库的指纹，用于判断保存的索引是否与特征库一致
+
+    对特征ID、矩阵形状和均匀抽取的至多1024行计算摘要，不读取整个矩阵。
+
+    Args:
+        library (FeatureLibrary): 特征库
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(library.matrix.shape).encode('utf-8'))
+    digest.update("\n".join(library.ids).encode('utf-8'))
+    step = max(1, len(library) // 1024)
+    digest.update(np.ascontiguousarray(library.matrix[::step]).tobytes())
+    digest.update(library.norms[::step].tobytes())
+    return digest.hexdigest()
+
+
+class IVFIndex:
+    """IVF倒排索引
+
+    用球面k-means把特征库的单位向量划分为nlist个聚类（倒排列表），查询时只比较与查询向量
+    最相似的nprobe个聚类中的特征，计算量约为精确搜索的 nprobe/nlist。
+
+    pq_m大于0时为IVFPQ：每个特征与所属聚类中心的残差按维度切分为pq_m段，每段用256个中心
+    编码为1字节。查询时由查表的内积近似值选出refine个候选，再对候选计算精确相似度。
+
+    聚类按余弦相似度划分；度量方法为欧氏距离或曼哈顿距离时，用同样的聚类选出候选，
+    再按所选度量方法计算候选的精确相似度，特征模长差异较大时召回率会降低。
+    """
+
+    def __init__(self, nlist: int, pq_m: int = 0) -> None:
+        """
+        初始化IVF倒排索引（未训练）
+
+        Args:
+            nlist (int): 聚类（倒排列表）数
+            pq_m (int, optional): 乘积量化的子空间数，0表示不量化. Defaults to 0
+        """
+        self.nlist = nlist
+        self.pq_m = pq_m
+        self.centroids = None  # 聚类中心，形状为 (nlist, 维度)
+        self.list_ids = None  # 按倒排列表排列的特征库行号
+        self.offsets = None  # 每个倒排列表在list_ids中的起止位置，长度为nlist+1
+        self.codebooks = None  # 乘积量化码本，形状为 (pq_m, 256, 维度/pq_m)
+        self.codes = None  # 乘积量化编码，与list_ids一一对应，形状为 (特征数, pq_m)
+        self.fingerprint = ""  # 建立索引时特征库的指纹
+
+    @classmethod
+    def build(cls, library: FeatureLibrary, nlist: int = 0, pq_m: int = 0, iterations: int = 10,
+              seed: int = 0) -> 'IVFIndex':
+        """
+        为特征库建立索引
+
+        Args:
+            library (FeatureLibrary): 特征库
+            nlist (int, optional): 聚类数，0表示取 4*sqrt(特征数). Defaults to 0
+            pq_m (int, optional): 乘积量化的子空间数，0表示不量化，必须能整除特征维度. Defaults to 0
+            iterations (int, optional): k-means迭代次数. Defaults to 10
+            seed (int, optional): 随机种子. Defaults to 0
+
+        Returns:
+            IVFIndex: 建立好的索引
+
+        Raises:
+            ValueError: 当特征库为空或pq_m不能整除特征维度时抛出异常
+        """
+        total = len(library)
+        if not total:
+            raise ValueError("特征库为空，无法建立索引")
+        if pq_m and library.dim % pq_m:
+            raise ValueError(f"乘积量化子空间数 {pq_m} 不能整除特征维度 {library.dim}")
+        nlist = min(total, nlist or max(1, int(4 * np.sqrt(total))))
+        index = cls(nlist, pq_m)
+        rng = np.random.default_rng(seed)
+
+        # 在抽样数据上训练聚类中心，再把所有特征分配到倒排列表
+        samples = min(total, nlist * TRAIN_SAMPLES_PER_CENTROID)
+        train = library.matrix[np.sort(rng.choice(total, samples, replace=False))]
+        index.centroids = kmeans(train, nlist, iterations, spherical=True, seed=seed)
+        labels = _assign(library.matrix, index.centroids, spherical=True)
+        index.list_ids = np.argsort(labels, kind='stable')
+        index.offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=nlist)))).astype(np.int64)
+
+        if pq_m:
+            sub_dim = library.dim // pq_m
+            residuals = library.matrix[index.list_ids] - index.centroids[labels[index.list_ids]]
+            train_residuals = residuals[np.sort(rng.choice(total, min(total, PQ_CENTROIDS * 256), replace=False))]
+            centroids = min(PQ_CENTROIDS, len(train_residuals))
+            index.codebooks = np.zeros((pq_m, PQ_CENTROIDS, sub_dim), dtype=FEATURE_DTYPE)
+            index.codes = np.empty((total, pq_m), dtype=np.uint8)
+            for part in range(pq_m):
+                columns = slice(part * sub_dim, (part + 1) * sub_dim)
+                index.codebooks[part, :centroids] = kmeans(train_residuals[:, columns], centroids, iterations,
+                                                           seed=seed + part + 1)
+                index.codes[:, part] = _assign(residuals[:, columns], index.codebooks[part, :centroids],
+                                               spherical=False)
+        index.fingerprint = library_fingerprint(library)
+        return index
+
+    def search(self, library: FeatureLibrary, feature: np.ndarray, metric: str, nprobe: int = 8,
+               refine: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        搜索与查询向量相似的特征
+
+        Args:
+            library (FeatureLibrary): 建立索引时使用的特征库
+            feature (np.ndarray): 查询向量
+            metric (str): 相似度度量方法
+            nprobe (int, optional): 比较的聚类数，越大召回率越高、越慢. Defaults to 8
+            refine (int, optional): IVFPQ时计算精确相似度的候选数. Defaults to 100
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: 候选特征的行号和精确相似度
+        """
+        query = np.asarray(feature, dtype=FEATURE_DTYPE).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        unit = query / norm if norm > 0 else query
+        centroid_scores = self.centroids @ unit
+        nprobe = max(1, min(nprobe, self.nlist))
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < self.nlist \
+            else np.arange(self.nlist)
+        starts = self.offsets[probes]
+        lengths = self.offsets[probes + 1] - starts
+        # 所选倒排列表在list_ids中的位置
+        positions = np.repeat(starts - np.cumsum(np.concatenate(([0], lengths[:-1]))), lengths) \
+            + np.arange(int(lengths.sum()))
+        if not len(positions):
+            # 所选聚类都为空（只可能出现在很小的特征库中），退回精确搜索
+            rows = np.arange(len(library))
+            return rows, library.similarities(query, metric)
+
+        refine = max(1, refine)
+        if self.codes is not None and len(positions) > refine:
+            # 内积 = 查询与聚类中心的内积 + 查询与残差的内积，后者按子空间查表求和
+            sub_dim = len(unit) // self.pq_m
+            tables = np.einsum('md,mkd->mk', unit.reshape(self.pq_m, sub_dim), self.codebooks)
+            approx = np.repeat(centroid_scores[probes], lengths) \
+                + tables[np.arange(self.pq_m), self.codes[positions]].sum(axis=1)
+            positions = positions[np.argpartition(-approx, refine - 1)[:refine]]
+
+        rows = self.list_ids[positions]
+        return rows, library.similarities(query, metric, rows=rows)
+
+    def save(self, path: str) -> None:
+        """
+        保存索引到文件（先写入临时文件再替换）
+
+        Args:
+            path (str): 索引文件路径（.npz）
+        """
+        meta = {"version": INDEX_VERSION, "nlist": self.nlist, "pq_m": self.pq_m, "fingerprint": self.fingerprint}
+        arrays = {"centroids": self.centroids, "list_ids": self.list_ids, "offsets": self.offsets}
+        if self.codes is not None:
+            arrays.update(codebooks=self.codebooks, codes=self.codes)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        """
+        从文件加载索引
+
+        Args:
+            path (str): 索引文件路径
+
+        Returns:
+            IVFIndex: 加载的索引
+
+        Raises:
+            ValueError: 当索引文件版本不支持时抛出异常
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"不支持的索引文件版本: {meta.get('version')}")
+            index = cls(meta["nlist"], meta["pq_m"])
+            index.fingerprint = meta["fingerprint"]
+            index.centroids = data["centroids"]
+            index.list_ids = data["list_ids"]
+            index.offsets = data["offsets"]
+            if index.pq_m:
+                index.codebooks = data["codebooks"]
+                index.codes = data["codes"]
+        return index
+
+
+def load_or_build_index(library: FeatureLibrary, params: Dict[str, Any]) -> Optional[IVFIndex]:
+    """
+    按节点参数获取特征库的索引：索引文件与特征库和参数一致时直接加载，否则重新建立并保存
+
+    Args:
+        library (FeatureLibrary): 特征库
+        params (Dict[str, Any]): 节点参数，使用index、nlist、pq_m和index_path
+
+    Returns:
+        Optional[IVFIndex]: 索引，index为exact或特征库为空时返回None
+
+    Raises:
+        ValueError: 当索引类型不支持时抛出异常
+    """
+    kind = params.get("index", "exact") or "exact"
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"不支持的索引类型: {kind}")
+    if kind == "exact" or not len(library):
+        return None
+    pq_m = int(params.get("pq_m", 16) or 0) if kind == "ivfpq" else 0
+    nlist = int(params.get("nlist", 0) or 0)
+    path = params.get("index_path", "")
+    if path and os.path.exists(path):
+        try:
+            index = IVFIndex.load(path)
+            if index.fingerprint == library_fingerprint(library) and index.pq_m == pq_m \
+                    and (not nlist or index.nlist == min(nlist, len(library))):
+                return index
+            print(f"索引文件 {path} 与特征库或参数不一致，重新建立索引")
+        except Exception as e:
+            print(f"警告: 加载索引文件 {path} 失败，重新建立索引: {str(e)}")
+    index = IVFIndex.build(library, nlist=nlist, pq_m=pq_m)
+    if path:
+        index.save(path)
+    return index
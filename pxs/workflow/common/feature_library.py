@@ -0,0 +1,291 @@
+from typing import Dict, List, Optional, Sequence
+import json
+import os
+
+import numpy as np
+
+from pxs.workflow.common.features import FEATURE_DTYPE
+
+"""
+特征库的矩阵表示，相似度由一次矩阵运算得出
+"""
+
+# 支持的相似度度量方法
+METRICS = ("cosine", "euclidean", "manhattan")
+# 曼哈顿距离按块计算时每块的行数，限制临时数组占用的内存
+MANHATTAN_CHUNK_ROWS = 4096
+# 欧氏距离展开式中平方距离小于 此比例*两向量模长之积 的行，float32内积的舍入误差被相减放大，逐行以float64重新计算
+EUCLIDEAN_RECHECK_RATIO = 0.01
+# 编译后的特征库文件格式版本
+COMPILED_VERSION = 1
+# 编译后的特征库文件名
+COMPILED_MATRIX = "matrix.npy"
+COMPILED_NORMS = "norms.npy"
+COMPILED_IDS = "ids.npy"
+COMPILED_META = "meta.json"
+
+
+def source_state(paths: Sequence[str]) -> Dict[str, List[int]]:
+    """
+    获取特征库源文件的状态，用于判断编译后的特征库是否需要重新编译
+
+    Args:
+        paths (Sequence[str]): 源文件路径
+
+    Returns:
+        Dict[str, List[int]]: 源文件绝对路径到 [修改时间（纳秒）, 文件大小] 的映射
+    """
+    state = {}
+    for path in paths:
+        stat = os.stat(path)
+        state[os.path.abspath(path)] = [stat.st_mtime_ns, stat.st_size]
+    return state
+
+
+class FeatureLibrary:
+    """特征库
+
+    特征按行保存在连续的float32矩阵matrix中，每行预先归一化为单位向量，原始模长保存在norms中，
+    ids为与行一一对应的特征ID。
+
+    - 余弦相似度：归一化矩阵与归一化查询向量的一次矩阵向量乘
+    - 欧氏距离：由同一次矩阵向量乘得到的内积和预先计算的模长平方展开计算，不生成差值矩阵。
+      展开式 |a|^2+|b|^2-2a·b 在两向量接近时相减抵消，float32内积的舍入误差被放大，
+      因此平方距离小于 EUCLIDEAN_RECHECK_RATIO*|a||b| 的行（即最相似的候选）还原向量后以float64逐行重新计算
+    - 曼哈顿距离：按块还原原始向量后计算绝对差之和
+
+    距离按 1/(1+距离) 转换为相似度。矩阵中保存的是归一化后舍入为float32的向量，
+    与逐个计算原始向量的结果相差在float32精度量级。
+
+    save把矩阵、模长和ID保存为.npy文件，load以只读内存映射方式加载，不解析、不复制数据。
+    """
+
+    def __init__(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        初始化特征库
+
+        Args:
+            ids (Sequence[str]): 特征ID
+            vectors (np.ndarray): 原始特征矩阵，形状为 (特征数, 维度)
+
+        Raises:
+            ValueError: 当特征矩阵形状与ID数量不一致时抛出异常
+        """
+        vectors = np.asarray(vectors, dtype=FEATURE_DTYPE)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError(f"特征矩阵形状 {vectors.shape} 与特征ID数量 {len(ids)} 不一致")
+        norms = np.linalg.norm(vectors, axis=1)
+        # 模长为0的特征保持为零向量，余弦相似度为0
+        safe_norms = np.where(norms > 0, norms, 1).astype(FEATURE_DTYPE)
+        self.ids: Sequence[str] = list(ids)
+        self.matrix = np.ascontiguousarray(vectors / safe_norms[:, None], dtype=FEATURE_DTYPE)
+        self.norms = norms.astype(FEATURE_DTYPE)
+        self.squared_norms = norms.astype(np.float64) ** 2
+
+    @classmethod
+    def from_dict(cls, features: Dict[str, np.ndarray]) -> 'FeatureLibrary':
+        """
+        由 {特征ID: 特征向量} 创建特征库
+
+        Args:
+            features (Dict[str, np.ndarray]): 特征ID到特征向量的映射
+
+        Returns:
+            FeatureLibrary: 特征库
+
+        Raises:
+            ValueError: 当特征维度不一致时抛出异常
+        """
+        if not features:
+            return cls([], np.empty((0, 0), dtype=FEATURE_DTYPE))
+        dims = {np.asarray(vector).size for vector in features.values()}
+        if len(dims) > 1:
+            raise ValueError(f"特征库中的特征维度不一致: {sorted(dims)}")
+        vectors = np.stack([np.asarray(vector, dtype=FEATURE_DTYPE).reshape(-1) for vector in features.values()])
+        return cls(list(features.keys()), vectors)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'FeatureLibrary':
+        """
+        加载save保存的特征库
+
+        Args:
+            directory (str): 编译后的特征库目录
+            mmap (bool, optional): 是否以只读内存映射方式加载，不复制数据. Defaults to True
+
+        Returns:
+            FeatureLibrary: 特征库，ids为numpy字符串数组
+        """
+        mmap_mode = 'r' if mmap else None
+        return cls.from_normalized(
+            np.load(os.path.join(directory, COMPILED_IDS), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, COMPILED_MATRIX), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, COMPILED_NORMS), mmap_mode=mmap_mode)
+        )
+
+    @classmethod
+    def from_normalized(cls, ids: Sequence[str], matrix: np.ndarray, norms: np.ndarray,
+                        squared_norms: Optional[np.ndarray] = None) -> 'FeatureLibrary':
+        """
+        由已归一化的矩阵和模长创建特征库，不复制数据
+
+        Args:
+            ids (Sequence[str]): 特征ID
+            matrix (np.ndarray): 每行已归一化的float32矩阵
+            norms (np.ndarray): 每行的原始模长
+            squared_norms (Optional[np.ndarray], optional): 模长平方，None时由norms计算. Defaults to None
+
+        Returns:
+            FeatureLibrary: 特征库
+        """
+        library = cls.__new__(cls)
+        library.ids = ids
+        library.matrix = matrix
+        library.norms = norms
+        library.squared_norms = norms.astype(np.float64) ** 2 if squared_norms is None else squared_norms
+        return library
+
+    def save(self, directory: str, sources: Optional[Dict[str, List[int]]] = None) -> None:
+        """
+        把特征库保存为编译后的格式：归一化矩阵、模长和ID各一个.npy文件，以及描述文件meta.json
+
+        先删除描述文件，所有数据文件替换完成后再写入，中途失败时描述文件不存在，不会加载不完整的特征库。
+
+        Args:
+            directory (str): 输出目录
+            sources (Optional[Dict[str, List[int]]], optional): source_state返回的源文件状态，记录到描述文件. Defaults to None
+        """
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, COMPILED_META)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        ids = np.array([str(feature_id) for feature_id in self.ids], dtype=str) if len(self) \
+            else np.empty(0, dtype='<U1')
+        for filename, array in ((COMPILED_MATRIX, self.matrix), (COMPILED_NORMS, self.norms), (COMPILED_IDS, ids)):
+            temp_path = os.path.join(directory, filename + ".tmp")
+            with open(temp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(temp_path, os.path.join(directory, filename))
+        meta = {"version": COMPILED_VERSION, "rows": len(self), "dim": self.dim, "sources": sources or {}}
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    @staticmethod
+    def is_compiled(directory: str, sources: Dict[str, List[int]]) -> bool:
+        """
+        判断编译后的特征库是否存在且与源文件一致
+
+        Args:
+            directory (str): 编译后的特征库目录
+            sources (Dict[str, List[int]]): source_state返回的当前源文件状态
+
+        Returns:
+            bool: 源文件的集合、修改时间和大小都未变化时返回True
+        """
+        try:
+            with open(os.path.join(directory, COMPILED_META), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return meta.get("version") == COMPILED_VERSION and meta.get("sources") == sources
+
+    def __len__(self) -> int:
+        """特征数量"""
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        """特征维度"""
+        return self.matrix.shape[1]
+
+    def similarities(self, feature: np.ndarray, metric: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        计算查询向量与特征库中所有特征（或指定行）的相似度
+
+        Args:
+            feature (np.ndarray): 查询向量
+            metric (str): 相似度度量方法，cosine、euclidean或manhattan
+            rows (Optional[np.ndarray], optional): 只计算这些行（如近似索引选出的候选），None表示所有行. Defaults to None
+
+        Returns:
+            np.ndarray: 与ids（或rows）一一对应的相似度
+
+        Raises:
+            ValueError: 当度量方法不支持或查询向量维度与特征库不一致时抛出异常
+        """
+        if metric not in METRICS:
+            raise ValueError(f"不支持的相似度度量方法: {metric}")
+        query = np.asarray(feature, dtype=FEATURE_DTYPE).reshape(-1)
+        if query.size != self.dim:
+            raise ValueError(f"查询特征维度 {query.size} 与特征库维度 {self.dim} 不一致")
+        query_norm = float(np.linalg.norm(query))
+        if rows is None:
+            matrix, norms, squared_norms = self.matrix, self.norms, self.squared_norms
+        else:
+            matrix, norms, squared_norms = self.matrix[rows], self.norms[rows], self.squared_norms[rows]
+
+        if metric == "cosine":
+            if query_norm == 0:
+                return np.zeros(len(matrix), dtype=FEATURE_DTYPE)
+            return matrix @ (query / query_norm)
+
+        if metric == "euclidean":
+            # |a-b|^2 = |a|^2 + |b|^2 - 2a·b，a·b由归一化矩阵的内积乘以模长还原
+            dots = (matrix @ query).astype(np.float64) * norms
+            squared = squared_norms + query_norm ** 2 - 2 * dots
+            close = np.flatnonzero(squared < EUCLIDEAN_RECHECK_RATIO * norms * query_norm)
+            if close.size:
+                vectors = matrix[close].astype(np.float64) * norms[close, None]
+                squared[close] = np.square(vectors - query.astype(np.float64)).sum(axis=1)
+            return 1.0 / (1.0 + np.sqrt(np.maximum(squared, 0)))
+
+        distances = np.empty(len(matrix), dtype=np.float64)
+        for start in range(0, len(matrix), MANHATTAN_CHUNK_ROWS):
+            end = start + MANHATTAN_CHUNK_ROWS
+            vectors = matrix[start:end] * norms[start:end, None]
+            distances[start:end] = np.abs(vectors - query).sum(axis=1)
+        return 1.0 / (1.0 + distances)
+
+    def similarity_matrix(self, features: np.ndarray, metric: str) -> np.ndarray:
+        """
+        计算多个查询向量与特征库中所有特征的相似度
+
+        余弦相似度和欧氏距离由一次矩阵乘法得出，耗时几乎不随查询数量增长；
+        曼哈顿距离无法化为矩阵乘法，逐个查询计算。
+
+        Args:
+            features (np.ndarray): 查询矩阵，形状为 (查询数, 维度)
+            metric (str): 相似度度量方法，cosine、euclidean或manhattan
+
+        Returns:
+            np.ndarray: 形状为 (查询数, 特征数) 的相似度，每行与ids一一对应
+
+        Raises:
+            ValueError: 当度量方法不支持或查询向量维度与特征库不一致时抛出异常
+        """
+        if metric not in METRICS:
+            raise ValueError(f"不支持的相似度度量方法: {metric}")
+        queries = np.asarray(features, dtype=FEATURE_DTYPE)
+        if queries.ndim != 2 or queries.shape[1] != self.dim:
+            raise ValueError(f"查询矩阵形状 {queries.shape} 与特征库维度 {self.dim} 不一致")
+
+        if metric == "manhattan":
+            result = np.empty((len(queries), len(self)), dtype=np.float64)
+            for row, query in enumerate(queries):
+                result[row] = self.similarities(query, metric)
+            return result
+
+        query_norms = np.linalg.norm(queries, axis=1)
+        if metric == "cosine":
+            # 模长为0的查询向量归一化后仍为零向量，余弦相似度为0
+            safe_norms = np.where(query_norms > 0, query_norms, 1).astype(FEATURE_DTYPE)
+            return (queries / safe_norms[:, None]) @ self.matrix.T
+
+        dots = (queries @ self.matrix.T).astype(np.float64) * self.norms
+        squared = self.squared_norms + (query_norms.astype(np.float64) ** 2)[:, None] - 2 * dots
+        query_rows, library_rows = np.nonzero(squared < EUCLIDEAN_RECHECK_RATIO * np.outer(query_norms, self.norms))
+        if query_rows.size:
+            vectors = self.matrix[library_rows].astype(np.float64) * self.norms[library_rows, None]
+            squared[query_rows, library_rows] = np.square(vectors - queries[query_rows].astype(np.float64)).sum(axis=1)
+        return 1.0 / (1.0 + np.sqrt(np.maximum(squared, 0)))
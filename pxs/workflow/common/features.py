@@ -0,0 +1,74 @@
+from typing import Any, Iterable, List, Optional
+import numpy as np
+
+"""
+特征向量在节点之间传递的数据格式
+"""
+
+# 特征向量的数据类型
+FEATURE_DTYPE = np.float32
+
+
+class FeatureBatch(list):
+    """一批特征向量
+
+    特征保存在连续的float32矩阵matrix（每行一个特征）中，indices为每行的来源索引。
+    同时作为特征列表使用：每个元素为 {"index": 索引, "feature": 矩阵中对应行的视图}，
+    与原来的特征列表格式兼容，但特征不复制、不转换为Python列表。
+
+    下游节点（如特征匹配）可直接使用matrix做矩阵运算；序列化为JSON的节点调用to_list，
+    或在序列化时把ndarray转换为列表。多个下游节点共享同一批特征，不应修改其内容。
+    """
+
+    def __init__(self, matrix: np.ndarray, indices: Optional[Iterable[int]] = None) -> None:
+        """
+        初始化一批特征向量
+
+        Args:
+            matrix (np.ndarray): 特征矩阵，形状为 (特征数, 维度)，不是连续的float32时复制一次
+            indices (Optional[Iterable[int]], optional): 每行的来源索引，None表示0到特征数-1. Defaults to None
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=FEATURE_DTYPE)
+        if matrix.ndim != 2:
+            raise ValueError(f"特征矩阵必须是二维的，当前形状为 {matrix.shape}")
+        indices = np.arange(len(matrix)) if indices is None else np.asarray(list(indices), dtype=np.int64)
+        if len(indices) != len(matrix):
+            raise ValueError(f"特征索引数量 {len(indices)} 与特征数量 {len(matrix)} 不一致")
+        super().__init__({"index": int(index), "feature": row} for index, row in zip(indices.tolist(), matrix))
+        self.matrix = matrix
+        self.indices = indices
+
+    @classmethod
+    def from_items(cls, items: List[Any]) -> 'FeatureBatch':
+        """
+        由特征列表创建一批特征向量
+
+        Args:
+            items (List[Any]): 特征列表，元素为 {"index": 索引, "feature": 特征} 或特征向量本身
+
+        Returns:
+            FeatureBatch: 一批特征向量
+        """
+        if isinstance(items, FeatureBatch):
+            return items
+        indices = []
+        rows = []
+        for position, item in enumerate(items):
+            if isinstance(item, dict):
+                indices.append(item.get("index", position))
+                item = item["feature"]
+            else:
+                indices.append(position)
+            rows.append(np.asarray(item, dtype=FEATURE_DTYPE).reshape(-1))
+        if not rows:
+            return cls(np.empty((0, 0), dtype=FEATURE_DTYPE))
+        return cls(np.stack(rows), indices)
+
+    def to_list(self) -> List[dict]:
+        """
+        转换为可JSON序列化的特征列表
+
+        Returns:
+            List[dict]: 元素为 {"index": 索引, "feature": 浮点数列表}
+        """
+        return [{"index": item["index"], "feature": item["feature"].tolist()} for item in self]
@@ -0,0 +1,178 @@
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Tuple
+
+from pxs.workflow.common.utils import parse_port
+from pxs.workflow.nodes.base_node import ConstantNode
+
+"""
+工作流图编译工具，将nodes/edges配置编译为不可变的路由计划
+"""
+
+# 连接目标端口类型
+PORT_INPUTS = "inputs"
+PORT_PARAMS = "params"
+
+
+class Route(NamedTuple):
+    """单条连接的路由信息"""
+
+    conn_id: str  # 连接ID
+    to_index: int  # 目标节点索引
+    to_node: str  # 目标节点ID
+    port_type: str  # 目标端口类型（inputs/params）
+    port_name: str  # 目标端口名称
+
+
+class PortFanout(NamedTuple):
+    """输出端口的扇出信息，同一输出端口的所有连接共享一次结果取值"""
+
+    from_port: str  # 原始输出端口字符串，如 'outputs.images'
+    from_port_name: str  # 输出端口名称，如 'images'
+    routes: Tuple[Route, ...]  # 该端口连接的所有目标
+
+
+class CompiledGraph:
+    """编译后的工作流图
+
+    节点以整数索引表示，每个节点的输出连接按输出端口分组为扇出列表，
+    端口字符串在编译时预先解析，调度主循环只需按索引访问数组。
+    """
+
+    def __init__(
+        self,
+        node_ids: Tuple[str, ...],
+        fanouts: Tuple[Tuple[PortFanout, ...], ...],
+        entry_indices: Tuple[int, ...],
+        constant_indices: Tuple[int, ...],
+        pruned_edges: Tuple[str, ...],
+        acyclic: bool = True,
+        params_targets: FrozenSet[int] = frozenset(),
+    ) -> None:
+        """
+        初始化编译后的工作流图
+
+        Args:
+            node_ids (Tuple[str, ...]): 按索引排列的节点ID
+            fanouts (Tuple[Tuple[PortFanout, ...], ...]): 按节点索引排列的输出端口扇出列表
+            entry_indices (Tuple[int, ...]): 入口节点索引
+            constant_indices (Tuple[int, ...]): 常量节点索引
+            pruned_edges (Tuple[str, ...]): 编译时被剪除的无效连接ID
+            acyclic (bool, optional): inputs类型连接是否构成有向无环图. Defaults to True
+            params_targets (FrozenSet[int], optional): 有params类型入边的节点索引，
+                分发给这些节点的数据需要携带参数快照. Defaults to frozenset()
+        """
+        self.node_ids = node_ids
+        self.node_index = {node_id: index for index, node_id in enumerate(node_ids)}
+        self.fanouts = fanouts
+        self.entry_indices = entry_indices
+        self.constant_indices = constant_indices
+        self.pruned_edges = pruned_edges
+        self.acyclic = acyclic
+        self.params_targets = params_targets
+
+
+def compile_graph(nodes: Dict[str, Any], edges: List[Dict]) -> CompiledGraph:
+    """
+    编译工作流图
+
+    - 为节点分配整数索引（保持nodes的插入顺序）
+    - 预先解析源端口与目标端口
+    - 剪除源节点或目标节点不存在的连接（如连接到备注节点或已删除节点的连接）
+    - 预先计算入口节点和常量节点
+
+    Args:
+        nodes (Dict[str, Any]): 已初始化的节点实例，键为节点ID
+        edges (List[Dict]): 工作流配置中的edges列表
+
+    Returns:
+        CompiledGraph: 编译后的工作流图
+
+    Raises:
+        ValueError: 当端口格式不正确或端口类型未知时抛出
+    """
+    node_ids = tuple(nodes.keys())
+    node_index = {node_id: index for index, node_id in enumerate(node_ids)}
+
+    # 按节点索引收集扇出：{from_port: (from_port_name, [Route, ...])}，保持连接出现顺序
+    port_routes: List[Dict[str, Tuple[str, List[Route]]]] = [{} for _ in node_ids]
+    nodes_with_incoming = set()
+    pruned_edges = []
+
+    for edge in edges:
+        connection_id = edge["id"]
+        from_node = edge["source"]
+        to_node = edge["target"]
+        from_port = edge["sourceHandle"]
+        to_port = edge["targetHandle"]
+
+        # 只要目标节点存在即视为有入边，与源节点是否有效无关
+        if to_node in node_index:
+            nodes_with_incoming.add(to_node)
+
+        # 剪除无效连接
+        if from_node not in node_index or to_node not in node_index:
+            pruned_edges.append(connection_id)
+            continue
+
+        from_port_type, from_port_name = parse_port(from_port)
+        if from_port_type != "outputs":
+            raise ValueError(f"连接 {connection_id} 的源端口必须是outputs类型，当前为 {from_port}")
+        port_type, port_name = parse_port(to_port)
+        if port_type not in (PORT_INPUTS, PORT_PARAMS):
+            raise ValueError(f"连接 {connection_id} 的目标端口类型未知: {port_type}")
+
+        routes = port_routes[node_index[from_node]].setdefault(from_port, (from_port_name, []))[1]
+        routes.append(Route(connection_id, node_index[to_node], to_node, port_type, port_name))
+
+    fanouts = tuple(
+        tuple(PortFanout(from_port, from_port_name, tuple(routes)) for from_port, (from_port_name, routes) in ports.items())
+        for ports in port_routes
+    )
+    constant_indices = tuple(
+        index for index, node_id in enumerate(node_ids) if isinstance(nodes[node_id], ConstantNode)
+    )
+    # 查找没有入边的非常量节点作为入口
+    entry_indices = tuple(
+        index for index, node_id in enumerate(node_ids)
+        if node_id not in nodes_with_incoming and index not in constant_indices
+    )
+
+    params_targets = frozenset(
+        route.to_index for ports in fanouts for fanout in ports for route in fanout.routes
+        if route.port_type == PORT_PARAMS
+    )
+
+    return CompiledGraph(
+        node_ids, fanouts, entry_indices, constant_indices, tuple(pruned_edges), _is_acyclic(fanouts), params_targets
+    )
+
+
+def _is_acyclic(fanouts: Tuple[Tuple[PortFanout, ...], ...]) -> bool:
+    """
+    检查inputs类型连接是否构成有向无环图（params类型连接不传递数据，不计入）
+
+    Args:
+        fanouts (Tuple[Tuple[PortFanout, ...], ...]): 按节点索引排列的输出端口扇出列表
+
+    Returns:
+        bool: 是否无环
+    """
+    in_degree = [0] * len(fanouts)
+    successors = [set() for _ in fanouts]
+    for index, ports in enumerate(fanouts):
+        for fanout in ports:
+            for route in fanout.routes:
+                if route.port_type == PORT_INPUTS and route.to_index not in successors[index]:
+                    successors[index].add(route.to_index)
+                    in_degree[route.to_index] += 1
+
+    # Kahn算法：能够全部出队则无环
+    ready = [index for index, degree in enumerate(in_degree) if degree == 0]
+    visited = 0
+    while ready:
+        index = ready.pop()
+        visited += 1
+        for successor in successors[index]:
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                ready.append(successor)
+    return visited == len(fanouts)
@@ -0,0 +1,191 @@
+from typing import Optional, Tuple
+import io
+import struct
+
+import cv2
+import numpy as np
+from PIL import Image
+
+"""
+图像文件读写工具，支持中文路径、降分辨率解码和可选编码器的图像编码
+"""
+
+ENCODER_PIL = "pil"  # 使用PIL编码
+ENCODER_CV2 = "cv2"  # 使用cv2.imencode编码，PNG和JPEG通常比PIL快
+
+# 降分辨率解码的缩小倍数及对应的cv2读取标志，JPEG在解码时直接按DCT缩放，不解码全尺寸图像
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# JPEG中记录图像尺寸的帧起始标记（SOF0-SOF15，不含DHT、JPG、DAC）
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    从JPEG或PNG文件头中读取图像尺寸，不解码像素
+
+    Args:
+        data (bytes): 图像文件内容
+
+    Returns:
+        Optional[Tuple[int, int]]: (宽, 高)，不是JPEG/PNG或文件头不完整时返回None
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return width, height
+    if data[:2] != b'\xff\xd8':
+        return None
+    index = 2
+    while index + 9 <= len(data):
+        if data[index] != 0xFF:
+            index += 1
+            continue
+        marker = data[index + 1]
+        if marker == 0xFF:
+            # 标记前的填充字节
+            index += 1
+        elif marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[index + 5:index + 9])
+            return width, height
+        elif marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            # 无长度字段的独立标记
+            index += 2
+        else:
+            segment_length = struct.unpack('>H', data[index + 2:index + 4])[0]
+            index += 2 + segment_length
+    return None
+
+
+def read_image(file_path: str, max_side: int = 0, decode_scale: int = 1,
+               keep_bgr: bool = False) -> Tuple[np.ndarray, float]:
+    """
+    读取图像文件，支持中文路径
+
+    指定max_side时，根据文件头中的尺寸选择不小于max_side的最大降分辨率倍数解码，
+    再用INTER_AREA缩放到长边等于max_side；文件头无法解析时先全尺寸解码再缩放。
+
+    Args:
+        file_path (str): 图像文件路径
+        max_side (int, optional): 输出图像长边的最大像素数，0表示不限制. Defaults to 0
+        decode_scale (int, optional): 固定的降分辨率解码倍数（1、2、4、8），指定max_side时忽略. Defaults to 1
+        keep_bgr (bool, optional): 是否保持cv2解码的BGR通道顺序，跳过转换为RGB. Defaults to False
+
+    Returns:
+        Tuple[np.ndarray, float]: 图像数据和缩放比例（输出尺寸/原始尺寸），
+            将输出图像上的坐标除以缩放比例即可映射回原图
+
+    Raises:
+        ValueError: 当decode_scale不是1、2、4、8时抛出异常
+        RuntimeError: 当图像读取失败时抛出异常
+    """
+    if decode_scale not in REDUCED_FLAGS:
+        raise ValueError(f"decode_scale必须为1、2、4或8，当前为 {decode_scale}")
+    try:
+        # 使用numpy和cv2.imdecode读取图像，支持中文路径
+        with open(file_path, 'rb') as f:
+            img_data = f.read()
+        # 将二进制数据转换为numpy数组
+        img_array = np.frombuffer(img_data, np.uint8)
+
+        original_side = None
+        if max_side > 0 or decode_scale > 1:
+            size = image_size(img_data)
+            if size is not None:
+                original_side = max(size)
+        if max_side > 0:
+            # 选择解码后长边仍不小于max_side的最大倍数
+            decode_scale = 1
+            if original_side is not None:
+                for factor in (8, 4, 2):
+                    if original_side >= max_side * factor:
+                        decode_scale = factor
+                        break
+
+        # 解码图像
+        image = cv2.imdecode(img_array, REDUCED_FLAGS[decode_scale])
+
+        if image is None:
+            raise RuntimeError(f"无法读取图像 {file_path}")
+
+        decoded_side = max(image.shape[:2])
+        if original_side is None:
+            # 未知原始尺寸时按解码倍数估算
+            original_side = decoded_side * decode_scale
+        if max_side > 0 and decoded_side > max_side:
+            ratio = max_side / decoded_side
+            width = max(1, round(image.shape[1] * ratio))
+            height = max(1, round(image.shape[0] * ratio))
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+        if not keep_bgr:
+            # 原地转换为RGB格式，不另外分配一份图像内存
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+        return image, max(image.shape[:2]) / original_side
+    except Exception as e:
+        raise RuntimeError(f"读取图像 {file_path} 失败: {str(e)}")
+
+
+def encode_image(image: np.ndarray, format_type: str = "png", encoder: str = ENCODER_PIL,
+                 png_compression: Optional[int] = None, jpeg_quality: Optional[int] = None,
+                 webp_quality: Optional[int] = None) -> bytes:
+    """
+    把RGB（或灰度、RGBA）图像编码为图像文件内容
+
+    Args:
+        image (np.ndarray): 图像数据，三通道为RGB顺序，四通道为RGBA顺序
+        format_type (str, optional): 图像格式（文件扩展名），如png、jpg、webp、bmp. Defaults to "png"
+        encoder (str, optional): 编码器，pil或cv2. Defaults to "pil"
+        png_compression (Optional[int], optional): PNG压缩级别0-9，None表示使用编码器默认值. Defaults to None
+        jpeg_quality (Optional[int], optional): JPEG质量0-100，None表示使用编码器默认值. Defaults to None
+        webp_quality (Optional[int], optional): WebP质量0-100（大于100时为无损），None表示使用编码器默认值. Defaults to None
+
+    Returns:
+        bytes: 编码后的文件内容
+
+    Raises:
+        ValueError: 当编码器或图像格式不支持时抛出异常
+        RuntimeError: 当编码失败时抛出异常
+    """
+    extension = "." + format_type.lower().lstrip(".")
+    if extension == ".jpeg":
+        extension = ".jpg"
+    if encoder == ENCODER_CV2:
+        params = []
+        if extension == ".png" and png_compression is not None:
+            params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+        elif extension == ".jpg" and jpeg_quality is not None:
+            params = [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+        elif extension == ".webp" and webp_quality is not None:
+            params = [cv2.IMWRITE_WEBP_QUALITY, int(webp_quality)]
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        elif image.ndim == 3 and image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2BGRA)
+        ok, buffer = cv2.imencode(extension, image, params)
+        if not ok:
+            raise RuntimeError(f"cv2编码{extension}图像失败")
+        return buffer.tobytes()
+    if encoder != ENCODER_PIL:
+        raise ValueError(f"不支持的图像编码器: {encoder}")
+
+    pil_format = Image.registered_extensions().get(extension)
+    if pil_format is None:
+        raise ValueError(f"不支持的图像格式: {format_type}")
+    options = {}
+    if pil_format == "PNG" and png_compression is not None:
+        options["compress_level"] = int(png_compression)
+    elif pil_format == "JPEG" and jpeg_quality is not None:
+        options["quality"] = int(jpeg_quality)
+    elif pil_format == "WEBP" and webp_quality is not None:
+        if int(webp_quality) > 100:
+            options["lossless"] = True
+        else:
+            options["quality"] = int(webp_quality)
+    output = io.BytesIO()
+    Image.fromarray(image).save(output, format=pil_format, **options)
+    return output.getvalue()
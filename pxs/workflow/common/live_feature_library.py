@@ -0,0 +1,388 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import base64
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from pxs.workflow.common.features import FEATURE_DTYPE
+from pxs.workflow.common.feature_library import FeatureLibrary, source_state
+
+"""
+可在运行中追加、删除特征的特征库，更新记录在预写日志中，查询使用一致的快照
+"""
+
+# 首次更新时预留的最小行数
+INITIAL_CAPACITY = 1024
+# 监视的特征文件扩展名
+WATCH_EXTENSIONS = ('.json', '.npy')
+# 预写日志超过此字节数（且为上次压缩后的2倍以上）时压缩
+DEFAULT_COMPACT_BYTES = 64 * 1024 * 1024
+# 压缩后的日志中每条追加记录包含的特征数
+COMPACT_RECORD_ROWS = 4096
+
+
+class LiveFeatureLibrary:
+    """可在线更新的特征库
+
+    特征保存在预留了空余行的矩阵中，追加时写入空余行，行数不足时容量翻倍（均摊O(1)），
+    不重建整个特征库。删除时复制保留的行到新矩阵（删除不频繁，复制的代价可以接受）。
+
+    每次更新完成后发布一个新的FeatureLibrary快照（矩阵前count行的视图），查询只读取snapshot属性，
+    在一次查询中始终使用同一个快照：已发布的行在同一矩阵中不再修改，追加只写入快照范围之外的行，
+    删除和扩容写入新矩阵，因此更新与并发查询不需要互相等待。
+
+    追加和删除先写入预写日志（wal_path）再应用，重新启动后在从源文件加载的特征库上重放日志即可恢复。
+    追加已存在的ID时替换原特征，重放是幂等的。日志超过compact_bytes时压缩：每个ID只保留最后一次操作
+    （追加的特征取自日志记录本身），与重放完整日志的结果相同，且不依赖源文件是否变化。
+
+    更新由内部锁串行化，可以在多个线程中调用。
+    """
+
+    def __init__(self, library: FeatureLibrary, wal_path: str = "", fsync: bool = True,
+                 compact_bytes: int = DEFAULT_COMPACT_BYTES) -> None:
+        """
+        初始化可在线更新的特征库
+
+        Args:
+            library (FeatureLibrary): 初始特征库（可以是内存映射加载的），第一次更新前直接作为快照使用，不复制
+            wal_path (str, optional): 预写日志路径，为空时不记录日志. Defaults to ""
+            fsync (bool, optional): 写入日志后是否调用os.fsync确保落盘. Defaults to True
+            compact_bytes (int, optional): 日志超过此字节数时压缩，0表示不压缩. Defaults to 64MB
+        """
+        self.lock = threading.Lock()
+        self.snapshot = library  # 当前快照，查询只读取此属性
+        self.version = 0  # 已应用的更新次数
+        self.count = len(library)
+        self.matrix: Optional[np.ndarray] = None  # 预留空余行的矩阵，第一次更新时创建
+        self.norms: Optional[np.ndarray] = None
+        self.squared_norms: Optional[np.ndarray] = None
+        self.ids: Optional[np.ndarray] = None
+        self.rows: Dict[str, int] = {}  # 特征ID到行号的映射，第一次更新时创建
+        self.wal_path = wal_path
+        self.fsync = fsync
+        self.wal = None
+        self.compact_bytes = compact_bytes
+        self.wal_bytes = 0  # 预写日志的当前字节数
+        self.compacted_bytes = 0  # 上次压缩后预写日志的字节数
+        self.watch_thread = None
+        self.watch_stop = threading.Event()
+
+    def replay(self) -> int:
+        """
+        重放预写日志中的更新，末尾写入不完整的记录被截断，日志过大时重放后压缩
+
+        Returns:
+            int: 重放的记录数
+        """
+        if not self.wal_path or not os.path.exists(self.wal_path):
+            return 0
+        replayed = 0
+        valid_bytes = 0
+        with open(self.wal_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                with self.lock:
+                    if record["op"] == "append":
+                        vectors = np.frombuffer(base64.b64decode(record["data"]), dtype=FEATURE_DTYPE)
+                        self._append(record["ids"], vectors.reshape(len(record["ids"]), -1))
+                    elif record["op"] == "delete":
+                        self._delete(record["ids"])
+                    self._publish()
+                valid_bytes += len(line)
+                replayed += 1
+        if valid_bytes < os.path.getsize(self.wal_path):
+            logging.warning(f'预写日志 {self.wal_path} 末尾的记录不完整，已截断')
+            os.truncate(self.wal_path, valid_bytes)
+        with self.lock:
+            self.wal_bytes = valid_bytes
+            if self._compact_due():
+                self._compact()
+        return replayed
+
+    def append(self, ids: Sequence[str], vectors: np.ndarray, log: bool = True) -> None:
+        """
+        追加特征，已存在的ID替换原特征
+
+        Args:
+            ids (Sequence[str]): 特征ID
+            vectors (np.ndarray): 特征矩阵，形状为 (特征数, 维度)
+            log (bool, optional): 是否写入预写日志. Defaults to True
+
+        Raises:
+            ValueError: 当特征矩阵形状与ID数量或特征库维度不一致时抛出异常
+        """
+        ids = [str(feature_id) for feature_id in ids]
+        if not ids:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=FEATURE_DTYPE).reshape(len(ids), -1)
+        with self.lock:
+            dim = self.snapshot.dim if self.count else vectors.shape[1]
+            if vectors.shape[1] != dim:
+                raise ValueError(f"特征维度 {vectors.shape[1]} 与特征库维度 {dim} 不一致")
+            if log:
+                self._log({"op": "append", "ids": ids, "data": base64.b64encode(vectors.tobytes()).decode('ascii')})
+            self._append(ids, vectors)
+            self._publish()
+
+    def delete(self, ids: Sequence[str], log: bool = True) -> int:
+        """
+        删除特征，不存在的ID被忽略
+
+        Args:
+            ids (Sequence[str]): 特征ID
+            log (bool, optional): 是否写入预写日志. Defaults to True
+
+        Returns:
+            int: 删除的特征数
+        """
+        ids = [str(feature_id) for feature_id in ids]
+        with self.lock:
+            self._materialize()
+            if not any(feature_id in self.rows for feature_id in ids):
+                return 0
+            if log:
+                self._log({"op": "delete", "ids": ids})
+            deleted = self._delete(ids)
+            self._publish()
+            return deleted
+
+    def watch(self, directory: str, load_file: Callable[[str], Dict[str, np.ndarray]], interval: float = 2.0,
+              known_sources: Optional[Dict[str, List[int]]] = None) -> None:
+        """
+        启动后台线程监视目录，新增或修改的特征文件（.json、.npy）加载后追加到特征库
+
+        文件本身就是持久化的记录，因此不写入预写日志；重新启动时这些文件作为源文件加载。
+        文件被删除或文件中删除的条目不会从特征库中删除，需要调用delete。
+
+        Args:
+            directory (str): 监视的目录
+            load_file (Callable[[str], Dict[str, np.ndarray]]): 加载一个特征文件，返回特征ID到特征向量的映射
+            interval (float, optional): 检查间隔（秒）. Defaults to 2.0
+            known_sources (Optional[Dict[str, List[int]]], optional): 已加载的源文件状态（source_state的返回值）. Defaults to None
+        """
+        self.stop_watch()
+        self.watch_stop.clear()
+        sources = dict(known_sources or {})
+
+        def check_modification():
+            while not self.watch_stop.wait(interval):
+                try:
+                    paths = [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+                             if filename.endswith(WATCH_EXTENSIONS) and os.path.isfile(os.path.join(directory, filename))]
+                    for path, state in source_state(paths).items():
+                        if sources.get(path) == state:
+                            continue
+                        features = load_file(path)
+                        if features:
+                            self.append(list(features.keys()), np.stack([
+                                np.asarray(vector, dtype=FEATURE_DTYPE).reshape(-1) for vector in features.values()
+                            ]), log=False)
+                            logging.info(f'特征库已更新：从 {path} 追加 {len(features)} 个特征，共 {self.count} 个特征')
+                        sources[path] = state
+                except Exception as e:
+                    # 文件可能正在写入，下次检查时重试
+                    logging.warning(f'检查特征库目录 {directory} 失败：{str(e)}')
+
+        self.watch_thread = threading.Thread(target=check_modification, name="feature_library_watcher", daemon=True)
+        self.watch_thread.start()
+
+    def stop_watch(self) -> None:
+        """停止监视目录"""
+        if self.watch_thread is not None:
+            self.watch_stop.set()
+            self.watch_thread.join()
+            self.watch_thread = None
+
+    def compact(self) -> None:
+        """压缩预写日志，每个ID只保留最后一次操作"""
+        with self.lock:
+            self._compact()
+
+    def close(self) -> None:
+        """停止监视目录并关闭预写日志"""
+        self.stop_watch()
+        with self.lock:
+            if self.wal is not None:
+                self.wal.close()
+                self.wal = None
+
+    def _log(self, record: Dict[str, Any]) -> None:
+        """
+        写入一条预写日志记录
+
+        Args:
+            record (Dict[str, Any]): 日志记录
+        """
+        if not self.wal_path:
+            return
+        if self.wal is None:
+            self.wal = open(self.wal_path, 'ab')
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        self.wal.write(line)
+        self.wal.flush()
+        if self.fsync:
+            os.fsync(self.wal.fileno())
+        self.wal_bytes += len(line)
+        if self._compact_due():
+            self._compact()
+
+    def _compact_due(self) -> bool:
+        """
+        检查是否需要压缩预写日志（调用方持有锁）
+
+        Returns:
+            bool: 日志超过compact_bytes且为上次压缩后的2倍以上，避免每次写入都重新压缩
+        """
+        return bool(self.wal_path) and self.compact_bytes > 0 and self.wal_bytes >= self.compact_bytes \
+            and self.wal_bytes >= 2 * self.compacted_bytes
+
+    def _compact(self) -> None:
+        """
+        压缩预写日志（调用方持有锁）：读取日志得到每个ID的最后一次操作，写入临时文件后替换原日志
+
+        压缩后的日志先删除最后一次操作为删除的ID，再按块追加最后一次操作为追加的特征
+        """
+        if not self.wal_path or not os.path.exists(self.wal_path):
+            return
+        if self.wal is not None:
+            self.wal.close()
+            self.wal = None
+        latest: Dict[str, Optional[np.ndarray]] = {}  # 特征ID到最后追加的特征向量，最后一次操作为删除时为None
+        with open(self.wal_path, 'rb') as f:
+            for line in f:
+                record = json.loads(line)
+                if record["op"] == "append":
+                    vectors = np.frombuffer(base64.b64decode(record["data"]), dtype=FEATURE_DTYPE)
+                    for feature_id, vector in zip(record["ids"], vectors.reshape(len(record["ids"]), -1)):
+                        latest.pop(feature_id, None)
+                        latest[feature_id] = vector
+                elif record["op"] == "delete":
+                    for feature_id in record["ids"]:
+                        latest.pop(feature_id, None)
+                        latest[feature_id] = None
+
+        records = []
+        deleted = [feature_id for feature_id, vector in latest.items() if vector is None]
+        if deleted:
+            records.append({"op": "delete", "ids": deleted})
+        appended = [feature_id for feature_id, vector in latest.items() if vector is not None]
+        for start in range(0, len(appended), COMPACT_RECORD_ROWS):
+            ids = appended[start:start + COMPACT_RECORD_ROWS]
+            vectors = np.stack([latest[feature_id] for feature_id in ids])
+            records.append({"op": "append", "ids": ids, "data": base64.b64encode(vectors.tobytes()).decode('ascii')})
+
+        temp_path = self.wal_path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            for record in records:
+                f.write((json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.wal_path)
+        previous_bytes = self.wal_bytes
+        self.wal_bytes = self.compacted_bytes = os.path.getsize(self.wal_path)
+        logging.info(f'预写日志 {self.wal_path} 已压缩：{previous_bytes} 字节 -> {self.wal_bytes} 字节')
+
+    def _materialize(self) -> None:
+        """第一次更新时把初始特征库复制到预留空余行的矩阵中"""
+        if self.matrix is not None:
+            return
+        library = self.snapshot
+        self._allocate(max(INITIAL_CAPACITY, 2 * self.count), library.dim if self.count else 0)
+        self.matrix[:self.count] = library.matrix
+        self.norms[:self.count] = library.norms
+        self.squared_norms[:self.count] = library.squared_norms
+        self.ids[:self.count] = [str(feature_id) for feature_id in library.ids]
+        self.rows = {feature_id: row for row, feature_id in enumerate(self.ids[:self.count])}
+
+    def _allocate(self, capacity: int, dim: int) -> None:
+        """
+        分配新的矩阵，已有的行由调用方复制
+
+        Args:
+            capacity (int): 行数
+            dim (int): 特征维度
+        """
+        self.matrix = np.zeros((capacity, dim), dtype=FEATURE_DTYPE)
+        self.norms = np.zeros(capacity, dtype=FEATURE_DTYPE)
+        self.squared_norms = np.zeros(capacity, dtype=np.float64)
+        self.ids = np.empty(capacity, dtype=object)
+
+    def _append(self, ids: List[str], vectors: np.ndarray) -> None:
+        """
+        追加特征（调用方持有锁）
+
+        Args:
+            ids (List[str]): 特征ID
+            vectors (np.ndarray): 特征矩阵
+        """
+        self._materialize()
+        # 同一批中重复的ID保留最后一个，已存在的ID先删除
+        latest = {feature_id: row for row, feature_id in enumerate(ids)}
+        if len(latest) < len(ids):
+            ids = list(latest.keys())
+            vectors = vectors[list(latest.values())]
+        self._delete([feature_id for feature_id in ids if feature_id in self.rows])
+
+        if not self.count:
+            # 空特征库由第一批特征确定维度
+            self._allocate(max(INITIAL_CAPACITY, 2 * len(ids)), vectors.shape[1])
+        end = self.count + len(ids)
+        if end > len(self.matrix):
+            # 容量翻倍，已发布的快照仍引用原矩阵
+            matrix, norms, squared_norms, old_ids = self.matrix, self.norms, self.squared_norms, self.ids
+            self._allocate(max(2 * len(matrix), end), matrix.shape[1])
+            self.matrix[:self.count] = matrix[:self.count]
+            self.norms[:self.count] = norms[:self.count]
+            self.squared_norms[:self.count] = squared_norms[:self.count]
+            self.ids[:self.count] = old_ids[:self.count]
+
+        norms = np.linalg.norm(vectors, axis=1)
+        self.matrix[self.count:end] = vectors / np.where(norms > 0, norms, 1)[:, None]
+        self.norms[self.count:end] = norms
+        self.squared_norms[self.count:end] = norms.astype(np.float64) ** 2
+        self.ids[self.count:end] = ids
+        for row, feature_id in enumerate(ids, self.count):
+            self.rows[feature_id] = row
+        self.count = end
+
+    def _delete(self, ids: List[str]) -> int:
+        """
+        删除特征（调用方持有锁），保留的行复制到新矩阵
+
+        Args:
+            ids (List[str]): 特征ID
+
+        Returns:
+            int: 删除的特征数
+        """
+        self._materialize()
+        removed = {self.rows[feature_id] for feature_id in ids if feature_id in self.rows}
+        if not removed:
+            return 0
+        keep = np.ones(self.count, dtype=bool)
+        keep[list(removed)] = False
+        matrix, norms, squared_norms, old_ids = self.matrix, self.norms, self.squared_norms, self.ids
+        self._allocate(len(matrix), matrix.shape[1])
+        remaining = int(keep.sum())
+        self.matrix[:remaining] = matrix[:self.count][keep]
+        self.norms[:remaining] = norms[:self.count][keep]
+        self.squared_norms[:remaining] = squared_norms[:self.count][keep]
+        self.ids[:remaining] = old_ids[:self.count][keep]
+        self.count = remaining
+        self.rows = {feature_id: row for row, feature_id in enumerate(self.ids[:remaining])}
+        return len(removed)
+
+    def _publish(self) -> None:
+        """发布当前前count行的快照（调用方持有锁）"""
+        self.snapshot = FeatureLibrary.from_normalized(
+            self.ids[:self.count], self.matrix[:self.count], self.norms[:self.count], self.squared_norms[:self.count]
+        )
+        self.version += 1
@@ -0,0 +1,193 @@
+from typing import Any, Callable, Dict, List, Optional
+import json
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+"""
+进程级共享模型注册表，相同配置的模型节点共享同一个推理预测器，权重只加载一次
+"""
+
+
+def model_key(config: Dict[str, Any], model_params: Dict[str, Any], device: Optional[str] = None,
+              pp_option: Any = None, use_hpip: bool = False, hpi_config: Any = None) -> str:
+    """
+    计算模型的规范化键
+
+    Args:
+        config (Dict[str, Any]): 模型配置（model_name、model_dir）
+        model_params (Dict[str, Any]): 创建模型的附加参数
+        device (Optional[str], optional): 运行设备. Defaults to None
+        pp_option (Any, optional): PaddlePredictor选项，按字符串表示参与比较. Defaults to None
+        use_hpip (bool, optional): 是否使用高性能推理插件(HPIP). Defaults to False
+        hpi_config (Any, optional): 高性能推理配置. Defaults to None
+
+    Returns:
+        str: 键排序后的JSON字符串，内容相同的配置得到相同的键
+    """
+    return json.dumps(
+        {
+            "config": config, "model_params": model_params, "device": device,
+            "pp_option": None if pp_option is None else str(pp_option),
+            "use_hpip": bool(use_hpip), "hpi_config": hpi_config,
+        },
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+
+
+def _resident_memory() -> Optional[int]:
+    """
+    获取当前进程的常驻内存
+
+    Returns:
+        Optional[int]: 常驻内存字节数，未安装psutil时返回None
+    """
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class SharedModel:
+    """共享模型句柄
+
+    包装推理预测器，调用时一次性取出全部结果；开启串行访问时，
+    同一时刻只允许一个调用方使用预测器（PaddleX预测器不可重入）。
+    """
+
+    def __init__(self, key: str, model: Any, memory: Optional[int], load_time: float) -> None:
+        """
+        初始化共享模型句柄
+
+        Args:
+            key (str): 模型键
+            model (Any): 推理预测器
+            memory (Optional[int]): 加载模型增加的常驻内存（字节）
+            load_time (float): 加载耗时（秒）
+        """
+        self.key = key
+        self.model = model
+        self.memory = memory
+        self.load_time = load_time
+        self.ref_count = 0  # 引用计数
+        self.hits = 0  # 命中已加载模型的次数
+        self.calls = 0  # 推理调用次数
+        self.serialized = False  # 是否串行访问
+        self.lock = threading.Lock()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> List[Any]:
+        """
+        调用推理预测器
+
+        Returns:
+            List[Any]: 预测器输出的全部结果
+        """
+        self.calls += 1
+        if self.serialized:
+            with self.lock:
+                return list(self.model(*args, **kwargs))
+        return list(self.model(*args, **kwargs))
+
+
+class ModelRegistry:
+    """共享模型注册表
+
+    按模型键去重推理预测器并进行引用计数，引用计数归零时释放预测器。
+
+    注册表锁只保护models和loading字典，加载权重时不持有：同一个键的后续调用方等待该键的加载事件，
+    不同键的模型可以同时加载。并发加载时常驻内存的增量会相互计入，仅供参考。
+    """
+
+    def __init__(self) -> None:
+        """初始化共享模型注册表"""
+        self.models: Dict[str, SharedModel] = {}
+        self.loading: Dict[str, threading.Event] = {}  # 正在加载的模型键到加载完成事件的映射
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str, factory: Callable[[], Any], serialized: bool = True) -> SharedModel:
+        """
+        获取共享模型，不存在时调用factory创建
+
+        Args:
+            key (str): 模型键，见model_key
+            factory (Callable[[], Any]): 创建推理预测器的函数
+            serialized (bool, optional): 是否串行访问预测器，任一使用方要求串行时即对所有使用方串行. Defaults to True
+
+        Returns:
+            SharedModel: 共享模型句柄，使用完毕后需调用release
+
+        Raises:
+            Exception: factory抛出的异常；等待中的同键调用方随后重新尝试加载
+        """
+        while True:
+            with self.lock:
+                shared = self.models.get(key)
+                if shared is not None:
+                    shared.hits += 1
+                    shared.ref_count += 1
+                    shared.serialized = shared.serialized or serialized
+                    return shared
+                loading = self.loading.get(key)
+                if loading is None:
+                    # 由当前调用方加载，同键的其他调用方等待加载完成事件
+                    loading = self.loading[key] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            memory_before = _resident_memory()
+            start = time.perf_counter()
+            model = factory()
+            load_time = time.perf_counter() - start
+            memory_after = _resident_memory()
+            memory = memory_after - memory_before if memory_before is not None else None
+            with self.lock:
+                shared = SharedModel(key, model, memory, load_time)
+                shared.ref_count = 1
+                shared.serialized = serialized
+                self.models[key] = shared
+                return shared
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loading.set()
+
+    def release(self, shared: SharedModel) -> None:
+        """
+        释放共享模型的一个引用，引用计数归零时从注册表中移除
+
+        Args:
+            shared (SharedModel): 共享模型句柄
+        """
+        with self.lock:
+            shared.ref_count -= 1
+            if shared.ref_count <= 0 and self.models.get(shared.key) is shared:
+                del self.models[shared.key]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        获取已加载模型的统计信息
+
+        Returns:
+            List[Dict[str, Any]]: 每个模型的键、引用计数、命中次数、调用次数、常驻内存和加载耗时
+        """
+        with self.lock:
+            return [
+                {
+                    "key": shared.key,
+                    "ref_count": shared.ref_count,
+                    "hits": shared.hits,
+                    "calls": shared.calls,
+                    "memory": shared.memory,
+                    "load_time": shared.load_time,
+                    "serialized": shared.serialized,
+                }
+                for shared in self.models.values()
+            ]
+
+
+# 进程级共享模型注册表
+model_registry = ModelRegistry()
@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Tuple
+import random
+import threading
+
+import numpy as np
+
+"""
+工作流节点性能统计，记录每个节点的运行耗时、输出转换耗时和数据量
+"""
+
+# 每个节点保留的耗时样本上限，超过后使用蓄水池抽样计算分位数
+MAX_SAMPLES = 10000
+# 统计ndarray字节数时遍历嵌套结构的最大深度
+MAX_PAYLOAD_DEPTH = 3
+
+
+def payload_stats(value: Any, depth: int = 0) -> Tuple[int, int]:
+    """
+    统计输出数据的条数和ndarray字节数
+
+    Args:
+        value (Any): 输出端口的数据
+        depth (int, optional): 当前遍历深度. Defaults to 0
+
+    Returns:
+        Tuple[int, int]: (条数, ndarray总字节数)，列表按元素个数计条数，其他数据计为1条
+    """
+    if isinstance(value, np.ndarray):
+        return 1, value.nbytes
+    if depth >= MAX_PAYLOAD_DEPTH:
+        return 1, 0
+    if isinstance(value, (list, tuple)):
+        nbytes = 0
+        for item in value:
+            nbytes += payload_stats(item, depth + 1)[1]
+        return len(value), nbytes
+    if isinstance(value, dict):
+        nbytes = 0
+        for item in value.values():
+            nbytes += payload_stats(item, depth + 1)[1]
+        return 1, nbytes
+    return 1, 0
+
+
+class NodeProfile:
+    """单个节点的性能统计"""
+
+    def __init__(self) -> None:
+        """初始化节点性能统计"""
+        self.lock = threading.Lock()
+        self.count = 0  # 运行次数
+        self.total_time = 0.0  # 运行累计耗时（秒）
+        self.samples: List[float] = []  # 单次运行耗时样本（秒）
+        self.output_time = 0.0  # process_output累计耗时（秒）
+        self.items_in = 0  # 输入条数
+        self.items_out = 0  # 输出条数
+        self.output_bytes = 0  # 输出的ndarray字节数
+
+    def record_run(self, duration: float, items_in: int = 1) -> None:
+        """
+        记录一次运行
+
+        Args:
+            duration (float): 运行耗时（秒）
+            items_in (int, optional): 本次运行的输入条数. Defaults to 1
+        """
+        with self.lock:
+            self.count += 1
+            self.total_time += duration
+            self.items_in += items_in
+            if len(self.samples) < MAX_SAMPLES:
+                self.samples.append(duration)
+            else:
+                # 蓄水池抽样，保持样本对全部运行的均匀代表性
+                index = random.randrange(self.count)
+                if index < MAX_SAMPLES:
+                    self.samples[index] = duration
+
+    def record_output(self, duration: float, value: Any) -> None:
+        """
+        记录一次输出端口取值
+
+        Args:
+            duration (float): process_output耗时（秒）
+            value (Any): 输出端口的数据
+        """
+        if value is None:
+            items, nbytes = 0, 0
+        else:
+            items, nbytes = payload_stats(value)
+        with self.lock:
+            self.output_time += duration
+            self.items_out += items
+            self.output_bytes += nbytes
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成统计报告
+
+        Returns:
+            Dict[str, Any]: 运行次数、耗时分位数（秒）、输出转换耗时和数据量
+        """
+        with self.lock:
+            samples = np.array(self.samples, dtype=np.float64)
+            report = {
+                "count": self.count,
+                "total_time": self.total_time,
+                "p50": 0.0,
+                "p95": 0.0,
+                "p99": 0.0,
+                "output_time": self.output_time,
+                "items_in": self.items_in,
+                "items_out": self.items_out,
+                "output_bytes": self.output_bytes,
+            }
+        if samples.size:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+            report.update(p50=float(p50), p95=float(p95), p99=float(p99))
+        return report
+
+
+class WorkflowProfiler:
+    """工作流性能统计，按节点索引保存各节点的统计"""
+
+    def __init__(self, node_ids: Tuple[str, ...]) -> None:
+        """
+        初始化工作流性能统计
+
+        Args:
+            node_ids (Tuple[str, ...]): 按索引排列的节点ID
+        """
+        self.node_ids = node_ids
+        self.nodes = [NodeProfile() for _ in node_ids]
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        生成所有节点的统计报告
+
+        Returns:
+            Dict[str, Dict[str, Any]]: {节点ID: 统计报告}，只包含运行过的节点
+        """
+        reports = {}
+        for node_id, profile in zip(self.node_ids, self.nodes):
+            if profile.count or profile.items_out:
+                reports[node_id] = profile.report()
+        return reports
@@ -0,0 +1,192 @@
+from typing import Any, Dict, List
+from datetime import datetime
+from queue import Queue, Empty
+import json
+import logging
+import os
+import threading
+import time
+
+"""
+工作流运行日志的异步写入工具，由独立线程批量写入并按大小滚动日志文件
+"""
+
+LOG_FORMAT_TEXT = "text"  # [时间戳] JSON，与原有日志格式一致
+LOG_FORMAT_JSONL = "jsonl"  # 每行一个紧凑JSON对象，时间戳保存在time字段
+
+
+class RunLogWriter:
+    """运行日志写入器
+
+    调用方通过write投递日志条目，时间戳在投递时记录，格式化、JSON序列化和文件写入
+    都在写入线程中完成。写入线程按字节数或时间间隔批量写入，缓冲区已满时write阻塞等待。
+    日志文件超过max_bytes时滚动为 log.txt.1、log.txt.2 ...，最多保留backup_count个。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        log_format: str = LOG_FORMAT_TEXT,
+        buffer_size: int = 10000,
+        flush_bytes: int = 64 * 1024,
+        flush_interval: float = 0.5,
+        max_bytes: int = 20 * 1024 * 1024,
+        backup_count: int = 3,
+    ) -> None:
+        """
+        初始化运行日志写入器并启动写入线程，已存在的日志文件及其滚动备份会被清空
+
+        Args:
+            path (str): 日志文件路径
+            log_format (str, optional): 日志格式，text或jsonl. Defaults to "text"
+            buffer_size (int, optional): 内存缓冲区最多容纳的条目数. Defaults to 10000
+            flush_bytes (int, optional): 累计达到该字节数时写入文件. Defaults to 64KB
+            flush_interval (float, optional): 距上次写入超过该时间（秒）时写入文件. Defaults to 0.5
+            max_bytes (int, optional): 日志文件滚动大小，0表示不滚动. Defaults to 20MB
+            backup_count (int, optional): 保留的滚动备份数量. Defaults to 3
+        """
+        if log_format not in (LOG_FORMAT_TEXT, LOG_FORMAT_JSONL):
+            raise ValueError(f"不支持的日志格式: {log_format}")
+        self.path = path
+        self.log_format = log_format
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.queue = Queue(maxsize=buffer_size)  # 元素为 (timestamp, entry)，None表示关闭
+
+        for index in range(1, backup_count + 1):
+            backup_path = f"{path}.{index}"
+            if os.path.exists(backup_path):
+                os.remove(backup_path)
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file_size = 0
+
+        self.thread = threading.Thread(target=self._writer, name="workflow_log_writer", daemon=True)
+        self.thread.start()
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        """
+        投递一条日志，缓冲区已满时阻塞等待写入线程
+
+        Args:
+            entry (Dict[str, Any]): 日志条目，写入线程序列化时才读取，调用方之后不应再修改
+        """
+        self.queue.put((time.time(), entry))
+
+    def close(self) -> None:
+        """写入剩余日志并关闭文件"""
+        self.queue.put(None)
+        self.thread.join()
+
+    def _format(self, timestamp: float, entry: Dict[str, Any]) -> str:
+        """
+        格式化一条日志
+
+        Args:
+            timestamp (float): 投递时间
+            entry (Dict[str, Any]): 日志条目
+
+        Returns:
+            str: 以换行结尾的日志行
+        """
+        if self.log_format == LOG_FORMAT_JSONL:
+            return json.dumps({'time': timestamp, **entry}, ensure_ascii=False, separators=(',', ':')) + '\n'
+        time_text = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        return f'[{time_text}] {json.dumps(entry, ensure_ascii=False)}\n'
+
+    def _writer(self) -> None:
+        """写入线程函数，批量写入日志直到收到关闭信号"""
+        lines: List[str] = []
+        pending_bytes = 0
+        last_flush = time.perf_counter()
+        closing = False
+        while not closing:
+            timeout = max(0.0, self.flush_interval - (time.perf_counter() - last_flush))
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = ()
+            if item is None:
+                closing = True
+            elif item:
+                try:
+                    line = self._format(*item)
+                except Exception as e:
+                    logging.error(f'格式化日志失败：{str(e)}')
+                else:
+                    lines.append(line)
+                    pending_bytes += len(line.encode('utf-8'))
+            if lines and (closing or pending_bytes >= self.flush_bytes
+                          or time.perf_counter() - last_flush >= self.flush_interval):
+                self._flush(lines, pending_bytes)
+                lines = []
+                pending_bytes = 0
+            if not lines:
+                last_flush = time.perf_counter()
+        try:
+            self.file.close()
+        except Exception as e:
+            logging.warning(f'关闭日志文件时出错：{str(e)}')
+
+    def _flush(self, lines: List[str], size: int) -> None:
+        """
+        把一批日志写入文件，写入前检查是否需要滚动
+
+        Args:
+            lines (List[str]): 日志行
+            size (int): 日志行的总字节数
+        """
+        try:
+            if self.max_bytes > 0 and self.file_size > 0 and self.file_size + size > self.max_bytes:
+                self._rotate()
+            self.file.write(''.join(lines))
+            self.file.flush()
+            self.file_size += size
+        except Exception as e:
+            logging.error(f'写入日志失败：{str(e)}')
+
+    def _rotate(self) -> None:
+        """滚动日志文件：log.txt.N-1 -> log.txt.N，log.txt -> log.txt.1"""
+        self.file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file_size = 0
+
+
+def read_log_page(path: str, offset: int = 0, limit: int = 64 * 1024) -> Dict[str, Any]:
+    """
+    按字节偏移分页读取日志文件，返回的内容截止到最后一个完整行
+
+    Args:
+        path (str): 日志文件路径
+        offset (int, optional): 起始字节偏移，应为上一页返回的next_offset. Defaults to 0
+        limit (int, optional): 最多读取的字节数. Defaults to 64KB
+
+    Returns:
+        Dict[str, Any]: logs（日志文本）、offset、next_offset、size（文件当前大小）、eof（是否已读到文件末尾）
+    """
+    size = os.path.getsize(path)
+    offset = min(max(0, offset), size)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(max(0, limit))
+    end = offset + len(data)
+    if end < size:
+        # 未读到文件末尾时只返回完整的行，下一页从未完成的行开始
+        newline = data.rfind(b'\n')
+        if newline >= 0:
+            data = data[:newline + 1]
+            end = offset + len(data)
+    return {
+        'logs': data.decode('utf-8', errors='replace'),
+        'offset': offset,
+        'next_offset': end,
+        'size': size,
+        'eof': end >= size,
+    }
@@ -0,0 +1,99 @@
+from typing import Iterable, Iterator, List, Optional, Union
+import fnmatch
+import os
+import zlib
+
+"""
+目录扫描工具，使用os.scandir逐个给出匹配的文件，供加载文件的节点使用
+"""
+
+# 图像文件扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+SORT_NAME = "name"  # 每个目录内按文件名排序，结果顺序确定
+SORT_NONE = "none"  # 按文件系统返回的顺序，不需要先列出整个目录
+
+
+def shard_of(relative_path: str, shard_count: int) -> int:
+    """
+    计算文件所属的分片
+
+    Args:
+        relative_path (str): 文件相对扫描根目录的路径（使用/分隔）
+        shard_count (int): 分片数量
+
+    Returns:
+        int: 分片索引，只取决于相对路径，与扫描顺序和进程无关
+    """
+    return zlib.crc32(relative_path.encode('utf-8')) % shard_count
+
+
+def scan_files(
+    root: str,
+    recursive: bool = False,
+    patterns: Optional[Union[str, Iterable[str]]] = None,
+    extensions: Optional[Iterable[str]] = IMAGE_EXTENSIONS,
+    sort: str = SORT_NAME,
+    shard_index: int = 0,
+    shard_count: int = 1,
+) -> Iterator[str]:
+    """
+    扫描目录，逐个给出匹配的文件路径
+
+    使用DirEntry自带的类型信息判断文件和目录，普通文件不需要额外的stat调用。
+    结果按目录逐个生成，调用方处理第一个文件时不必等待扫描完成；
+    sort为name时每个目录内的条目排序后再处理（需要先列出该目录），子目录按名称顺序深度优先遍历。
+
+    Args:
+        root (str): 扫描的根目录
+        recursive (bool, optional): 是否扫描子目录. Defaults to False
+        patterns (Optional[Union[str, Iterable[str]]], optional): glob模式，匹配相对根目录的路径（使用/分隔），
+            满足任一模式即可，None表示不过滤. Defaults to None
+        extensions (Optional[Iterable[str]], optional): 允许的扩展名（小写，含点），None表示不过滤. Defaults to IMAGE_EXTENSIONS
+        sort (str, optional): 排序方式，name或none. Defaults to "name"
+        shard_index (int, optional): 当前分片索引. Defaults to 0
+        shard_count (int, optional): 分片数量，多个工作流进程以不同的shard_index分担同一目录. Defaults to 1
+
+    Yields:
+        str: 文件路径
+
+    Raises:
+        ValueError: 当排序方式或分片参数无效时抛出异常
+    """
+    if sort not in (SORT_NAME, SORT_NONE):
+        raise ValueError(f"不支持的排序方式: {sort}")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"分片参数无效: shard_index={shard_index}, shard_count={shard_count}")
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    patterns = list(patterns) if patterns else None
+    extensions = tuple(extension.lower() for extension in extensions) if extensions else None
+
+    # 待扫描的目录栈：(目录路径, 相对根目录的前缀)
+    stack = [(root, "")]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as iterator:
+            entries: Iterable[os.DirEntry] = iterator
+            if sort == SORT_NAME:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+            subdirectories: List[os.DirEntry] = []
+            for entry in entries:
+                relative_path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    # 不进入指向目录的符号链接，避免循环
+                    if recursive:
+                        subdirectories.append(entry)
+                    continue
+                if not entry.is_file():
+                    continue
+                if extensions is not None and not entry.name.lower().endswith(extensions):
+                    continue
+                if patterns is not None and not any(fnmatch.fnmatch(relative_path, pattern) for pattern in patterns):
+                    continue
+                if shard_count > 1 and shard_of(relative_path, shard_count) != shard_index:
+                    continue
+                yield entry.path
+        # 逆序入栈，使子目录按名称顺序出栈
+        for entry in reversed(subdirectories):
+            stack.append((entry.path, prefix + entry.name + "/"))
@@ -0,0 +1,84 @@
+from typing import Any, Dict
+import threading
+from queue import Queue
+
+"""
+流水线执行模式的节点阶段，每个运算节点对应一个阶段，拥有独立的有界输入队列和工作线程
+"""
+
+
+class PipelineStage:
+    """流水线阶段
+
+    保存阶段的输入队列和运行统计，统计数据由工作线程更新、调度主线程读取
+    """
+
+    def __init__(self, node_index: int, node_id: str, queue_size: int, workers: int) -> None:
+        """
+        初始化流水线阶段
+
+        Args:
+            node_index (int): 节点索引
+            node_id (str): 节点ID
+            queue_size (int): 输入队列容量，队列满时上游阻塞（背压）
+            workers (int): 工作线程数
+        """
+        self.node_index = node_index
+        self.node_id = node_id
+        self.queue = Queue(maxsize=queue_size)  # 输入队列，存储元组 (port, input_value, params)，params为参数快照或None
+        self.workers = workers
+        self.threads = []
+        self.lock = threading.Lock()
+        self.busy = 0  # 正在运行的任务数
+        self.processed = 0  # 已处理的任务数
+        self.busy_time = 0.0  # 节点run方法累计耗时（秒）
+        self.blocked_time = 0.0  # 向下游队列投递时因背压累计阻塞的时间（秒）
+        self.batch_sizes = {}  # 批量运行的批大小直方图 {批大小: 次数}
+
+    def begin(self) -> None:
+        """标记一个任务开始运行"""
+        with self.lock:
+            self.busy += 1
+
+    def end(self, run_time: float, blocked_time: float, count: int = 1, batched: bool = False) -> None:
+        """
+        标记一个任务运行结束
+
+        Args:
+            run_time (float): 节点run方法耗时（秒）
+            blocked_time (float): 向下游投递时的阻塞时间（秒）
+            count (int, optional): 本次运行处理的输入条数. Defaults to 1
+            batched (bool, optional): 是否为批量运行，为True时计入批大小直方图. Defaults to False
+        """
+        with self.lock:
+            self.busy -= 1
+            self.processed += count
+            self.busy_time += run_time
+            self.blocked_time += blocked_time
+            if batched:
+                self.batch_sizes[count] = self.batch_sizes.get(count, 0) + 1
+
+    def snapshot(self, elapsed_time: float) -> Dict[str, Any]:
+        """
+        获取阶段运行统计
+
+        Args:
+            elapsed_time (float): 工作流已运行时间（秒），用于计算利用率
+
+        Returns:
+            Dict[str, Any]: 阶段统计，包含队列深度、利用率等
+        """
+        capacity = elapsed_time * self.workers
+        snapshot = {
+            'queue_size': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'workers': self.workers,
+            'busy': self.busy,
+            'processed': self.processed,
+            'utilization': self.busy_time / capacity if capacity > 0 else 0.0,
+            'blocked_time': self.blocked_time,
+        }
+        if self.batch_sizes:
+            with self.lock:
+                snapshot['batch_sizes'] = dict(sorted(self.batch_sizes.items()))
+        return snapshot
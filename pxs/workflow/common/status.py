@@ -0,0 +1,41 @@
+from typing import Any, Dict
+
+"""
+工作流状态更新的增量还原工具
+"""
+
+
+class StatusAccumulator:
+    """状态累加器
+
+    将WorkflowPipeline在status_delta模式下输出的增量状态还原为完整状态，
+    完整状态（准备中、完成、失败）直接替换当前状态
+    """
+
+    def __init__(self) -> None:
+        """初始化状态累加器"""
+        self.state: Dict[str, Any] = {}
+
+    def apply(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        应用一条状态更新
+
+        Args:
+            update (Dict[str, Any]): 完整状态或增量状态（包含'delta': True）
+
+        Returns:
+            Dict[str, Any]: 还原后的完整状态（副本，可安全地交给其他线程或进程）
+        """
+        if not update.get('delta'):
+            self.state = dict(update)
+        else:
+            ran_nodes = self.state.get('ran_nodes', [])
+            for key, value in update.items():
+                if key == 'delta':
+                    continue
+                if key == 'ran_nodes_added':
+                    ran_nodes = ran_nodes + value
+                else:
+                    self.state[key] = value
+            self.state['ran_nodes'] = ran_nodes
+        return dict(self.state)
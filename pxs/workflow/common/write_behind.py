@@ -0,0 +1,164 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Set
+import logging
+import os
+import threading
+
+"""
+文件后台写入工具，编码和写文件在有界线程池中运行，调用方只需预先确定文件名
+"""
+
+
+def fsync_files(paths: List[str]) -> None:
+    """
+    把文件内容和所在目录的条目刷到存储设备
+
+    Args:
+        paths (List[str]): 文件路径
+    """
+    directories = set()
+    for path in paths:
+        # Windows下只有可写的文件描述符才能fsync
+        fd = os.open(path, os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(os.path.abspath(path)))
+    if os.name == 'nt':
+        # Windows不支持打开目录
+        return
+    for directory in directories:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class WriteBehindWriter:
+    """后台文件写入器
+
+    submit把生成文件内容的函数（如图像编码）和写文件交给线程池，立即返回；
+    尚未写完的文件数达到max_pending时submit阻塞，限制待写数据占用的内存。
+    workers为0时在调用线程中直接写入。
+
+    后台写入的错误在下一次submit或flush时抛出。flush等待已提交的文件写完，
+    按需对本批文件统一fsync，由节点在工作流运行结束时调用。
+    """
+
+    def __init__(self, workers: int = 0, max_pending: Optional[int] = None, fsync: bool = False,
+                 name: str = "write_behind") -> None:
+        """
+        初始化后台文件写入器
+
+        Args:
+            workers (int, optional): 写入线程数，0表示同步写入. Defaults to 0
+            max_pending (Optional[int], optional): 尚未写完的文件数上限，None表示workers的4倍. Defaults to None
+            fsync (bool, optional): flush时是否fsync本批写入的文件. Defaults to False
+            name (str, optional): 线程名前缀. Defaults to "write_behind"
+        """
+        self.workers = max(0, int(workers))
+        self.fsync = fsync
+        self.name = name
+        self.executor: Optional[ThreadPoolExecutor] = None  # 首次提交时创建
+        self.slots = threading.BoundedSemaphore(max(1, int(max_pending or self.workers * 4 or 1)))
+        self.lock = threading.Lock()
+        self.futures: Set[Future] = set()  # 尚未写完的文件
+        self.written: List[str] = []  # 上次flush以来写完的文件，用于fsync
+        self.error: Optional[BaseException] = None  # 第一个尚未抛出的后台写入错误
+
+    def submit(self, path: str, produce: Callable[[], bytes]) -> None:
+        """
+        提交一个文件写入
+
+        Args:
+            path (str): 文件路径
+            produce (Callable[[], bytes]): 生成文件内容的函数，在写入线程中调用
+
+        Raises:
+            RuntimeError: 当之前提交的写入失败时抛出异常
+        """
+        self._raise_error()
+        if self.workers == 0:
+            self._write(path, produce)
+            return
+        self.slots.acquire()
+        try:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            future = self.executor.submit(self._write, path, produce)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self._on_done)
+
+    def _write(self, path: str, produce: Callable[[], bytes]) -> None:
+        """
+        生成文件内容并写入文件
+
+        Args:
+            path (str): 文件路径
+            produce (Callable[[], bytes]): 生成文件内容的函数
+        """
+        data = produce()
+        with open(path, 'wb') as f:
+            f.write(data)
+        if self.fsync:
+            with self.lock:
+                self.written.append(path)
+
+    def _on_done(self, future: Future) -> None:
+        """
+        写入完成的回调，释放待写名额并记录错误
+
+        Args:
+            future (Future): 写入任务
+        """
+        self.slots.release()
+        with self.lock:
+            self.futures.discard(future)
+            error = future.exception() if not future.cancelled() else None
+            if error is not None and self.error is None:
+                self.error = error
+
+    def _raise_error(self) -> None:
+        """
+        抛出尚未抛出的后台写入错误
+
+        Raises:
+            RuntimeError: 当有后台写入失败时抛出异常
+        """
+        with self.lock:
+            error, self.error = self.error, None
+        if error is not None:
+            raise RuntimeError(f"后台写入文件失败: {str(error)}") from error
+
+    def flush(self) -> None:
+        """
+        等待已提交的文件全部写完，按需fsync本批写入的文件
+
+        Raises:
+            RuntimeError: 当有后台写入失败时抛出异常
+        """
+        with self.lock:
+            futures = list(self.futures)
+        if futures:
+            wait(futures)
+        with self.lock:
+            written, self.written = self.written, []
+        if written:
+            fsync_files(written)
+        self._raise_error()
+
+    def close(self) -> None:
+        """等待已提交的文件写完并关闭线程池"""
+        try:
+            self.flush()
+        except Exception as e:
+            logging.warning(f"关闭后台文件写入器时写入失败：{str(e)}")
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
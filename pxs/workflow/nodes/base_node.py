@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
 import os
+import threading
 from pxs.workflow.common.utils import parse_port
 
 class NodeResult:
@@ -34,7 +36,7 @@ class NodeResult:
         port_type, port_name=parse_port(port)
         if port_type != "outputs":
             raise ValueError(f"get only supports 'outputs' port type, got {port}")
-        return self.__getattr__(port_name)
+        return self.get_output(port_name)
 
     def __getattr__(self, name: str) -> Any:
         """
@@ -46,6 +48,18 @@ class NodeResult:
         Returns:
             Any: 对应属性的结果
         """
+        return self.get_output(name)
+
+    def get_output(self, name: str) -> Any:
+        """
+        根据已解析的输出端口名称获取对应类型的结果，结果会被缓存
+
+        Args:
+            name (str): 输出端口名称（不含'outputs.'前缀）
+
+        Returns:
+            Any: 对应端口的结果
+        """
         if name in self.processed_results:
             return self.processed_results[name]
 
@@ -62,6 +76,11 @@ class BaseNode(ABC):
     所有工作流节点都应继承自此类，提供统一的接口和公共功能
     """
 
+    # 节点是否允许在并发模式下同时运行多个任务，为False时同一节点的任务按顺序运行
+    thread_safe = True
+    # 节点是否实现了run_batch，流水线模式下可把多条输入合并为一次运行
+    supports_batch = False
+
     def __init__(self, config: Dict, pipeline: Any) -> None:
         """
         初始化节点
@@ -73,7 +92,93 @@ class BaseNode(ABC):
         self.id = config["id"]
         self.name = config["name"]
         self.type = config["type"]
+        # 当前线程正在使用的参数快照，见use_params
+        self.params_override = threading.local()
         self.params = config.get("params", {})
+        # 初始参数，set_params采用写时复制不会修改此字典，复用节点时据此恢复
+        self.initial_params = self.params
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        """节点参数，当前线程在use_params中时为该次运行的参数快照"""
+        snapshot = getattr(self.params_override, "params", None)
+        return self._params if snapshot is None else snapshot
+
+    @params.setter
+    def params(self, params: Dict[str, Any]) -> None:
+        """
+        设置节点参数
+
+        Args:
+            params (Dict[str, Any]): 节点参数
+        """
+        self._params = params
+
+    @contextmanager
+    def use_params(self, params: Optional[Dict[str, Any]]) -> Iterator[None]:
+        """
+        在当前线程中使用指定的参数快照运行节点
+
+        并发和流水线模式下，调度器在结果分发时捕获目标节点的参数（set_params写时复制，捕获只是保存引用），
+        运行对应数据时通过此方法使用该快照，后续数据的params连接不会影响已分发的数据
+
+        Args:
+            params (Optional[Dict[str, Any]]): 参数快照，为None时使用节点的当前参数
+        """
+        if params is None:
+            yield
+            return
+        previous = getattr(self.params_override, "params", None)
+        self.params_override.params = params
+        try:
+            yield
+        finally:
+            self.params_override.params = previous
+
+    def reset(self) -> None:
+        """
+        重置单次运行的状态
+
+        工作流复用节点实例再次运行前调用，恢复运行中被params连接修改的参数；
+        子类有其他跨调用状态（如计数器、缓存）时应重写此方法并调用父类实现。
+        """
+        self.params = self.initial_params
+
+    def close(self) -> None:
+        """
+        关闭节点，释放节点占用的资源
+
+        节点被工作流删除或重建时调用，默认不做任何处理
+        """
+        pass
+
+    def flush(self) -> None:
+        """
+        把节点缓冲的输出写入存储
+
+        工作流运行结束时和提交断点记录前调用，默认不做任何处理；
+        在后台写文件的节点（如开启write_behind的SaveImageNode）应在此等待写入完成
+        """
+        pass
+
+    def checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取需要写入断点记录的状态
+
+        有跨调用状态且续跑时需要恢复的节点（如保存文件节点的计数器）应重写此方法
+
+        Returns:
+            Optional[Dict[str, Any]]: 可JSON序列化的状态，None表示没有需要记录的状态
+        """
+        return None
+
+    def restore_checkpoint(self, state: Dict[str, Any]) -> None:
+        """
+        从断点记录恢复状态，工作流续跑时在节点初始化或重置之后、开始运行之前调用
+
+        Args:
+            state (Dict[str, Any]): checkpoint_state返回的状态
+        """
         pass
 
     def set_params(self, port: str, data: Any) -> None:
@@ -85,15 +190,17 @@ class BaseNode(ABC):
             data (Any): 参数数据
         """
         params_path=port.split(".")
-        # 处理嵌套参数路径
-        current = self.params
+        # 处理嵌套参数路径，采用写时复制：沿路径复制字典后整体替换self.params，
+        # 并发模式下正在运行的节点线程不会读到更新到一半的参数
+        params = dict(self.params)
+        current = params
         for i, param in enumerate(params_path):
             if i == len(params_path) - 1:
                 current[param] = data
             else:
-                if param not in current:
-                    current[param] = {}
+                current[param] = dict(current[param]) if param in current else {}
                 current = current[param]
+        self.params = params
 
     @abstractmethod
     def run(self, port: str, data: Any) -> 'NodeResult':
@@ -153,6 +260,12 @@ class ConstantNode(BaseNode):
         # 缓存常量节点的运行结果
         self.result_cache = None
 
+    def reset(self) -> None:
+        """重置单次运行的状态，清除已运行标记和缓存结果"""
+        super().reset()
+        self.has_run = False
+        self.result_cache = None
+
     def run(self, port: str = None, data: Any = None) -> 'NodeResult':
         """
         运行常量节点
@@ -252,6 +365,10 @@ class StreamNode(BaseNode):
     在WorkflowPipeline中，流式节点会在单独的线程中运行，避免阻塞主执行队列
     """
 
+    # 顺序和并发模式下节点尚未被主循环处理的结果数量上限，None表示只受调度器事件队列容量限制；
+    # 流水线模式下由下游阶段队列容量（stage_queue_size）限制
+    max_pending_results: Optional[int] = None
+
     def __init__(self, config: Dict, pipeline: Any) -> None:
         """
         初始化流式节点
@@ -261,6 +378,22 @@ class StreamNode(BaseNode):
             pipeline (Any): 工作流管道实例
         """
         super().__init__(config, pipeline)
+        # 本次运行的断点续跑记录，由WorkflowPipeline在启动流式线程前设置，None表示未开启断点续跑
+        self.checkpoint = None
+
+    def checkpoint_key(self, node_result: 'NodeResult') -> Optional[str]:
+        """
+        获取一条流式结果对应的输入键，该结果及其下游处理完成后输入键被写入断点记录
+
+        支持断点续跑的流式节点应重写此方法，并在_stream_output中跳过checkpoint.is_done的输入
+
+        Args:
+            node_result (NodeResult): 流式结果
+
+        Returns:
+            Optional[str]: 输入键，None表示不记录
+        """
+        return None
 
     def run(self, port: str, data: Any) -> 'NodeResult':
         """
@@ -3,12 +3,42 @@ import numpy as np
 import os
 import json
 from .base_node import ComputeNode, NodeResult
+from pxs.workflow.common.features import FeatureBatch, FEATURE_DTYPE
+from pxs.workflow.common.feature_library import FeatureLibrary, source_state
+from pxs.workflow.common.feature_index import load_or_build_index
+from pxs.workflow.common.live_feature_library import LiveFeatureLibrary, DEFAULT_COMPACT_BYTES
 
 class FeatureMatchNode(ComputeNode):
     """特征匹配节点
 
     用于计算输入特征向量与特征库之间的相似度，支持多种相似度度量方法
-    主要支持直接接收特征列表格式的输入: [{"index": 0, "feature": [...]}, ...]
+    主要支持直接接收特征列表格式的输入: [{"index": 0, "feature": [...]}, ...]，
+    特征节点输出的FeatureBatch直接使用其中的float32特征，不做转换；
+    特征列表中的所有特征由一次矩阵乘法与特征库计算相似度，top_k参数限制每个特征输出的匹配数
+
+    默认逐个比较特征库中的所有特征（精确结果）。大特征库可设置index参数使用近似最近邻索引：
+    - index: exact（默认）、ivf或ivfpq
+    - nlist: 聚类数，0表示取 4*sqrt(特征数)
+    - nprobe: 每次查询比较的聚类数，越大召回率越高、越慢
+    - pq_m: ivfpq的乘积量化子空间数，必须能整除特征维度
+    - refine: ivfpq计算精确相似度的候选数
+    - index_path: 索引文件路径，为空时每次加载特征库后重新建立索引
+    使用索引时只有候选特征参与匹配，matched_count为候选中满足阈值的特征数
+
+    特征库首次加载时编译为.npy文件，源文件不变时之后直接内存映射加载：
+    - compile: 是否编译特征库，默认为True
+    - compiled_path: 编译后的特征库目录，默认在特征库目录下的.feature_library目录
+
+    live为True时特征库可在运行中更新，不需要重新启动工作流（见LiveFeatureLibrary）：
+    - enroll输入端口接收特征列表，追加到特征库，元素中的id为特征ID，
+      没有id时为 {enroll_source}_{index}（enroll_source可连接加载图像节点的filename输出）
+    - delete输入端口接收特征ID或特征ID列表（元素也可以是包含id的字典），从特征库删除这些特征
+    - wal_path: 预写日志路径，默认在特征库旁，重新启动时重放
+    - wal_compact_bytes: 预写日志超过此字节数时压缩为每个ID的最后一次操作，0表示不压缩，默认64MB
+    - watch_interval: 监视特征库目录中新增的.json、.npy文件的间隔（秒），0表示不监视
+    每次匹配使用更新完成后的一致快照；特征库更新后近似索引不再使用，改为精确搜索，直到重新启动
+
+    工作流复用节点再次运行时（见reset），特征库源文件的集合、修改时间或大小有变化则重新加载特征库
     """
 
     def __init__(self, config: Dict, pipeline: Any) -> None:
@@ -23,12 +53,110 @@ class FeatureMatchNode(ComputeNode):
         # 设置默认参数
         self.params.setdefault("metric", "cosine")  # 相似度度量方法，默认为余弦相似度
         self.params.setdefault("threshold", 0.5)    # 匹配阈值，默认为0.5
+        self.params.setdefault("top_k", 0)          # 每个特征最多输出的匹配数，0表示输出所有满足阈值的匹配
+        self.params.setdefault("index", "exact")    # 特征库索引类型，默认为精确搜索
+        self.params.setdefault("nprobe", 8)         # 近似索引每次查询比较的聚类数
+        self.params.setdefault("refine", 100)       # ivfpq索引计算精确相似度的候选数
+        self.params.setdefault("live", False)       # 是否允许在运行中更新特征库
         
-        # 初始化特征向量库
-        self.feature_library = {}
+        # 初始化特征向量库，特征保存为预先归一化的float32矩阵
+        self.library = FeatureLibrary([], np.empty((0, 0), dtype=FEATURE_DTYPE))
+        self.index = None
+        self.index_library = None  # 建立近似索引时的特征库，特征库更新后不再使用索引
+        self.sources = {}  # 加载的特征库源文件状态
         if "path" in self.params:
             self._load_feature_library(self.params["path"])
 
+        self.live = None
+        if self.params["live"]:
+            self._start_live(self.params.get("path", ""))
+
+    def reset(self) -> None:
+        """重置单次运行的状态，特征库源文件变化时重新加载特征库（编译结果未过期时只做内存映射）"""
+        super().reset()
+        if "path" not in self.params:
+            return
+        path = self.params["path"]
+        if os.path.exists(path) and source_state(self._source_files(path)) == self.sources:
+            return
+        print(f"特征匹配节点 {self.id} 的特征库源文件已变化，重新加载特征库")
+        if self.live is not None:
+            self.live.close()
+            self.live = None
+        self._load_feature_library(path)
+        if self.params["live"]:
+            self._start_live(path)
+
+    def close(self) -> None:
+        """停止监视特征库目录并关闭预写日志"""
+        if self.live is not None:
+            self.live.close()
+        super().close()
+
+    def append_features(self, ids: List[str], vectors: np.ndarray) -> None:
+        """
+        向特征库追加特征（需要live为True），已存在的ID替换原特征，更新写入预写日志
+
+        Args:
+            ids (List[str]): 特征ID
+            vectors (np.ndarray): 特征矩阵，形状为 (特征数, 维度)
+        """
+        if self.live is None:
+            raise RuntimeError(f"特征匹配节点 {self.id} 未开启在线更新（live），无法追加特征")
+        self.live.append(ids, vectors)
+
+    def delete_features(self, ids: List[str]) -> int:
+        """
+        从特征库删除特征（需要live为True），更新写入预写日志
+
+        Args:
+            ids (List[str]): 特征ID
+
+        Returns:
+            int: 删除的特征数
+        """
+        if self.live is None:
+            raise RuntimeError(f"特征匹配节点 {self.id} 未开启在线更新（live），无法删除特征")
+        return self.live.delete(ids)
+
+    def _current_library(self) -> FeatureLibrary:
+        """
+        获取当前特征库，在线更新时为最近发布的快照
+
+        Returns:
+            FeatureLibrary: 特征库
+        """
+        return self.live.snapshot if self.live is not None else self.library
+
+    def _start_live(self, path: str) -> None:
+        """
+        开启在线更新：重放预写日志，按需监视特征库目录
+
+        Args:
+            path (str): 特征文件或目录的路径
+        """
+        wal_path = self.params.get("wal_path", "")
+        if not wal_path and path:
+            if os.path.isdir(path):
+                wal_path = os.path.join(path, ".feature_library.wal")
+            else:
+                directory, filename = os.path.split(os.path.abspath(path))
+                wal_path = os.path.join(directory, f".{filename}.feature_library.wal")
+        self.live = LiveFeatureLibrary(
+            self.library, wal_path, compact_bytes=int(self.params.get("wal_compact_bytes", DEFAULT_COMPACT_BYTES))
+        )
+        replayed = self.live.replay()
+        if replayed:
+            print(f"特征库重放预写日志 {replayed} 条记录，共 {self.live.count} 个特征")
+
+        watch_interval = float(self.params.get("watch_interval", 2) or 0)
+        if watch_interval > 0 and path and os.path.isdir(path):
+            def load_file(file_path):
+                features = {}
+                self._load_feature_file(file_path, features)
+                return features
+            self.live.watch(path, load_file, watch_interval, self.sources)
+
     def _run_compute(self, port: str, data: Any) -> 'NodeResult':
         """
         运行特征匹配计算
@@ -40,91 +168,226 @@ class FeatureMatchNode(ComputeNode):
         Returns:
             NodeResult: 节点运行结果封装对象
         """
+        if port == "enroll":
+            return NodeResult(self._enroll(data), self)
+        if port == "delete":
+            return NodeResult(self._delete(data), self)
+
         # 准备输入数据
         input_data = self.prepare_input(port, data)
+        # 本次匹配始终使用同一个特征库快照，不受并发更新影响
+        library = self._current_library()
         
         # 确定匹配模式
-        if "feature" in input_data and self.feature_library:
+        if "feature" in input_data and len(library):
             # 单个特征与特征库匹配模式
-            result = self._match_with_library(input_data["feature"])
-        elif "features" in input_data and self.feature_library:
-            # 特征列表与特征库匹配模式
-            result = []
-            for feature_item in input_data["features"]:
-                # 对每个输入特征与完整特征库进行匹配
-                match_result = self._match_with_library(feature_item["feature"])
-                
-                # 构建输出格式: {index: 0, matchs: {}}
-                # 每个特征都包含其原始索引和对应的完整匹配结果
-                result.append({
-                    "index": feature_item["index"],
-                    "matchs": match_result
-                })
+            result = self._match_with_library(input_data["feature"], library)
+        elif "features" in input_data and len(library):
+            # 特征列表与特征库匹配模式：所有特征由一次矩阵运算与完整特征库计算相似度
+            # 构建输出格式: {index: 0, matchs: {}}
+            # 每个特征都包含其原始索引和对应的完整匹配结果
+            result = self._match_batch_with_library(input_data["features"], library)
         else:
-            if not self.feature_library:
+            if not len(library):
                 raise ValueError("特征库为空，无法进行特征匹配")
             raise ValueError("输入数据格式不正确，需要包含'feature'（用于与特征库匹配），或'features'列表")
         
         return NodeResult(result, self)
     
-    def _match_with_library(self, feature: np.ndarray) -> Dict:
+    def _enroll(self, data: Any) -> Dict:
+        """
+        把enroll端口输入的特征追加到特征库
+
+        Args:
+            data (Any): 特征列表或单个特征字典，元素为 {"id": 特征ID, "feature": 特征} 或 {"index": 索引, "feature": 特征}
+
+        Returns:
+            Dict: 追加的特征ID和追加后的特征总数
+        """
+        items = [data] if isinstance(data, dict) else list(data or [])
+        source = self.params.get("enroll_source", "") or "enrolled"
+        ids = []
+        vectors = []
+        for position, item in enumerate(items):
+            if not isinstance(item, dict) or "feature" not in item:
+                raise ValueError("enroll输入的元素格式不正确，需要包含'feature'")
+            ids.append(str(item["id"]) if "id" in item else f"{source}_{item.get('index', position)}")
+            vectors.append(self._process_feature(item["feature"]))
+        if ids:
+            self.append_features(ids, np.stack(vectors))
+        return {"enrolled": ids, "total_count": self.live.count if self.live is not None else len(self.library)}
+
+    def _delete(self, data: Any) -> Dict:
+        """
+        从特征库删除delete端口输入的特征ID
+
+        Args:
+            data (Any): 特征ID、特征ID列表，或元素为 {"id": 特征ID} 的列表
+
+        Returns:
+            Dict: 请求删除的特征ID、实际删除的特征数和删除后的特征总数
+        """
+        items = [data] if isinstance(data, (str, dict)) else list(data or [])
+        ids = []
+        for item in items:
+            if isinstance(item, dict):
+                if "id" not in item:
+                    raise ValueError("delete输入的元素格式不正确，需要包含'id'")
+                item = item["id"]
+            ids.append(str(item))
+        deleted = self.delete_features(ids) if ids else 0
+        return {"deleted": ids, "deleted_count": deleted,
+                "total_count": self.live.count if self.live is not None else len(self.library)}
+
+    def _match_with_library(self, feature: np.ndarray, library: FeatureLibrary) -> Dict:
         """
-        与特征库中的所有特征进行匹配
+        与特征库中的所有特征进行匹配，所有相似度由一次矩阵运算得出
 
         Args:
             feature (np.ndarray): 要匹配的特征向量
+            library (FeatureLibrary): 特征库（快照）
 
         Returns:
             Dict: 匹配结果，包含最佳匹配和所有匹配信息
         """
-        if not self.feature_library:
+        if not len(library):
             raise ValueError("特征库为空，无法进行匹配")
         
-        # 存储满足匹配阈值的结果
-        all_matches = []
-        best_match_id = None
-        best_similarity = -float('inf')
-        
-        # 与特征库中的每个特征进行匹配
-        for feature_id, library_feature in self.feature_library.items():
-            similarity = self._calculate_similarity(
-                feature, 
-                library_feature,
-                self.params["metric"]
-            )
-            
-            # 检查是否匹配
-            is_matched = similarity >= self.params["threshold"]
-            
-            # 更新最佳匹配
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match_id = feature_id
-                best_is_matched = is_matched
-            
-            # 只记录满足匹配阈值的结果
-            if is_matched:
-                all_matches.append({
-                    "feature_id": feature_id,
-                    "similarity": similarity,
-                    "is_matched": is_matched
-                })
-        
-        # 构建结果
-        result = {
-            "best_match": {
-                "feature_id": best_match_id,
-                "similarity": best_similarity,
-                "is_matched": best_is_matched
-            },
-            "all_matches": all_matches,
-            "matched_count": len(all_matches),
-            "total_count": len(self.feature_library),
-            "threshold": self.params["threshold"],
-            "metric": self.params["metric"]
-        }
+        if self.index is not None and library is self.index_library:
+            return self._search_index(feature[None, :], library)[0]
+        similarities = library.similarities(feature, self.params["metric"])
+        return self._build_matches(similarities[None, :], library)[0]
+
+    def _match_batch_with_library(self, features: List[Dict], library: FeatureLibrary) -> List[Dict]:
+        """
+        将一批特征与特征库中的所有特征进行匹配，所有特征的相似度由一次矩阵乘法得出
+
+        Args:
+            features (List[Dict]): 特征列表，元素为 {"index": 索引, "feature": 特征向量}
+            library (FeatureLibrary): 特征库（快照）
+
+        Returns:
+            List[Dict]: 每个特征的匹配结果 {"index": 索引, "matchs": 匹配结果}
+        """
+        if not len(library):
+            raise ValueError("特征库为空，无法进行匹配")
+        if not features:
+            return []
+
+        # 特征节点输出的FeatureBatch直接使用其特征矩阵，特征列表合并为一个矩阵
+        batch = FeatureBatch.from_items(features)
+        if self.index is not None and library is self.index_library:
+            matches = self._search_index(batch.matrix, library)
+        else:
+            similarities = library.similarity_matrix(batch.matrix, self.params["metric"])
+            matches = self._build_matches(similarities, library)
+        return [{
+            "index": feature_item["index"],
+            "matchs": match_result
+        } for feature_item, match_result in zip(batch, matches)]
+
+    def _search_index(self, features: np.ndarray, library: FeatureLibrary) -> List[Dict]:
+        """
+        用近似最近邻索引搜索每个查询的候选特征，并构建匹配结果
+
+        Args:
+            features (np.ndarray): 查询矩阵，形状为 (查询数, 维度)
+            library (FeatureLibrary): 建立索引时的特征库
+
+        Returns:
+            List[Dict]: 每个查询的匹配结果
+        """
+        candidates = [self.index.search(library, feature, self.params["metric"],
+                                        nprobe=int(self.params["nprobe"]), refine=int(self.params["refine"]))
+                      for feature in features]
+        # 各查询的候选数不同，补齐为矩阵，补齐位置的相似度为负无穷，不会被选中
+        width = max(len(rows) for rows, _ in candidates)
+        rows = np.zeros((len(candidates), width), dtype=np.int64)
+        similarities = np.full((len(candidates), width), -np.inf)
+        for row, (candidate_rows, candidate_similarities) in enumerate(candidates):
+            # 候选按特征库顺序排列，与精确搜索的输出顺序一致
+            order = np.argsort(candidate_rows)
+            rows[row, :len(candidate_rows)] = candidate_rows[order]
+            similarities[row, :len(candidate_rows)] = candidate_similarities[order]
+        return self._build_matches(similarities, library, rows)
+
+    def _build_matches(self, similarities: np.ndarray, library: FeatureLibrary,
+                       rows: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        由相似度矩阵构建每个查询的匹配结果
+
+        top_k为0时all_matches包含所有满足阈值的特征，按特征库顺序排列；
+        top_k大于0时只用argpartition选出相似度最高的top_k个特征，按相似度从高到低排列，
+        不对整行排序，输出大小不随特征库大小和阈值增长。matched_count始终为满足阈值的特征总数。
+
+        Args:
+            similarities (np.ndarray): 形状为 (查询数, 特征数) 的相似度，rows不为None时为候选特征的相似度
+            library (FeatureLibrary): 计算相似度时使用的特征库（快照）
+            rows (Optional[np.ndarray], optional): 每个候选在特征库中的行号，形状与similarities相同，
+                None表示similarities的列即为特征库的行. Defaults to None
+
+        Returns:
+            List[Dict]: 每个查询的匹配结果，包含最佳匹配和所有匹配信息
+        """
+        threshold = self.params["threshold"]
+        top_k = int(self.params.get("top_k", 0) or 0)
+        ids = library.ids
+        total = similarities.shape[1]
+        matched_counts = np.count_nonzero(similarities >= threshold, axis=1).tolist()
+
+        if top_k > 0:
+            if top_k < total:
+                candidates = np.argpartition(-similarities, top_k - 1, axis=1)[:, :top_k]
+            else:
+                candidates = np.broadcast_to(np.arange(total), similarities.shape)
+            values = np.take_along_axis(similarities, candidates, axis=1)
+            # 按相似度从高到低排列，相似度相同时取特征库中靠前的特征
+            order = np.lexsort((candidates, -values), axis=-1)
+            candidates = np.take_along_axis(candidates, order, axis=1)
+            values = np.take_along_axis(values, order, axis=1)
+            best_indices = candidates[:, 0]
+        else:
+            # 最佳匹配（相似度相同时取特征库中靠前的特征）
+            best_indices = np.argmax(similarities, axis=1)
+
+        results = []
+        for row, best_index in enumerate(best_indices.tolist()):
+            best_similarity = float(similarities[row, best_index])
+            # 候选的列号转换为特征库的行号
+            library_rows = rows[row] if rows is not None else None
+            if top_k > 0:
+                # 只记录满足匹配阈值的结果，按相似度从高到低排列
+                selected = values[row] >= threshold
+                indices = candidates[row][selected].tolist()
+                scores = values[row][selected].tolist()
+            else:
+                # 只记录满足匹配阈值的结果，按特征库顺序排列
+                indices = np.flatnonzero(similarities[row] >= threshold).tolist()
+                scores = similarities[row, indices].tolist()
+            if library_rows is not None:
+                best_index = int(library_rows[best_index])
+                indices = library_rows[indices].tolist()
+            all_matches = [{
+                "feature_id": str(ids[index]),
+                "similarity": float(score),
+                "is_matched": True
+            } for index, score in zip(indices, scores)]
+
+            # 构建结果
+            results.append({
+                "best_match": {
+                    "feature_id": str(ids[best_index]),
+                    "similarity": best_similarity,
+                    "is_matched": best_similarity >= threshold
+                },
+                "all_matches": all_matches,
+                "matched_count": matched_counts[row],
+                "total_count": len(library),
+                "threshold": threshold,
+                "metric": self.params["metric"]
+            })
         
-        return result
+        return results
 
     def prepare_input(self, port: str, data: Any) -> Any:
         """
@@ -146,6 +409,11 @@ class FeatureMatchNode(ComputeNode):
             processed_data = {
                 "feature": self._process_feature(data["feature"])
             }
+        # 特征节点输出的一批特征，元素已经是一维float32数组
+        elif isinstance(data, FeatureBatch):
+            processed_data = {
+                "features": data
+            }
         # 检查是否是特征列表格式（直接传入列表）
         elif isinstance(data, list):
             # 处理特征列表
@@ -178,9 +446,9 @@ class FeatureMatchNode(ComputeNode):
         Returns:
             np.ndarray: 处理后的特征向量
         """
-        # 转换为numpy数组
+        # 转换为numpy数组，与特征库使用相同的数据类型，避免计算时混合类型转换
         if isinstance(feature, list):
-            feature = np.array(feature)
+            feature = np.asarray(feature, dtype=FEATURE_DTYPE)
         elif not isinstance(feature, np.ndarray):
             raise TypeError(f"不支持的特征类型: {type(feature)}")
         
@@ -190,94 +458,99 @@ class FeatureMatchNode(ComputeNode):
         
         return feature
 
-    def _calculate_similarity(self, feature1: np.ndarray, feature2: np.ndarray, metric: str) -> float:
+    def _load_feature_library(self, path: str) -> None:
         """
-        计算两个特征向量之间的相似度
+        加载特征向量库
 
-        Args:
-            feature1 (np.ndarray): 第一个特征向量
-            feature2 (np.ndarray): 第二个特征向量
-            metric (str): 相似度度量方法
+        特征库源文件解析后编译为.npy矩阵和ID文件（见FeatureLibrary.save），之后启动时源文件的
+        集合、修改时间和大小都未变化则直接以内存映射方式加载编译结果，不再解析JSON
 
-        Returns:
-            float: 相似度分数
-        """
-        if metric == "cosine":
-            # 余弦相似度
-            return self._cosine_similarity(feature1, feature2)
-        elif metric == "euclidean":
-            # 欧氏距离（转换为相似度）
-            distance = np.linalg.norm(feature1 - feature2)
-            # 转换为相似度：1/(1+distance)
-            return 1.0 / (1.0 + distance)
-        elif metric == "manhattan":
-            # 曼哈顿距离（转换为相似度）
-            distance = np.sum(np.abs(feature1 - feature2))
-            # 转换为相似度：1/(1+distance)
-            return 1.0 / (1.0 + distance)
+        Args:
+            path (str): 特征文件或目录的路径
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"特征库路径不存在: {path}")
+        
+        source_files = self._source_files(path)
+        compiled_path = self._compiled_library_path(path)
+        sources = source_state(source_files)
+        self.sources = sources
+        if compiled_path and FeatureLibrary.is_compiled(compiled_path, sources):
+            self.library = FeatureLibrary.load(compiled_path)
+            print(f"特征向量库加载完成，从 {compiled_path} 加载 {len(self.library)} 个特征")
         else:
-            raise ValueError(f"不支持的相似度度量方法: {metric}")
+            features = {}
+            for file_path in source_files:
+                self._load_feature_file(file_path, features)
+            # 合并为一个矩阵
+            self.library = FeatureLibrary.from_dict(features)
+            print(f"特征向量库加载完成，共加载 {len(self.library)} 个特征")
+            if compiled_path and len(self.library):
+                try:
+                    self.library.save(compiled_path, sources)
+                except Exception as e:
+                    # 特征库目录只读等情况下不保存编译结果，不影响本次运行
+                    print(f"警告: 保存编译后的特征库到 {compiled_path} 失败: {str(e)}")
+        # 按参数加载或建立近似最近邻索引
+        self.index = load_or_build_index(self.library, self.params)
+        self.index_library = self.library
 
-    def _cosine_similarity(self, feature1: np.ndarray, feature2: np.ndarray) -> float:
+    def _source_files(self, path: str) -> List[str]:
         """
-        计算两个特征向量之间的余弦相似度
+        获取特征库源文件列表
 
         Args:
-            feature1 (np.ndarray): 第一个特征向量
-            feature2 (np.ndarray): 第二个特征向量
+            path (str): 特征文件或目录的路径
 
         Returns:
-            float: 余弦相似度分数，范围[-1, 1]
+            List[str]: path为文件时只包含该文件，为目录时是目录下按文件名排序（保证特征顺序固定）的.json和.npy文件
         """
-        # 计算点积
-        dot_product = np.dot(feature1, feature2)
-        
-        # 计算模长
-        norm1 = np.linalg.norm(feature1)
-        norm2 = np.linalg.norm(feature2)
-        
-        # 避免除零错误
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        # 计算余弦相似度
-        return dot_product / (norm1 * norm2)
+        if os.path.isfile(path):
+            return [path]
+        return [os.path.join(path, filename) for filename in sorted(os.listdir(path))
+                if filename.endswith(('.json', '.npy')) and os.path.isfile(os.path.join(path, filename))]
 
-    def _load_feature_library(self, path: str) -> None:
+    def _compiled_library_path(self, path: str) -> str:
         """
-        加载特征向量库
+        获取编译后的特征库目录
 
         Args:
             path (str): 特征文件或目录的路径
+
+        Returns:
+            str: compiled_path参数指定的目录；未指定时特征库目录下的.feature_library目录，
+                或特征文件旁的 .{文件名}.feature_library 目录；compile参数为False时返回空字符串
         """
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"特征库路径不存在: {path}")
-        
-        if os.path.isfile(path):
-            # 处理单个文件
-            self._load_feature_file(path)
-        elif os.path.isdir(path):
-            # 处理目录下的所有文件
-            for filename in os.listdir(path):
-                file_path = os.path.join(path, filename)
-                if os.path.isfile(file_path) and filename.endswith('.json'):
-                    self._load_feature_file(file_path)
-        
-        print(f"特征向量库加载完成，共加载 {len(self.feature_library)} 个特征")
+        if not self.params.get("compile", True):
+            return ""
+        if self.params.get("compiled_path"):
+            return self.params["compiled_path"]
+        if os.path.isdir(path):
+            return os.path.join(path, ".feature_library")
+        directory, filename = os.path.split(os.path.abspath(path))
+        return os.path.join(directory, f".{filename}.feature_library")
     
-    def _load_feature_file(self, file_path: str) -> None:
+    def _load_feature_file(self, file_path: str, features: Dict[str, np.ndarray]) -> None:
         """
-        加载单个特征文件
+        加载单个特征文件（.json或.npy）
 
         Args:
             file_path (str): 特征文件的路径
+            features (Dict[str, np.ndarray]): 特征ID到特征向量的映射，加载的特征添加到其中
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                features_data = json.load(f)
-            
             # 获取文件名（不包含扩展名）
             file_name = os.path.splitext(os.path.basename(file_path))[0]
+
+            if file_path.endswith('.npy'):
+                # .npy文件为一个特征向量或每行一个特征的矩阵，特征ID为文件名+行号
+                vectors = np.load(file_path).astype(FEATURE_DTYPE, copy=False)
+                for row, feature_vector in enumerate(vectors.reshape(-1, vectors.shape[-1])):
+                    features[f"{file_name}_{row}"] = feature_vector
+                return
+
+            with open(file_path, 'r', encoding='utf-8') as f:
+                features_data = json.load(f)
             
             # 处理特征数据
             if isinstance(features_data, list):
@@ -286,14 +559,14 @@ class FeatureMatchNode(ComputeNode):
                         # 创建特征ID：文件名+index
                         feature_id = f"{file_name}_{feature_item['index']}"
                         # 处理特征向量
-                        feature_vector = np.array(feature_item['feature'])
+                        feature_vector = np.asarray(feature_item['feature'], dtype=FEATURE_DTYPE)
                         # 添加到特征库
-                        self.feature_library[feature_id] = feature_vector
+                        features[feature_id] = feature_vector
             elif isinstance(features_data, dict) and 'feature' in features_data:
                 # 单个特征的情况
                 feature_id = f"{file_name}_0"
-                feature_vector = np.array(features_data['feature'])
-                self.feature_library[feature_id] = feature_vector
+                feature_vector = np.asarray(features_data['feature'], dtype=FEATURE_DTYPE)
+                features[feature_id] = feature_vector
         except Exception as e:
             print(f"加载特征文件 {file_path} 失败: {str(e)}")
             # 继续加载其他文件，不中断整个过程
@@ -1,5 +1,7 @@
 from typing import Any, Optional
+import numpy as np
 from .model import BaseModelNode
+from pxs.workflow.common.features import FeatureBatch, FEATURE_DTYPE
 
 class ImageFeatureNode(BaseModelNode):
     """图像特征节点"""
@@ -13,20 +15,18 @@ class ImageFeatureNode(BaseModelNode):
             from_port (Optional[str], optional): 输出端口名称. Defaults to None.
 
         Returns:
-            Any: 处理后的结果，类型取决于from_port参数
+            Any: 处理后的结果，类型取决于from_port参数；批量结果为FeatureBatch（兼容特征列表格式），
+                单个结果为 {"index": 0, "feature": float32数组}
         """
         assert port=="features",f"输出端口必须是features，当前端口是{port}"
         if isinstance(result,list):
-            ret=[]
-            for index, item in enumerate(result):
-                obj={
-                    "index": index,
-                    "feature": item["feature"].tolist()  # 将ndarray转换为列表，保持维度不变   
-                }
-                ret.append(obj)
-            return ret
+            # 所有特征合并为一个连续的float32矩阵，下游节点直接使用，不转换为Python列表
+            rows = [np.asarray(item["feature"]).reshape(-1) for item in result]
+            if not rows:
+                return FeatureBatch(np.empty((0, 0), dtype=FEATURE_DTYPE))
+            return FeatureBatch(np.stack(rows))
         else:
             return {
                 "index":0,
-                "feature": result["feature"].tolist()
-            }
\ No newline at end of file
+                "feature": np.asarray(result["feature"], dtype=FEATURE_DTYPE)
+            }
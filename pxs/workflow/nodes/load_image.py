@@ -1,25 +1,51 @@
-from typing import Dict, Optional, Any
-from .base_node import ComputeNode, NodeResult
+from typing import Dict, Optional, Any, Iterator, Tuple
+from .base_node import ComputeNode, StreamNode, NodeResult
+from pxs.workflow.common.image_io import read_image
+from pxs.workflow.common.scan import scan_files, IMAGE_EXTENSIONS
 import os
-import cv2
 import numpy as np
 
-class LoadImageNode(ComputeNode):
-    """加载图像节点
 
-    用于读取图像文件并输出给后续处理节点
+def LoadImageNode(config: Dict, pipeline: Any) -> 'LoadImageMixin':
     """
+    代理创建加载图像节点
 
-    def _run_compute(self, port: str, data: Any) -> 'NodeResult':
+    params中chunk_size大于0时创建分块加载节点（流式输出，每次输出chunk_size张图像），
+    否则创建一次性加载全部图像的节点
+
+    Args:
+        config (Dict): 节点配置
+        pipeline (Any): 工作流管道实例
+
+    Returns:
+        LoadImageMixin: 加载图像节点实例
+    """
+    chunk_size = int(config.get("params", {}).get("chunk_size", 0) or 0)
+    if chunk_size > 0:
+        return LoadImageChunkNode(config, pipeline)
+    return LoadImageFullNode(config, pipeline)
+
+
+class LoadImageMixin:
+    """加载图像节点的公共功能：枚举图像文件、读取图像和处理输出
+
+    path为目录时params中的扫描选项：
+    - recursive: 是否扫描子目录，默认False
+    - pattern: glob模式（字符串或列表），匹配相对目录的路径，默认不过滤
+    - extensions: 允许的扩展名列表，默认为常见图像扩展名
+    - sort: name（每个目录内按文件名排序，默认）或none（按文件系统顺序，不需要先列出整个目录）
+    - shard_index/shard_count: 多个工作流进程分担同一目录时的分片索引和分片数量，默认0/1
+    """
+
+    def _iter_image_files(self) -> Iterator[str]:
         """
-        运行加载图像节点，读取图像文件
+        按params中的path逐个给出待读取的图像文件路径，目录在读取过程中逐步扫描
 
-        Args:
-            port: 端口名称
-            data: 输入数据
+        Yields:
+            str: 图像文件路径
 
-        Returns:
-            NodeResult: 包含图像数据的结果对象
+        Raises:
+            ValueError: 当图像路径未设置或无效时抛出异常
         """
         # 从params字典中读取图像访问路径
         image_path = self.params.get('path', None)
@@ -28,42 +54,32 @@ class LoadImageNode(ComputeNode):
         if not image_path:
             raise ValueError(f"图像输入节点 {self.id} 未设置图像路径")
 
-        images = []
         # 处理单张图像或多张图像列表
         if isinstance(image_path, str):
             if os.path.isdir(image_path):
                 # 如果是目录，读取目录下所有图像
-                for file_name in os.listdir(image_path):
-                    file_path = os.path.join(image_path, file_name)
-                    if self._is_image_file(file_path):
-                        image = self._read_image(file_path)
-                        images.append(image)
+                yield from scan_files(
+                    image_path,
+                    recursive=bool(self.params.get('recursive', False)),
+                    patterns=self.params.get('pattern', None),
+                    extensions=self.params.get('extensions', None) or IMAGE_EXTENSIONS,
+                    sort=self.params.get('sort', 'name'),
+                    shard_index=int(self.params.get('shard_index', 0)),
+                    shard_count=int(self.params.get('shard_count', 1))
+                )
             elif self._is_image_file(image_path):
                 # 如果是文件，直接读取
-                image = self._read_image(image_path)
-                images.append(image)
+                yield image_path
             else:
                 raise ValueError(f"图像输入节点 {self.id} 路径无效: {image_path}")
         elif isinstance(image_path, list):
             # 如果是列表，读取每个路径的图像
             for path in image_path:
                 if self._is_image_file(path):
-                    image = self._read_image(path)
-                    images.append(image)
+                    yield path
         else:
             raise ValueError(f"图像输入节点 {self.id} 路径类型无效: {type(image_path)}")
 
-        if not images:
-            raise ValueError(f"图像输入节点 {self.id} 未找到有效图像")
-
-        # 根据输出端口返回不同格式的结果
-        result = {
-            "images": images,
-            "count": len(images)
-        }
-
-        return NodeResult(result, self)
-
     def process_output(self, result: Any, port: Optional[str] = None) -> Any:
         """
         处理输出结果
@@ -79,6 +95,8 @@ class LoadImageNode(ComputeNode):
             return result["images"]
         elif port == "count":
             return result["count"]
+        elif port == "scales":
+            return result["scales"]
         else:
             return result
 
@@ -92,36 +110,110 @@ class LoadImageNode(ComputeNode):
         Returns:
             bool: 是否为图像文件
         """
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
+        image_extensions = [extension.lower() for extension in self.params.get('extensions', None) or IMAGE_EXTENSIONS]
         return os.path.isfile(file_path) and os.path.splitext(file_path)[1].lower() in image_extensions
 
-    def _read_image(self, file_path: str) -> np.ndarray:
+    def _read_image(self, file_path: str) -> Tuple[np.ndarray, float]:
         """
-        读取图像文件，支持中文路径
+        按params中的解码选项读取图像文件
+
+        解码选项：max_side（输出长边上限，0表示不限制）、decode_scale（固定降分辨率倍数1/2/4/8）、
+        keep_bgr（保持BGR通道顺序，下游模型接受BGR输入时可跳过通道转换）
 
         Args:
             file_path (str): 图像文件路径
 
         Returns:
-            np.ndarray: 读取的图像数据
+            Tuple[np.ndarray, float]: 图像数据和缩放比例（输出尺寸/原始尺寸）
 
         Raises:
             RuntimeError: 当图像读取失败时抛出异常
         """
-        try:
-            # 使用numpy和cv2.imdecode读取图像，支持中文路径
-            with open(file_path, 'rb') as f:
-                img_data = f.read()
-            # 将二进制数据转换为numpy数组
-            img_array = np.frombuffer(img_data, np.uint8)
-            # 解码图像
-            image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                raise RuntimeError(f"无法读取图像 {file_path}")
-            
-            # 转换为RGB格式
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            return image
-        except Exception as e:
-            raise RuntimeError(f"读取图像 {file_path} 失败: {str(e)}")
\ No newline at end of file
+        return read_image(
+            file_path,
+            max_side=int(self.params.get('max_side', 0) or 0),
+            decode_scale=int(self.params.get('decode_scale', 1) or 1),
+            keep_bgr=bool(self.params.get('keep_bgr', False))
+        )
+
+
+class LoadImageFullNode(LoadImageMixin, ComputeNode):
+    """加载图像节点
+
+    用于读取图像文件并输出给后续处理节点，一次性读取全部图像作为一条结果输出
+    """
+
+    def _run_compute(self, port: str, data: Any) -> 'NodeResult':
+        """
+        运行加载图像节点，读取图像文件
+
+        Args:
+            port: 端口名称
+            data: 输入数据
+
+        Returns:
+            NodeResult: 包含图像数据的结果对象
+        """
+        images = []
+        scales = []
+        for file_path in self._iter_image_files():
+            image, scale = self._read_image(file_path)
+            images.append(image)
+            scales.append(scale)
+
+        if not images:
+            raise ValueError(f"图像输入节点 {self.id} 未找到有效图像")
+
+        # 根据输出端口返回不同格式的结果
+        result = {
+            "images": images,
+            "count": len(images),
+            "scales": scales
+        }
+
+        return NodeResult(result, self)
+
+
+class LoadImageChunkNode(LoadImageMixin, StreamNode):
+    """分块加载图像节点
+
+    按params中的chunk_size分块读取图像，每块作为一条流式结果输出，输出端口与一次性加载相同。
+    max_pending_results为1，尚未被主循环取走的块最多一个，但读取线程在下游处理上一块时会继续读取下一块，
+    因此顺序模式下内存中同时存在2~3块图像：下游正在处理的块、等待主循环取走的块和正在读取的块
+    （流水线模式下各阶段队列中的块另受stage_queue_size限制），内存占用按约3*chunk_size张图像估算。
+    """
+
+    max_pending_results = 1
+
+    def _stream_output(self, port: str, data: Any):
+        """
+        分块读取图像文件
+
+        Args:
+            port: 端口名称
+            data: 输入数据
+
+        Yields:
+            NodeResult: 每块图像的结果对象，包含images、count和scales
+        """
+        chunk_size = int(self.params.get('chunk_size', 0) or 0)
+        if chunk_size <= 0:
+            raise ValueError(f"图像输入节点 {self.id} 的chunk_size必须大于0")
+
+        images = []
+        scales = []
+        emitted = 0
+        for file_path in self._iter_image_files():
+            image, scale = self._read_image(file_path)
+            images.append(image)
+            scales.append(scale)
+            if len(images) >= chunk_size:
+                emitted += len(images)
+                yield NodeResult({"images": images, "count": len(images), "scales": scales}, self)
+                images = []
+                scales = []
+        if images:
+            emitted += len(images)
+            yield NodeResult({"images": images, "count": len(images), "scales": scales}, self)
+        if not emitted:
+            raise ValueError(f"图像输入节点 {self.id} 未找到有效图像")
@@ -1,13 +1,28 @@
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Iterator
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
 from .base_node import StreamNode, NodeResult
+from .load_image import LoadImageMixin
+from pxs.workflow.common.checkpoint import input_key
 import os
-import cv2
-import numpy as np
 
-class LoadImageStreamNode(StreamNode):
+# 预取解码图像占用内存的默认上限（字节）
+DEFAULT_PREFETCH_BYTES = 512 * 1024 * 1024
+
+
+class LoadImageStreamNode(LoadImageMixin, StreamNode):
     """加载图像节点
 
-    用于读取图像文件并输出给后续处理节点
+    用于读取图像文件并输出给后续处理节点，每张图像作为一条流式结果输出，
+    目录扫描和解码选项见LoadImageMixin
+
+    params中的预取选项：
+    - workers: 解码线程数，不大于1时在流式线程中逐个读取，默认min(4, CPU核数)
+    - prefetch: 最多提前读取的图像数，默认为workers的2倍
+    - ordered: 是否按文件顺序输出，为False时先解码完成的图像先输出，默认True
+    - max_prefetch_bytes: 已预取但尚未输出的解码图像占用内存上限（字节），默认512MB
+
+    支持断点续跑：输入键为文件路径、大小和修改时间，续跑时跳过已完成的文件
     """
 
     def _stream_output(self, port: str, data: Any):
@@ -21,113 +36,154 @@ class LoadImageStreamNode(StreamNode):
         Returns:
             NodeResult: 包含图像数据的结果对象
         """
-        # 从params字典中读取图像访问路径
-        image_path = self.params.get('path', None)
-
-        # 确保图像路径有效
-        if not image_path:
-            raise ValueError(f"图像输入节点 {self.id} 未设置图像路径")
-
-        # 处理单张图像或多张图像列表
-        if isinstance(image_path, str):
-            if os.path.isdir(image_path):
-                # 如果是目录，读取目录下所有图像
-                for file_name in os.listdir(image_path):
-                    file_path = os.path.join(image_path, file_name)
-                    if self._is_image_file(file_path):
-                        image = self._read_image(file_path)
-                        result = {
-                            "filename": file_name,
-                            "images": [image],
-                            "count": 1
-                        }
-                        yield NodeResult(result, self)
-            elif self._is_image_file(image_path):
-                # 如果是文件，直接读取
-                image = self._read_image(image_path)
-                result = {
-                    "filename": os.path.basename(image_path),
-                    "images": [image],
-                    "count": 1
-                }
-                yield NodeResult(result, self)
-            else:
-                raise ValueError(f"图像输入节点 {self.id} 路径无效: {image_path}")
-        elif isinstance(image_path, list):
-            # 如果是列表，读取每个路径的图像
-            for path in image_path:
-                if self._is_image_file(path):
-                    image = self._read_image(path)
-                    result = {
-                        "filename": os.path.basename(path),
-                        "images": [image],
-                        "count": 1
-                    }
-                    yield NodeResult(result, self)
-        else:
-            raise ValueError(f"图像输入节点 {self.id} 路径类型无效: {type(image_path)}")
+        workers = int(self.params.get('workers', min(4, os.cpu_count() or 1)))
+        if workers <= 1:
+            for file_path in self._iter_unfinished_files():
+                yield NodeResult(self._load_item(file_path), self)
+            return
+
+        prefetch = max(1, int(self.params.get('prefetch', workers * 2)))
+        ordered = self.params.get('ordered', True)
+        max_bytes = int(self.params.get('max_prefetch_bytes', DEFAULT_PREFETCH_BYTES))
+        yield from self._prefetch_output(self._iter_unfinished_files(), workers, prefetch, ordered, max_bytes)
+
+    def _iter_unfinished_files(self) -> Iterator[str]:
+        """
+        逐个给出待读取的图像文件路径，开启断点续跑时跳过已完成的文件
 
+        Yields:
+            str: 图像文件路径
+        """
+        checkpoint = self.checkpoint
+        for file_path in self._iter_image_files():
+            if checkpoint is not None and checkpoint.is_done(input_key(file_path)):
+                continue
+            yield file_path
 
-    def process_output(self, result: Any, port: Optional[str] = None) -> Any:
+    def checkpoint_key(self, node_result: NodeResult) -> Optional[str]:
         """
-        处理输出结果
+        获取流式结果对应的输入键
 
         Args:
-            result (Any): 原始结果
-            port (Optional[str], optional): 输出端口名称. Defaults to None.
+            node_result (NodeResult): 流式结果
 
         Returns:
-            Any: 处理后的结果
+            Optional[str]: 输入键，未开启断点续跑时为None
         """
-        if port == "images":
-            return result["images"]
-        elif port == "count":
-            return result["count"]
-        elif port == "filename":
-            return result["filename"]
-        else:
-            return result
+        return node_result.value.get("checkpoint_key")
 
-    def _is_image_file(self, file_path: str) -> bool:
+    def _load_item(self, file_path: str) -> Dict[str, Any]:
         """
-        检查文件是否为图像文件
+        读取一个图像文件并构造一条流式输出
 
         Args:
-            file_path (str): 文件路径
+            file_path (str): 图像文件路径
 
         Returns:
-            bool: 是否为图像文件
+            Dict[str, Any]: 包含filename、images、count、scales的输出，开启断点续跑时另含checkpoint_key
         """
-        image_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.gif']
-        return os.path.isfile(file_path) and os.path.splitext(file_path)[1].lower() in image_extensions
+        image, scale = self._read_image(file_path)
+        return {
+            "filename": os.path.basename(file_path),
+            "images": [image],
+            "count": 1,
+            "scales": [scale],
+            "checkpoint_key": input_key(file_path) if self.checkpoint is not None else None
+        }
+
+    def _prefetch_output(self, file_paths: Iterator[str], workers: int, prefetch: int,
+                         ordered: bool, max_bytes: int):
+        """
+        在线程池中提前解码后续图像并逐条输出
+
+        cv2.imdecode在解码时释放GIL，多个解码线程可同时利用多个CPU核。
+        已提交的图像数不超过prefetch；已解码未输出的图像加上按平均大小估算的解码中图像
+        超过max_bytes时暂停提交，但至少保留一个任务以保证进度。
 
-    def _read_image(self, file_path: str) -> np.ndarray:
+        Args:
+            file_paths (Iterator[str]): 图像文件路径
+            workers (int): 解码线程数
+            prefetch (int): 最多提前读取的图像数
+            ordered (bool): 是否按文件顺序输出
+            max_bytes (int): 预取图像占用内存上限（字节）
+
+        Yields:
+            NodeResult: 每张图像的输出结果
         """
-        读取图像文件，支持中文路径
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"load_image_{self.id}")
+        pending = deque()  # 已提交的任务，按提交顺序排列
+        decoded_count = 0  # 已解码的图像数，用于估算解码中图像的大小
+        decoded_bytes = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < prefetch:
+                    if pending and self._buffered_bytes(pending, decoded_count, decoded_bytes) >= max_bytes:
+                        break
+                    file_path = next(file_paths, None)
+                    if file_path is None:
+                        exhausted = True
+                        break
+                    pending.append(executor.submit(self._load_item, file_path))
+                if not pending:
+                    return
+
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = next(f for f in pending if f in done)
+                    pending.remove(future)
+                item = future.result()
+                decoded_count += 1
+                decoded_bytes += item["images"][0].nbytes
+                yield NodeResult(item, self)
+        finally:
+            # 流式输出提前结束（停止或下游出错）时取消尚未开始的解码任务
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def _buffered_bytes(pending: deque, decoded_count: int, decoded_bytes: int) -> int:
+        """
+        估算预取图像占用的内存
 
         Args:
-            file_path (str): 图像文件路径
+            pending (deque): 已提交的任务
+            decoded_count (int): 已输出的图像数
+            decoded_bytes (int): 已输出图像的总字节数
 
         Returns:
-            np.ndarray: 读取的图像数据
+            int: 已解码图像的实际字节数加上解码中图像按平均大小估算的字节数
+        """
+        average = decoded_bytes // decoded_count if decoded_count else 0
+        total = 0
+        for future in pending:
+            if future.done() and future.exception() is None:
+                total += future.result()["images"][0].nbytes
+            else:
+                total += average
+        return total
 
-        Raises:
-            RuntimeError: 当图像读取失败时抛出异常
+    def process_output(self, result: Any, port: Optional[str] = None) -> Any:
         """
-        try:
-            # 使用numpy和cv2.imdecode读取图像，支持中文路径
-            with open(file_path, 'rb') as f:
-                img_data = f.read()
-            # 将二进制数据转换为numpy数组
-            img_array = np.frombuffer(img_data, np.uint8)
-            # 解码图像
-            image = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            
-            if image is None:
-                raise RuntimeError(f"无法读取图像 {file_path}")
-            
-            # 转换为RGB格式
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            return image
-        except Exception as e:
-            raise RuntimeError(f"读取图像 {file_path} 失败: {str(e)}")
\ No newline at end of file
+        处理输出结果
+
+        Args:
+            result (Any): 原始结果
+            port (Optional[str], optional): 输出端口名称. Defaults to None.
+
+        Returns:
+            Any: 处理后的结果
+        """
+        if port == "images":
+            return result["images"]
+        elif port == "count":
+            return result["count"]
+        elif port == "filename":
+            return result["filename"]
+        elif port == "scales":
+            return result["scales"]
+        else:
+            return result
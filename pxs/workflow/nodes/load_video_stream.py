@@ -0,0 +1,186 @@
+from typing import Dict, Optional, Any, Iterator
+from .base_node import StreamNode, NodeResult
+from pxs.workflow.common.scan import scan_files
+import os
+import cv2
+
+# 视频文件扩展名
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.mpg', '.mpeg', '.ts', '.webm')
+
+
+class LoadVideoStreamNode(StreamNode):
+    """加载视频节点
+
+    逐帧读取本地视频文件，每个输出帧作为一条流式结果输出
+
+    params中的选项：
+    - path: 视频文件、目录（扫描选项同加载图像节点）或文件列表
+    - frame_stride: 每隔多少帧输出一帧，默认1
+    - target_fps: 目标输出帧率，大于0时按时间间隔选择输出帧（与frame_stride同时设置时取两者中更稀疏的），默认0
+    - start_time/end_time: 读取的起止时间（秒），从start_time处定位后开始读取，end_time为0表示读到结尾
+    - max_side: 输出帧长边的最大像素数，0表示不缩放，默认0
+    - keep_bgr: 是否保持BGR通道顺序，默认False
+
+    跳过的帧只调用grab，不做retrieve（不转换像素格式也不复制到numpy数组）
+    """
+
+    def _stream_output(self, port: str, data: Any):
+        """
+        逐个读取视频文件并按抽帧设置输出视频帧
+
+        Args:
+            port: 端口名称
+            data: 输入数据
+
+        Yields:
+            NodeResult: 每个输出帧的结果对象
+        """
+        for file_path in self._iter_video_files():
+            yield from self._read_video(file_path)
+
+    def _iter_video_files(self) -> Iterator[str]:
+        """
+        按params中的path逐个给出待读取的视频文件路径
+
+        Yields:
+            str: 视频文件路径
+
+        Raises:
+            ValueError: 当视频路径未设置或无效时抛出异常
+        """
+        video_path = self.params.get('path', None)
+        if not video_path:
+            raise ValueError(f"视频输入节点 {self.id} 未设置视频路径")
+
+        extensions = self.params.get('extensions', None) or VIDEO_EXTENSIONS
+        if isinstance(video_path, str):
+            if os.path.isdir(video_path):
+                yield from scan_files(
+                    video_path,
+                    recursive=bool(self.params.get('recursive', False)),
+                    patterns=self.params.get('pattern', None),
+                    extensions=extensions,
+                    sort=self.params.get('sort', 'name'),
+                    shard_index=int(self.params.get('shard_index', 0)),
+                    shard_count=int(self.params.get('shard_count', 1))
+                )
+            elif os.path.isfile(video_path):
+                yield video_path
+            else:
+                raise ValueError(f"视频输入节点 {self.id} 路径无效: {video_path}")
+        elif isinstance(video_path, list):
+            for path in video_path:
+                if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+                    yield path
+        else:
+            raise ValueError(f"视频输入节点 {self.id} 路径类型无效: {type(video_path)}")
+
+    def _read_video(self, file_path: str):
+        """
+        读取一个视频文件
+
+        Args:
+            file_path (str): 视频文件路径
+
+        Yields:
+            NodeResult: 每个输出帧的结果对象
+
+        Raises:
+            RuntimeError: 当视频无法打开时抛出异常
+        """
+        frame_stride = max(1, int(self.params.get('frame_stride', 1) or 1))
+        target_fps = float(self.params.get('target_fps', 0) or 0)
+        start_time = float(self.params.get('start_time', 0) or 0)
+        end_time = float(self.params.get('end_time', 0) or 0)
+        max_side = int(self.params.get('max_side', 0) or 0)
+        keep_bgr = bool(self.params.get('keep_bgr', False))
+
+        capture = cv2.VideoCapture(file_path)
+        if not capture.isOpened():
+            raise RuntimeError(f"无法打开视频 {file_path}")
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+            if start_time > 0:
+                # 按帧号定位比按毫秒定位更精确，帧率未知时退回按毫秒定位
+                if fps > 0:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, round(start_time * fps))
+                else:
+                    capture.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
+            frame_index = int(capture.get(cv2.CAP_PROP_POS_FRAMES))
+            filename = os.path.basename(file_path)
+
+            first_index = frame_index
+            next_time = None  # 按target_fps选择的下一个输出时间
+            while True:
+                if not capture.grab():
+                    break
+                timestamp = frame_index / fps if fps > 0 else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                if end_time > 0 and timestamp >= end_time:
+                    break
+
+                selected = (frame_index - first_index) % frame_stride == 0
+                if selected and target_fps > 0:
+                    if next_time is None or timestamp >= next_time - 1e-6:
+                        # 按固定间隔推进输出时间，时间戳跳变时从当前帧重新计算
+                        next_time = (timestamp if next_time is None else next_time) + 1 / target_fps
+                        if next_time <= timestamp:
+                            next_time = timestamp + 1 / target_fps
+                    else:
+                        selected = False
+                if selected:
+                    ok, frame = capture.retrieve()
+                    if ok and frame is not None:
+                        yield NodeResult(self._make_result(frame, filename, frame_index, timestamp,
+                                                           max_side, keep_bgr), self)
+                frame_index += 1
+        finally:
+            capture.release()
+
+    @staticmethod
+    def _make_result(frame, filename: str, frame_index: int, timestamp: float,
+                     max_side: int, keep_bgr: bool) -> Dict[str, Any]:
+        """
+        按输出选项处理视频帧并构造一条流式输出
+
+        Args:
+            frame (np.ndarray): 解码的BGR视频帧
+            filename (str): 视频文件名
+            frame_index (int): 帧序号
+            timestamp (float): 帧时间（秒）
+            max_side (int): 输出帧长边的最大像素数，0表示不缩放
+            keep_bgr (bool): 是否保持BGR通道顺序
+
+        Returns:
+            Dict[str, Any]: 包含images、count、filename、frame_index、timestamp、scales的输出
+        """
+        scale = 1.0
+        side = max(frame.shape[:2])
+        if 0 < max_side < side:
+            scale = max_side / side
+            frame = cv2.resize(frame, (max(1, round(frame.shape[1] * scale)), max(1, round(frame.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+        if not keep_bgr:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+        return {
+            "images": [frame],
+            "count": 1,
+            "filename": filename,
+            "frame_index": frame_index,
+            "timestamp": timestamp,
+            "scales": [scale]
+        }
+
+    def process_output(self, result: Any, port: Optional[str] = None) -> Any:
+        """
+        处理输出结果
+
+        Args:
+            result (Any): 原始结果
+            port (Optional[str], optional): 输出端口名称. Defaults to None.
+
+        Returns:
+            Any: 处理后的结果
+        """
+        if port in ("images", "count", "filename", "frame_index", "timestamp", "scales"):
+            return result[port]
+        return result
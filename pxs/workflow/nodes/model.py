@@ -1,12 +1,20 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from .base_node import ComputeNode, NodeResult
 import importlib
+import os
 from paddlex import create_model
 import numpy as np
+from pxs.workflow.common.model_registry import model_registry, model_key
+from pxs.workflow.common.feature_library import source_state
 
 class BaseModelNode(ComputeNode):
     """模型节点基类"""
 
+    # 推理预测器不可重入，并发模式下同一模型节点的任务按顺序运行
+    thread_safe = False
+    # 流水线模式下按params中的batch_size、max_wait_ms合并多条输入为一次推理
+    supports_batch = True
+
     def __init__(self, config: Dict, pipeline: Any) -> None:
         """
         初始化模型节点
@@ -16,13 +24,19 @@ class BaseModelNode(ComputeNode):
             pipeline (Any): 工作流管道实例
         """
         super().__init__(config, pipeline)
+        self.pipeline = pipeline
         self.model = None
+        self.model_state = {}  # 加载模型时model_dir中文件的状态
         self.initialize_model(pipeline)
 
     def initialize_model(self, pipeline: Any) -> None:
         """
         初始化模型
 
+        相同模型配置、model_params和运行选项（设备、pp_option、use_hpip）的节点共享同一个推理预测器（见model_registry），
+        params中serialize为True（默认）时对共享预测器的调用串行执行。model_dir中文件的状态也参与模型键，
+        权重文件被替换后不会命中注册表中的旧模型
+
         Args:
             pipeline (Any): 工作流管道实例
         """
@@ -34,15 +48,53 @@ class BaseModelNode(ComputeNode):
                     "model_dir": self.params.get("model_dir")
                 }
                 model_params = self.params.get("model_params", {})
-
-                # 创建模型实例
-                self.model = pipeline.create_model(config, **model_params)
+                self.model_state = self._model_dir_state()
+
+                # 从共享模型注册表获取模型实例，不存在时创建
+                key = model_key(
+                    {**config, "model_state": self.model_state}, model_params, getattr(pipeline, "device", None),
+                    pp_option=getattr(pipeline, "pp_option", None),
+                    use_hpip=getattr(pipeline, "use_hpip", False),
+                    hpi_config=getattr(pipeline, "hpi_config", None)
+                )
+                self.model = model_registry.acquire(
+                    key,
+                    lambda: pipeline.create_model(config, **model_params),
+                    serialized=self.params.get("serialize", True)
+                )
                 print(f"模型 {self.params['model_name']} 初始化成功")
             except Exception as e:
                 raise ValueError(f"创建模型 {self.params.get('model_name')} 失败: {str(e)}")
         else:
             raise ValueError(f"节点 {self.id} 缺少必要的模型配置")
 
+    def _model_dir_state(self) -> Dict[str, List[int]]:
+        """
+        获取model_dir中文件的状态
+
+        Returns:
+            Dict[str, List[int]]: 文件绝对路径到 [修改时间（纳秒）, 文件大小] 的映射，未指定model_dir或目录不存在时为空
+        """
+        model_dir = self.params.get("model_dir")
+        if not model_dir or not os.path.isdir(model_dir):
+            return {}
+        return source_state([os.path.join(model_dir, filename) for filename in sorted(os.listdir(model_dir))
+                             if os.path.isfile(os.path.join(model_dir, filename))])
+
+    def reset(self) -> None:
+        """重置单次运行的状态，model_dir中的权重文件被替换时重新加载模型"""
+        super().reset()
+        if self._model_dir_state() != self.model_state:
+            print(f"节点 {self.id} 的模型文件已变化，重新加载模型")
+            self.close()
+            self.initialize_model(self.pipeline)
+
+    def close(self) -> None:
+        """关闭节点，释放对共享模型的引用"""
+        if self.model is not None:
+            model_registry.release(self.model)
+            self.model = None
+
     def _run_compute(self, port: str, data: Any) -> 'NodeResult':
         """
         运行模型推理计算
@@ -66,6 +118,46 @@ class BaseModelNode(ComputeNode):
         except Exception as e:
             raise RuntimeError(f"节点 {self.id} 运行失败: {str(e)}")
 
+    def run_batch(self, items: List[Tuple[str, Any]]) -> List[Optional['NodeResult']]:
+        """
+        批量运行模型推理，把多条输入消息的数据合并为一次预测器调用，再按消息拆分结果
+
+        每条消息的模型输入为列表时按元素展开，否则视为单条数据；预测器对每条数据
+        按顺序产生一个结果，因此可以按各消息的数据条数还原每条消息的结果。
+
+        Args:
+            items (List[Tuple[str, Any]]): 输入消息列表，每个元素为 (port, data)
+
+        Returns:
+            List[Optional[NodeResult]]: 与items一一对应的运行结果，无结果的消息为None
+        """
+        try:
+            batch_input = []
+            counts = []
+            for port, data in items:
+                input_data = self.prepare_input(port, data)
+                if isinstance(input_data, list):
+                    batch_input.extend(input_data)
+                    counts.append(len(input_data))
+                else:
+                    batch_input.append(input_data)
+                    counts.append(1)
+            infer_params = dict(self.params.get("infer_params", {}))
+            infer_params.setdefault("batch_size", len(batch_input))
+            outputs = list(self.model(batch_input, **infer_params))
+        except Exception as e:
+            raise RuntimeError(f"节点 {self.id} 运行失败: {str(e)}")
+
+        if len(outputs) != len(batch_input):
+            raise RuntimeError(f"节点 {self.id} 批量推理结果数量 {len(outputs)} 与输入数量 {len(batch_input)} 不一致")
+        node_results = []
+        offset = 0
+        for count in counts:
+            results = outputs[offset:offset + count]
+            offset += count
+            node_results.append(NodeResult(results, self) if results else None)
+        return node_results
+
     def prepare_input(self,port:str,data: Any) -> Any:
         """
         准备模型输入数据
@@ -0,0 +1,182 @@
+from typing import Any, Dict, List, Optional, Tuple
+from .base_node import ComputeNode, NodeResult
+from pxs.workflow.common.array_store import NpyShardWriter
+import os
+import threading
+import numpy as np
+
+class SaveArrayNode(ComputeNode):
+    """保存数组节点
+
+    用于将特征向量、分割掩码等定长数组以二进制形式追加写入.npy分片文件，
+    可用np.load(mmap_mode='r')或pxs.workflow.common.array_store.load_shards不复制地加载
+
+    params中的选项：
+    - path: 输出目录
+    - filename: 文件名前缀，默认为节点ID
+    - shard_size: 每个分片的行数，默认10000
+    - dtype: 保存的数据类型（如float32、uint8），为空时使用第一个数组的数据类型
+    - source: 来源标识（如连接加载图像节点的filename输出），记录到索引文件
+    - clear_dir: 是否在首次写入前清空输出目录
+
+    输入可以是数组、数组列表、特征字典（{"index": 0, "feature": [...]}）或特征字典列表，
+    每个数组写入一行，所有数组的形状必须相同
+    """
+
+    def __init__(self, config: Dict, pipeline: Any) -> None:
+        """
+        初始化保存数组节点
+
+        Args:
+            config (Dict): 节点配置
+            pipeline (Any): 工作流管道实例
+        """
+        super().__init__(config, pipeline)
+        # 初始化并存储配置参数
+        self.output_path = self.params.get("path", "")
+        if not self.output_path:
+            raise ValueError("保存数组节点输出路径不能为空")
+
+        # 确保输出目录存在
+        self._ensure_dir_exists(self.output_path)
+        # 如果设置了清空目录，则在首次写入前执行清空操作（从断点续跑时不清空）
+        self.clear_dir = self.params.get("clear_dir", False)
+        self.clear_pending = self.clear_dir
+        # 调用计数器和写入锁，并发模式下多个任务同时运行时保证写入顺序一致
+        self.counter = 0
+        self.counter_lock = threading.Lock()
+        self.writer = NpyShardWriter(
+            self.output_path,
+            self.params.get("filename", "") or str(self.id),
+            shard_size=int(self.params.get("shard_size", 10000)),
+            dtype=self.params.get("dtype", None) or None
+        )
+
+    def reset(self) -> None:
+        """重置单次运行的状态，从第一个分片重新写入，按需在首次写入前重新清空输出目录"""
+        super().reset()
+        with self.counter_lock:
+            self.writer.reset()
+            self.counter = 0
+        self._ensure_dir_exists(self.output_path)
+        self.clear_pending = self.clear_dir
+
+    def flush(self) -> None:
+        """把已写入的行写入分片文件，并更新分片描述文件"""
+        with self.counter_lock:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """关闭分片文件和索引文件"""
+        with self.counter_lock:
+            self.writer.close()
+        super().close()
+
+    def checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取需要写入断点记录的状态
+
+        Returns:
+            Optional[Dict[str, Any]]: 调用计数器和分片写入位置
+        """
+        with self.counter_lock:
+            return {"counter": self.counter, **self.writer.state()}
+
+    def restore_checkpoint(self, state: Dict[str, Any]) -> None:
+        """
+        从断点记录恢复写入位置，续跑时不清空输出目录
+
+        Args:
+            state (Dict[str, Any]): checkpoint_state返回的状态
+        """
+        with self.counter_lock:
+            self.counter = state.get("counter", 0)
+            self.writer.restore(state)
+            self.clear_pending = False
+
+    def _run_compute(self, port: str, data: Any) -> NodeResult:
+        """
+        运行节点，将输入数组追加写入分片文件
+
+        Args:
+            port (str): 输入端口名称
+            data (Any): 输入数据
+
+        Returns:
+            NodeResult: 包含每行所在分片路径的结果对象
+        """
+        try:
+            items = self._collect_arrays(data)
+            source = self.params.get("source", None)
+            with self.counter_lock:
+                if self.clear_pending:
+                    self.writer.close()
+                    self._clear_directory(self.output_path)
+                    self.clear_pending = False
+                self.counter += 1
+                positions = self.writer.append(items, source)
+            return NodeResult([path for path, _ in positions], self)
+        except Exception as e:
+            raise RuntimeError(f"节点 {self.id} 写入数组失败: {str(e)}")
+
+    def _collect_arrays(self, data: Any) -> List[Tuple[np.ndarray, Any]]:
+        """
+        把输入数据整理为 (数组, 来源内索引) 列表
+
+        Args:
+            data (Any): 输入数据
+
+        Returns:
+            List[Tuple[np.ndarray, Any]]: 数组和来源内索引
+
+        Raises:
+            ValueError: 当输入数据类型无效时抛出异常
+        """
+        if data is None:
+            return []
+        if isinstance(data, np.ndarray) or isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            raise ValueError(f"保存数组节点 {self.id} 输入数据类型无效: {type(data)}")
+        items = []
+        for position, item in enumerate(data):
+            if isinstance(item, dict):
+                if "feature" not in item:
+                    raise ValueError(f"保存数组节点 {self.id} 输入字典缺少feature字段")
+                items.append((np.asarray(item["feature"]), item.get("index", position)))
+            else:
+                items.append((np.asarray(item), position))
+        return items
+
+    def process_output(self, result: Any, port: Optional[str] = None) -> Any:
+        """
+        处理输出结果
+
+        Args:
+            result (Any): 原始结果
+            port (Optional[str], optional): 输出端口名称. Defaults to None.
+
+        Returns:
+            Any: 处理后的结果
+        """
+        # result是每行所在的分片路径
+        return result
+
+    def _clear_directory(self, directory_path: str) -> None:
+        """
+        清空指定目录下的所有文件
+
+        Args:
+            directory_path (str): 要清空的目录路径
+        """
+        if not os.path.exists(directory_path):
+            return
+
+        for filename in os.listdir(directory_path):
+            file_path = os.path.join(directory_path, filename)
+            try:
+                if os.path.isfile(file_path):
+                    os.unlink(file_path)
+            except Exception as e:
+                # 记录错误但继续处理其他文件
+                print(f"警告: 无法删除文件 {file_path}: {str(e)}")
@@ -1,14 +1,29 @@
 from typing import Any, Dict,Optional
 from .base_node import ComputeNode, NodeResult
+from pxs.workflow.common.image_io import encode_image, ENCODER_PIL
+from pxs.workflow.common.write_behind import WriteBehindWriter
 import os
 import json
-from PIL import Image
+import threading
 import numpy as np
 
 class SaveImageNode(ComputeNode):
     """保存图像节点
 
     用于将输入数据写入图像文件
+
+    params中的编码和写入选项：
+    - format: 图像格式，png、jpg、webp、bmp等，默认png
+    - encoder: 编码器，pil或cv2，默认pil
+    - png_compression/jpeg_quality/webp_quality: 各格式的压缩级别或质量，不设置时使用编码器默认值
+    - write_behind: 是否后台写入，为True时编码和写文件在线程池中运行，节点立即返回输出路径，默认False
+    - write_workers: 后台写入线程数，默认min(4, CPU核数)
+    - max_pending_writes: 尚未写完的图像数上限，达到上限时节点等待，默认write_workers的4倍
+    - fsync: 工作流运行结束时是否对写入的文件统一fsync，后台写入时默认True
+
+    输出文件名由计数器预先确定，与写入完成的顺序无关；后台写入时输出路径对应的文件在工作流运行结束
+    （或提交断点记录）时才保证写完，下游节点不应立即读取这些文件。
+    写入失败的调用同样占用一个序号（并发写入和后台写入时无法回收），因此输出文件的序号可能不连续
     """
 
     def __init__(self, config: Dict, pipeline: Any) -> None:
@@ -32,11 +47,59 @@ class SaveImageNode(ComputeNode):
         # 确保输出目录存在
         self._ensure_dir_exists(self.output_path)
         
-        # 如果设置了清空目录，则在初始化时执行清空操作
-        if self.clear_dir:
-            self._clear_directory(self.output_path)
+        # 如果设置了清空目录，则在首次写入前执行清空操作（从断点续跑时不清空）
+        self.clear_pending = self.clear_dir
         # 初始化计数器，用于确保多次调用时文件名不冲突
         self.counter = 0
+        # 计数器锁，并发模式下多个任务同时运行时保证计数器不重复
+        self.counter_lock = threading.Lock()
+
+        # 文件写入器，后台写入时编码和写文件在线程池中运行
+        write_behind = bool(self.params.get("write_behind", False))
+        write_workers = int(self.params.get("write_workers", min(4, os.cpu_count() or 1))) if write_behind else 0
+        self.writer = WriteBehindWriter(
+            workers=write_workers,
+            max_pending=self.params.get("max_pending_writes", None),
+            fsync=bool(self.params.get("fsync", write_behind)),
+            name=f"save_image_{self.id}"
+        )
+
+    def reset(self) -> None:
+        """重置单次运行的状态，计数器归零，按需在首次写入前重新清空输出目录"""
+        super().reset()
+        self.counter = 0
+        self._ensure_dir_exists(self.output_path)
+        self.clear_pending = self.clear_dir
+
+    def flush(self) -> None:
+        """等待后台写入的图像全部写完并按需fsync"""
+        self.writer.flush()
+
+    def close(self) -> None:
+        """等待后台写入的图像写完并关闭写入线程池"""
+        self.writer.close()
+        super().close()
+
+    def checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取需要写入断点记录的状态
+
+        Returns:
+            Optional[Dict[str, Any]]: 计数器的当前值，续跑时据此继续编号，不覆盖已写入的文件
+        """
+        with self.counter_lock:
+            return {"counter": self.counter}
+
+    def restore_checkpoint(self, state: Dict[str, Any]) -> None:
+        """
+        从断点记录恢复计数器，续跑时不清空输出目录
+
+        Args:
+            state (Dict[str, Any]): checkpoint_state返回的状态
+        """
+        with self.counter_lock:
+            self.counter = state.get("counter", 0)
+            self.clear_pending = False
 
     def _run_compute(self, port: str, data: Any) -> NodeResult:
         """
@@ -54,6 +117,14 @@ class SaveImageNode(ComputeNode):
         filename = self.params.get("filename", "") or str(self.id)
                 
         assert port=="images",f"图像文件输出节点输入端口必须是images，当前端口是{port}"
+
+        # 预先占用计数器，确保下次调用时文件名不冲突；写入失败时该序号不回收
+        with self.counter_lock:
+            if self.clear_pending:
+                self._clear_directory(self.output_path)
+                self.clear_pending = False
+            counter = self.counter
+            self.counter += 1
         
         try:
             files=[]
@@ -61,32 +132,45 @@ class SaveImageNode(ComputeNode):
                 for i, image_data in enumerate(data):
                     if isinstance(image_data, np.ndarray):
                         # 生成文件名：直接使用已初始化好的filename加上计数器和索引
-                        file_name = f"{filename}_{self.counter}_{i}.{self.format_type}"
+                        file_name = f"{filename}_{counter}_{i}.{self.format_type}"
                         file_path = os.path.join(self.output_path, file_name)
                         
-                        image = Image.fromarray(image_data)
-                        image.save(file_path)
+                        self._write_image(file_path, image_data)
                         files.append(file_path)
             else:
                 if isinstance(data, np.ndarray):
                     # 生成文件名：直接使用已初始化好的filename加上计数器
-                    file_name = f"{filename}_{self.counter}.{self.format_type}"
+                    file_name = f"{filename}_{counter}.{self.format_type}"
                     file_path = os.path.join(self.output_path, file_name)
                     
-                    image = Image.fromarray(data)
-                    image.save(file_path)
+                    self._write_image(file_path, data)
                     files.append(file_path)
                 else:
                     raise ValueError(f"图像文件输出节点 {self.id} 输入数据类型无效: {type(data)}")  
             
-            # 增加计数器，确保下次调用时文件名不冲突
-            self.counter += 1
-            
             # 返回文件路径
             return NodeResult(files, self)
         except Exception as e:
             raise RuntimeError(f"节点 {self.id} 写入文件失败: {str(e)}")
 
+    def _write_image(self, file_path: str, image: np.ndarray) -> None:
+        """
+        按编码选项把图像交给文件写入器
+
+        Args:
+            file_path (str): 文件路径
+            image (np.ndarray): 图像数据（RGB顺序）
+        """
+        format_type = self.format_type
+        encoder = self.params.get("encoder", ENCODER_PIL)
+        png_compression = self.params.get("png_compression", None)
+        jpeg_quality = self.params.get("jpeg_quality", None)
+        webp_quality = self.params.get("webp_quality", None)
+        self.writer.submit(file_path, lambda: encode_image(
+            image, format_type, encoder,
+            png_compression=png_compression, jpeg_quality=jpeg_quality, webp_quality=webp_quality
+        ))
+
     def process_output(self, result: Any, port: Optional[str] = None) -> Any:
         """
         处理输出结果
@@ -1,22 +1,64 @@
 from typing import Any, Dict, Optional
 from .base_node import ComputeNode, NodeResult
 import os
+import io
 import json
+import threading
 import yaml
 import csv
+import numpy as np
 
-# 尝试导入 pandas 和 numpy
+# 尝试导入 pandas
 try:
     import pandas as pd
-    import numpy as np
     PANDAS_AVAILABLE = True
 except ImportError:
     PANDAS_AVAILABLE = False
 
+# 追加模式支持的格式
+APPEND_FORMATS = ("jsonl", "csv", "txt")
+# 追加模式文件的写缓冲区大小（字节）
+APPEND_BUFFER_SIZE = 1024 * 1024
+
+
+def _json_default(value: Any) -> Any:
+    """
+    JSON序列化遇到不支持的类型时调用，把NumPy数组和标量转换为Python原生类型
+
+    Args:
+        value (Any): 不支持直接序列化的对象
+
+    Returns:
+        Any: 可序列化的对象
+
+    Raises:
+        TypeError: 当对象不是NumPy类型时抛出异常
+    """
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# 单行JSON编码器，NumPy类型由default处理，不需要先递归复制整个数据
+_JSONL_ENCODER = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+
 class SaveTextfileNode(ComputeNode):
     """保存文本文件节点
     
     用于将输入数据写入文本文件
+
+    默认每次运行写入一个新文件（{filename}_{counter}.{format}），计数器在写入前占用，写入失败的调用同样占用一个序号，
+    因此输出文件的序号可能不连续。params中append为True时使用追加模式，
+    jsonl、csv、txt格式的数据逐行追加到同一个文件（{filename}_{part}.{format}），文件句柄在运行中保持打开并缓冲写入：
+    - max_items: 每个文件最多写入的调用次数，超过后换到下一个文件，0表示不限制，默认0
+    - max_bytes: 每个文件的最大字节数，超过后换到下一个文件，0表示不限制，默认0
+    - fsync: 工作流运行结束时是否fsync，默认False
+
+    追加模式下jsonl的列表数据每个元素一行，其他数据一行；csv的字典数据在每个文件开头写入一次表头。
+    缓冲的数据在工作流运行结束（完成或停止）和提交断点记录时写入文件。
     """
 
     def __init__(self, config: Dict, pipeline: Any) -> None:
@@ -36,13 +78,89 @@ class SaveTextfileNode(ComputeNode):
         self.format_type = self.params.get("format", "json")
         # 初始化计数器，用于确保多次调用时文件名不冲突
         self.counter = 0
+        # 计数器锁，并发模式下多个任务同时运行时保证计数器不重复
+        self.counter_lock = threading.Lock()
 
         # 确保输出目录存在
         self._ensure_dir_exists(self.output_path)
-         # 如果设置了清空目录，则在初始化时执行清空操作
+        # 如果设置了清空目录，则在首次写入前执行清空操作（从断点续跑时不清空）
         self.clear_dir = self.params.get("clear_dir", False)
-        if self.clear_dir:
-            self._clear_directory(self.output_path)
+        self.clear_pending = self.clear_dir
+
+        # 追加模式的状态，均由counter_lock保护
+        self.append = bool(self.params.get("append", False))
+        if self.append and self.format_type.lower() not in APPEND_FORMATS:
+            raise ValueError(f"保存文本文件节点追加模式只支持 {', '.join(APPEND_FORMATS)} 格式，当前为 {self.format_type}")
+        self.handle = None  # 当前追加文件的句柄
+        self.handle_path = None  # 当前追加文件的路径
+        self.part = 0  # 当前追加文件的序号
+        self.part_items = 0  # 当前文件已写入的调用次数
+        self.part_bytes = 0  # 当前文件已写入的字节数
+        self.csv_fieldnames = None  # 当前csv文件的表头
+        self.resume_part = False  # 从断点续跑时，当前文件截断到记录的字节数后继续追加
+
+    def reset(self) -> None:
+        """重置单次运行的状态，计数器归零，按需在首次写入前重新清空输出目录"""
+        super().reset()
+        with self.counter_lock:
+            self._close_handle()
+            self.counter = 0
+            self.part = 0
+            self.part_items = 0
+            self.part_bytes = 0
+            self.csv_fieldnames = None
+            self.resume_part = False
+        self._ensure_dir_exists(self.output_path)
+        self.clear_pending = self.clear_dir
+
+    def flush(self) -> None:
+        """把追加模式缓冲的数据写入文件，按需fsync"""
+        with self.counter_lock:
+            if self.handle is not None:
+                self.handle.flush()
+                if self.params.get("fsync", False):
+                    os.fsync(self.handle.fileno())
+
+    def close(self) -> None:
+        """关闭追加模式的文件句柄"""
+        with self.counter_lock:
+            self._close_handle()
+        super().close()
+
+    def checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取需要写入断点记录的状态
+
+        Returns:
+            Optional[Dict[str, Any]]: 计数器的当前值，续跑时据此继续编号，不覆盖已写入的文件；
+                追加模式下另含当前文件的序号、已写入的调用次数、字节数和csv表头
+        """
+        with self.counter_lock:
+            state = {"counter": self.counter}
+            if self.append:
+                state.update(part=self.part, part_items=self.part_items, part_bytes=self.part_bytes,
+                             csv_fieldnames=self.csv_fieldnames)
+            return state
+
+    def restore_checkpoint(self, state: Dict[str, Any]) -> None:
+        """
+        从断点记录恢复计数器，续跑时不清空输出目录
+
+        追加模式下当前文件在首次写入时截断到记录的字节数，丢弃上次提交之后写入的行（对应的输入会被重新处理）
+
+        Args:
+            state (Dict[str, Any]): checkpoint_state返回的状态
+        """
+        with self.counter_lock:
+            self.counter = state.get("counter", 0)
+            self.clear_pending = False
+            if self.append:
+                self._close_handle()
+                self.part = state.get("part", 0)
+                self.part_items = state.get("part_items", 0)
+                self.part_bytes = state.get("part_bytes", 0)
+                self.csv_fieldnames = state.get("csv_fieldnames", None)
+                self.resume_part = True
 
     def _convert_numpy_types(self, data):
         """
@@ -87,23 +205,32 @@ class SaveTextfileNode(ComputeNode):
             
             # 获取格式类型
             format_type = self.format_type.lower()
+
+            if self.append:
+                return NodeResult(self._append(filename, format_type, data), self)
+
+            # 预先占用计数器，确保下次调用时文件名不冲突；写入失败时该序号不回收
+            with self.counter_lock:
+                if self.clear_pending:
+                    self._clear_directory(self.output_path)
+                    self.clear_pending = False
+                counter = self.counter
+                self.counter += 1
             
             # 生成文件名：使用filename加上计数器和确定的文件后缀
-            file_name = f"{filename}_{self.counter}.{format_type}"
+            file_name = f"{filename}_{counter}.{format_type}"
             file_path = os.path.join(self.output_path, file_name)
 
             match format_type:
                 case "json":
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        # 转换 NumPy 类型为 Python 原生类型后再序列化
-                        converted_data = self._convert_numpy_types(data)
-                        json.dump(converted_data, f, ensure_ascii=False, indent=2)
+                        # NumPy 类型在序列化时由 default 转换为 Python 原生类型
+                        json.dump(data, f, ensure_ascii=False, indent=2, default=_json_default)
                 case "jsonl":
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        # 转换 NumPy 类型为 Python 原生类型后再序列化
-                        converted_data = self._convert_numpy_types(data)
-                        for item in converted_data:
-                            json.dump(item, f, ensure_ascii=False)
+                        # 列表数据每个元素一行，其他数据一行（与追加模式一致）
+                        for item in (data if isinstance(data, list) else [data]):
+                            f.write(_JSONL_ENCODER.encode(item))
                             f.write('\n')
                 case "yaml":
                     with open(file_path, 'w', encoding='utf-8') as f:
@@ -124,7 +251,9 @@ class SaveTextfileNode(ComputeNode):
                         elif PANDAS_AVAILABLE and isinstance(data, np.ndarray):
                             # 处理 numpy 数组
                             pd.DataFrame(data).to_csv(f, index=False, encoding='utf-8')
-                        elif isinstance(data, list):
+                        elif isinstance(data, list) or (isinstance(data, np.ndarray) and data.ndim > 0):
+                            # NumPy 数组先转换为列表，str() 会把超过1000个元素的数组省略为 ...
+                            data = self._convert_numpy_types(data)
                             if len(data) > 0 and isinstance(data[0], list):
                                 # 处理二维列表
                                 writer = csv.writer(f)
@@ -142,20 +271,131 @@ class SaveTextfileNode(ComputeNode):
                                     writer.writerow([item])
                         else:
                             # 其他类型转换为字符串
-                            f.write(str(data))
+                            f.write(str(self._convert_numpy_types(data)))
                 case "txt":
                     with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(str(data))
+                        # 转换 NumPy 类型后再转换为字符串，避免大数组被省略为 ...
+                        f.write(str(self._convert_numpy_types(data)))
                 case _:
-                    raise ValueError(f"TextfileOutputNode only supports 'json', 'yaml', 'csv' and 'txt' format type, got {format_type}")
-            
-            # 增加计数器，确保下次调用时文件名不冲突
-            self.counter += 1
+                    raise ValueError(f"TextfileOutputNode only supports 'json', 'jsonl', 'yaml', 'csv' and 'txt' format type "
+                                     f"('jsonl', 'csv' and 'txt' in append mode), got {format_type}")
             
             return NodeResult(file_path, self)
         except Exception as e:
             raise RuntimeError(f"节点 {self.id} 写入文件失败: {str(e)}")
 
+    def _append(self, filename: str, format_type: str, data: Any) -> str:
+        """
+        追加模式下把数据追加到当前文件，达到文件上限时换到下一个文件
+
+        Args:
+            filename (str): 文件名前缀
+            format_type (str): 文件格式（jsonl、csv或txt）
+            data (Any): 输入数据
+
+        Returns:
+            str: 写入的文件路径
+        """
+        max_items = int(self.params.get("max_items", 0) or 0)
+        max_bytes = int(self.params.get("max_bytes", 0) or 0)
+        with self.counter_lock:
+            if self.clear_pending:
+                self._close_handle()
+                self._clear_directory(self.output_path)
+                self.clear_pending = False
+            self.counter += 1
+            if self.handle is None:
+                self._open_part(filename, format_type)
+            if format_type == "csv":
+                text = self._format_csv(data, new_file=self.part_bytes == 0)
+            elif format_type == "jsonl":
+                items = data if isinstance(data, list) else [data]
+                text = "".join(_JSONL_ENCODER.encode(item) + "\n" for item in items)
+            else:
+                text = str(self._convert_numpy_types(data)) + "\n"
+            content = text.encode("utf-8")
+            self.handle.write(content)
+            self.part_items += 1
+            self.part_bytes += len(content)
+            file_path = self.handle_path
+            if (max_items > 0 and self.part_items >= max_items) or (max_bytes > 0 and self.part_bytes >= max_bytes):
+                # 当前文件已满，下次写入时打开下一个文件
+                self._close_handle()
+                self.part += 1
+                self.part_items = 0
+                self.part_bytes = 0
+                self.csv_fieldnames = None
+            return file_path
+
+    def _open_part(self, filename: str, format_type: str) -> None:
+        """
+        打开当前序号的追加文件，调用时需持有counter_lock
+
+        Args:
+            filename (str): 文件名前缀
+            format_type (str): 文件格式
+        """
+        file_path = os.path.join(self.output_path, f"{filename}_{self.part}.{format_type}")
+        if self.resume_part and os.path.exists(file_path):
+            # 从断点续跑：丢弃上次提交之后写入的内容，继续追加
+            os.truncate(file_path, self.part_bytes)
+            self.handle = open(file_path, 'ab', buffering=APPEND_BUFFER_SIZE)
+        else:
+            self.handle = open(file_path, 'wb', buffering=APPEND_BUFFER_SIZE)
+            self.part_items = 0
+            self.part_bytes = 0
+            self.csv_fieldnames = None
+        self.resume_part = False
+        self.handle_path = file_path
+
+    def _close_handle(self) -> None:
+        """关闭当前追加文件，调用时需持有counter_lock"""
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+            self.handle_path = None
+
+    def _format_csv(self, data: Any, new_file: bool) -> str:
+        """
+        把数据格式化为csv行
+
+        Args:
+            data (Any): 输入数据，支持字符串、DataFrame、Series、二维数组、字典、字典列表、二维列表和一维列表
+            new_file (bool): 是否为文件开头，字典数据在文件开头写入表头
+
+        Returns:
+            str: csv文本
+        """
+        if isinstance(data, str):
+            return data if data.endswith("\n") else data + "\n"
+        output = io.StringIO()
+        if PANDAS_AVAILABLE and isinstance(data, (pd.DataFrame, pd.Series)):
+            data.to_csv(output, index=False, header=new_file)
+            return output.getvalue()
+        if isinstance(data, dict):
+            data = [data]
+        writer = csv.writer(output)
+        if isinstance(data, np.ndarray):
+            writer.writerows(data.reshape(len(data), -1).tolist() if data.ndim > 0 else [[data.item()]])
+            return output.getvalue()
+        # NumPy 数组先转换为列表，csv模块用 str() 写入时会把超过1000个元素的数组省略为 ...
+        data = self._convert_numpy_types(data)
+        if isinstance(data, list) and len(data) > 0 and isinstance(data[0], dict):
+            if self.csv_fieldnames is None:
+                self.csv_fieldnames = list(data[0].keys())
+            dict_writer = csv.DictWriter(output, fieldnames=self.csv_fieldnames, restval="", extrasaction="ignore")
+            if new_file:
+                dict_writer.writeheader()
+            dict_writer.writerows(data)
+        elif isinstance(data, list) and len(data) > 0 and isinstance(data[0], (list, tuple)):
+            writer.writerows(data)
+        elif isinstance(data, list):
+            for item in data:
+                writer.writerow([item])
+        else:
+            writer.writerow([data])
+        return output.getvalue()
+
     def process_output(self, result: Any, port: Optional[str] = None) -> Any:
         """
         处理输出结果
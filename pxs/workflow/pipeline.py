@@ -1,16 +1,29 @@
 
 from typing import Any, Dict, Optional, Union, List, Set
 import importlib
-from collections import defaultdict
+import json
+from collections import defaultdict, deque
 import threading
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
+from concurrent.futures import ThreadPoolExecutor
 import time
 
 from paddlex.inference.utils.hpi import HPIConfig
 from paddlex.inference.utils.pp_option import PaddlePredictorOption
 from paddlex.inference.pipelines import BasePipeline
 from pxs.workflow.nodes.base_node import ComputeNode, ConstantNode, StreamNode
-from pxs.workflow.common.utils import parse_port
+from pxs.workflow.common.graph import compile_graph, PORT_PARAMS
+from pxs.workflow.common.stage import PipelineStage
+from pxs.workflow.common.model_registry import model_registry
+from pxs.workflow.common.profiler import WorkflowProfiler
+
+# 调度器事件类型，流式节点线程和线程池工作线程通过事件队列向主循环投递事件
+EVENT_STREAM_RESULT = "stream_result"  # 流式节点产生一条结果
+EVENT_STREAM_COMPLETE = "stream_complete"  # 流式节点线程正常结束
+EVENT_STREAM_ERROR = "stream_error"  # 流式节点线程发生异常
+EVENT_NODE_COMPLETE = "node_complete"  # 线程池中的常规节点运行完成
+EVENT_NODE_ERROR = "node_error"  # 线程池中的常规节点运行出错
+EVENT_STREAM_START = "stream_start"  # 流水线模式下请求主循环启动下游流式节点
 
 class WorkflowPipeline(BasePipeline):
     """Workflow Pipeline"""
@@ -25,6 +38,12 @@ class WorkflowPipeline(BasePipeline):
         use_hpip: bool = False,
         hpi_config: Optional[Union[Dict[str, Any], HPIConfig]] = None,
         max_executions: int = 0,
+        event_timeout: float = 0.5,
+        max_workers: int = 0,
+        pipelined: bool = False,
+        stage_queue_size: int = 8,
+        status_interval: float = 0.0,
+        status_delta: bool = False,
     ) -> None:
         """
         初始化工作流管道
@@ -37,6 +56,15 @@ class WorkflowPipeline(BasePipeline):
             hpi_config (Optional[Union[Dict[str, Any], HPIConfig]], optional):
                 高性能推理配置字典. Defaults to None
             max_executions (int, optional): 节点的最大执行次数，用于防止无限循环. Defaults to 0（不检查）
+            event_timeout (float, optional): 主循环等待事件队列的超时时间（秒），超时后检查退出信号. Defaults to 0.5
+            max_workers (int, optional): 并发执行常规节点的线程数，大于1时互不依赖的节点任务会提交到线程池并行运行. Defaults to 0（顺序执行）
+            pipelined (bool, optional): 是否使用流水线模式，每个运算节点作为独立阶段在自己的工作线程中运行，
+                阶段之间通过有界队列传递数据；此模式下max_workers为线程安全节点的每阶段线程数. Defaults to False
+            stage_queue_size (int, optional): 流水线模式下每个阶段输入队列的容量. Defaults to 8
+            status_interval (float, optional): 运行中状态的最小输出间隔（秒），间隔内的中间状态被合并，
+                准备中、完成、失败状态不受限制. Defaults to 0.0（不限制）
+            status_delta (bool, optional): 运行中状态是否只输出变化的字段（增量编码），
+                可用StatusAccumulator还原为完整状态. Defaults to False
         """
 
         super().__init__(
@@ -45,24 +73,77 @@ class WorkflowPipeline(BasePipeline):
         self.workflow_name = config.get("workflow_name", "Unnamed Workflow")
         self.config = config
         self.nodes = {}
+        self.node_signatures = {}  # 节点配置签名，再次运行时据此判断节点是否需要重建
+        self.prepare_info = None  # 最近一次运行的准备信息（冷/热启动、准备耗时、重建的节点）
+        self.profiler = None  # 节点性能统计，完成状态中以profile字段输出
         self.connections = {}
+        self.graph = None  # 编译后的工作流图（路由计划）
+        self.node_list = []  # 按graph节点索引排列的节点实例
         self.max_executions = max_executions
+        self.event_timeout = event_timeout
+        self.max_workers = max_workers
+        self.pipelined = pipelined
+        self.stage_queue_size = stage_queue_size
+        self.status_interval = status_interval
+        self.status_delta = status_delta
         
         # 类成员变量，用于工作流执行
-        self.execution_queue = []  # 执行队列，存储元组 (node_id, input_value, port)
+        self.execution_queue = deque()  # 执行队列，存储元组 (node_index, input_value, port, params)，params为参数快照或None
         self.ran_nodes = []  # 已运行的节点列表
         self.run_nodes = []  # 正在运行的节点列表
         self.run_connection = None  # 正在运行的连接列表
         self.start_time = 0  # 开始时间
         self.execution_count = {}  # 节点执行次数记录
         # 流式节点相关成员变量
-        self.stream_results_queue = Queue(maxsize=1000)  # 流式结果队列，设置最大容量为1000
+        self.event_queue = Queue(maxsize=1000)  # 调度器事件队列，存储元组 (event_type, node_index, payload)，设置最大容量为1000
         self.active_stream_nodes = set()  # 活动流式节点集合
-        self.exception_queue = Queue()  # 线程间通信的异常队列
         self.stream_threads = []  # 流式节点线程集合
+        self.stop_event = threading.Event()  # 停止标志，通知流式节点线程退出
+        self.draining = threading.Event()  # 停止前等待未完成任务时设置，流式节点不再交出新的结果
+        self.exit_event = None  # 外部退出信号（需提供is_set方法）
+        # 并发执行相关成员变量
+        self.executor = None  # 常规节点线程池（仅并发模式）
+        self.inflight_count = 0  # 已提交到线程池但尚未完成的任务数
+        self.busy_nodes = []  # 按节点索引记录正在线程池中运行的任务数
+        self.deferred_events = deque()  # 执行队列非空时暂缓处理的流式结果事件
+        self.stream_credits = None  # 流式结果许可，限制暂缓的流式结果数量（仅并发模式）
+        self.checkpoint = None  # 本次运行的断点续跑记录
+        self.stream_node_credits = {}  # 按流式节点索引保存的结果许可，限制节点尚未处理的结果数量
+        # 流水线模式相关成员变量
+        self.stages = None  # 按节点索引排列的流水线阶段，流式节点为None（仅流水线模式）
+        self.params_locks = None  # 按节点索引排列的参数锁，保护params连接的更新和快照（仅流水线模式）
+        self.pending_count = 0  # 已投递但主循环尚未确认完成的任务数
+        self.pending_lock = threading.Lock()
+        # 状态输出相关成员变量
+        self.last_status_time = 0.0  # 上一次输出运行中状态的时间
+        self.status_suppressed = False  # 是否有被限流合并、尚未输出的状态变化
+        self.sent_ran_count = 0  # 增量编码时已输出的ran_nodes数量
+        self.sent_run_nodes = None  # 增量编码时上一次输出的run_nodes
+        self.sent_connection = None  # 增量编码时上一次输出的run_connection
+
+    def update_config(self, config: Dict) -> None:
+        """
+        更新工作流配置，下次运行时只重建配置发生变化的节点
+
+        Args:
+            config (Dict): 新的工作流配置
+        """
+        self.workflow_name = config.get("workflow_name", "Unnamed Workflow")
+        self.config = config
 
     def initialize_nodes(self):
-        """初始化工作流中的所有节点"""
+        """
+        初始化工作流中的所有节点
+
+        已存在且配置未变化的节点直接复用（重置单次运行状态），模型等资源保持常驻；
+        新增或配置变化的节点重新创建，已删除的节点被释放。
+
+        Returns:
+            List[str]: 本次新创建的节点ID列表
+        """
+        nodes = {}
+        node_signatures = {}
+        rebuilt_nodes = []
         for node_config in self.config.get("nodes", []):
             node_type = node_config["type"]
             # 如果是备注类型节点，可以跳过导入
@@ -71,25 +152,52 @@ class WorkflowPipeline(BasePipeline):
             node_id = node_config["id"]
             node_data = node_config["data"]
             node_name = node_data.get("name", node_id)  # 如果没有name，使用id作为name
-            node_params = node_data.get("params", {})
+            # 复制参数字典，节点初始化时补充的默认参数不会写回工作流配置
+            node_params = dict(node_data.get("params", {}))
             node_config = {
                 "id":node_id,
                 "type":node_type,
                 "name":node_name,
                 "params":node_params
             }
+            signature = json.dumps(node_config, sort_keys=True, ensure_ascii=False, default=str)
+
+            # 配置未变化的节点直接复用
+            node = self.nodes.get(node_id)
+            if node is not None and self.node_signatures.get(node_id) == signature:
+                node.reset()
+                nodes[node_id] = node
+                node_signatures[node_id] = signature
+                continue
 
             # 根据节点类型动态导入节点类
             try:
                 node_module = importlib.import_module(f"pxs.workflow.nodes.{node_type}")
                 node_class = getattr(node_module, f"{''.join(word.capitalize() for word in node_type.split('_'))}Node")
                 node = node_class(node_config, self)
-                self.nodes[node_id] = node
+                nodes[node_id] = node
+                node_signatures[node_id] = signature
+                rebuilt_nodes.append(node_id)
             except (ImportError, AttributeError) as e:
                 raise ValueError(f"Failed to initialize node {node_id}: {str(e)}")
+        # 新节点创建完成后再关闭被替换或删除的节点，相同模型可直接从共享模型注册表命中
+        for node_id, node in self.nodes.items():
+            if nodes.get(node_id) is not node:
+                node.close()
+        self.nodes = nodes
+        self.node_signatures = node_signatures
+        return rebuilt_nodes
+
+    def close(self) -> None:
+        """关闭所有节点并释放其占用的资源（如共享模型）"""
+        for node in self.nodes.values():
+            node.close()
+        self.nodes = {}
+        self.node_signatures = {}
 
     def initialize_connections(self):
         """初始化节点之间的连接"""
+        self.connections = {}
         # 从edges初始化连接
         edges = self.config.get("edges", [])
         
@@ -110,6 +218,11 @@ class WorkflowPipeline(BasePipeline):
                 "to_port": to_port
             })
 
+    def initialize_graph(self):
+        """将节点与连接编译为不可变的路由计划，调度主循环只按节点索引访问"""
+        self.graph = compile_graph(self.nodes, self.config.get("edges", []))
+        self.node_list = [self.nodes[node_id] for node_id in self.graph.node_ids]
+
     def _is_constant_node(self, node, error_msg):
         """
         检查节点是否为常量节点
@@ -127,31 +240,86 @@ class WorkflowPipeline(BasePipeline):
         """
         创建状态更新对象
 
+        运行中状态受status_interval限流，限流期间返回None（调用方照常yield，由predict过滤），
+        状态变化会合并到下一次输出中；准备中、完成、失败状态总是完整输出。
+
         Args:
             status: 当前状态
             error: 错误信息（可选）
 
         Returns:
-            dict: 状态更新对象
+            dict: 状态更新对象，被限流时为None
         """
+        if status == '运行中' and self.status_interval > 0:
+            now = time.perf_counter()
+            if now - self.last_status_time < self.status_interval:
+                self.status_suppressed = True
+                return None
+            self.last_status_time = now
+        self.status_suppressed = False
+
         elapsed_time = time.time() - self.start_time
-        rans=[]
-        for node_id in self.ran_nodes:
-            rans.append(node_id)
-        runs=[]
-        for node_id in self.run_nodes:
-            runs.append(node_id)
+        rans = list(self.ran_nodes)
+        runs = list(self.run_nodes)
+        if self.stages is not None:
+            # 流水线模式下常规节点在各自阶段的工作线程中运行，正在运行的节点由阶段统计得出
+            runs.extend(stage.node_id for stage in self.stages if stage is not None and stage.busy > 0)
         update = {
             'ran_nodes': rans,
             'run_nodes':runs,
             'run_connection':self.run_connection,
             'status': status,
             'elapsed_time': elapsed_time,
-            'stream_queue_size': self.stream_results_queue.qsize()
+            'stream_queue_size': self.event_queue.qsize()
         }
+        if self.stages is not None:
+            update['stages'] = {
+                stage.node_id: stage.snapshot(elapsed_time) for stage in self.stages if stage is not None
+            }
+        if status == '完成' and self.profiler is not None:
+            update['profile'] = self.profiler.report()
         if error is not None:
             update['error'] = error
+        if self.status_delta and status == '运行中':
+            return self._encode_delta(update)
+        self.sent_ran_count = len(rans)
+        self.sent_run_nodes = runs
+        self.sent_connection = self.run_connection
         return update
+
+    def _encode_delta(self, update):
+        """
+        将完整状态编码为增量状态，只保留相对上一次输出发生变化的字段
+
+        - ran_nodes只增不减，增量状态中以ran_nodes_added给出新增的节点
+        - run_nodes、run_connection未变化时省略
+        - status、elapsed_time、stream_queue_size、stages总是保留
+
+        Args:
+            update: 完整状态
+
+        Returns:
+            dict: 增量状态，包含'delta': True
+        """
+        delta = {
+            'delta': True,
+            'status': update['status'],
+            'elapsed_time': update['elapsed_time'],
+            'stream_queue_size': update['stream_queue_size'],
+        }
+        ran_nodes = update['ran_nodes']
+        if len(ran_nodes) > self.sent_ran_count:
+            delta['ran_nodes_added'] = ran_nodes[self.sent_ran_count:]
+            self.sent_ran_count = len(ran_nodes)
+        if update['run_nodes'] != self.sent_run_nodes:
+            delta['run_nodes'] = update['run_nodes']
+            self.sent_run_nodes = update['run_nodes']
+        if update['run_connection'] != self.sent_connection:
+            delta['run_connection'] = update['run_connection']
+            self.sent_connection = update['run_connection']
+        if 'stages' in update:
+            delta['stages'] = update['stages']
+        return delta
         
     def _process_constant_nodes(self):
         """
@@ -160,82 +328,151 @@ class WorkflowPipeline(BasePipeline):
         Yields:
             dict: 状态更新信息
         """
-        for node_id, node in self.nodes.items():
-            if isinstance(node, ConstantNode):
-                try:
-                    # 添加到正在运行的节点数组
-                    self.run_nodes.append(node_id)
-                    yield self._create_status_update('运行中')
-                    
-                    node_result = node.run()
-                    self.execution_count[node_id] += 1
-                    self.ran_nodes = [node_id for node_id, count in self.execution_count.items() if count > 0]
-                    
-                    # 传递常量节点结果到下一个节点
-                    if node_id in self.connections:
-                        for conn in self.connections[node_id]:
-                            self.run_connection = conn["id"]
-                            yield self._create_status_update('运行中')
-                            from_port = conn["from_port"]
-                            to_node = conn["to_node"]
-                            to_port = conn["to_port"]
-                            
-                            if to_node in self.nodes:
-                                # 使用parse_port函数分解port
-                                port_type, port_name = parse_port(to_port)
-                                if port_type == 'params':
-                                    # 如果是params类型，立即调用set_params
-                                    self.nodes[to_node].set_params(port_name, node_result.get(from_port))
-                                elif port_type == 'inputs':
-                                    # 如果是inputs类型，直接添加到执行队列
-                                    execution_queue_item = (to_node, node_result.get(from_port), port_name)
-                                    self.execution_queue.append(execution_queue_item)
-                                else:
-                                    # 未知端口类型，返回错误
-                                    yield self._create_status_update('失败', f"常量节点 {node_id} 连接到未知端口类型 {port_type}")
-                                    return
-                        self.run_connection = None
-                    # 从正在运行的节点数组中移除
-                    self.run_nodes.remove(node_id)
-                    yield self._create_status_update('运行中')
-                    
-                except Exception as e:
-                    # 如果出错，从正在运行的节点数组中移除
-                    if node_id in self.run_nodes:
-                        self.run_nodes.remove(node_id)
-                    yield self._create_status_update('失败', f"处理常量节点 {node_id} 时发生错误: {str(e)}")
+        for node_index in self.graph.constant_indices:
+            node_id = self.graph.node_ids[node_index]
+            node = self.node_list[node_index]
+            try:
+                # 添加到正在运行的节点数组
+                self.run_nodes.append(node_id)
+                yield self._create_status_update('运行中')
+                
+                node_result = self._run_node(node_index)
+                self._count_execution(node_id)
+                
+                # 传递常量节点结果到下一个节点
+                if not (yield from self._route_result(node_index, node_result)):
                     return
+                # 从正在运行的节点数组中移除
+                self.run_nodes.remove(node_id)
+                yield self._create_status_update('运行中')
+                
+            except Exception as e:
+                # 如果出错，从正在运行的节点数组中移除
+                if node_id in self.run_nodes:
+                    self.run_nodes.remove(node_id)
+                yield self._create_status_update('失败', f"处理常量节点 {node_id} 时发生错误: {str(e)}")
+                return
         
         return
         
     def _find_entry_nodes(self):
         """
-        查找工作流的入口节点
+        将编译时确定的入口节点加入执行队列
 
         Returns:
             bool: 是否找到入口节点
         """
-        # 获取所有有入边的节点
-        nodes_with_incoming = set()
-        for from_node, conns in self.connections.items():
-            for conn in conns:
-                if conn["to_node"] in self.nodes:
-                    nodes_with_incoming.add(conn["to_node"])
-                
-        # 查找没有入边的节点作为入口
-        for node_id, node in self.nodes.items():
-            # 跳过常量节点
-            if isinstance(node, ConstantNode):
-                continue
-            
-            # 检查节点是否没有入边
-            if node_id not in nodes_with_incoming:
-                # 无需查找输入端口，直接设为None，因为入口节点无需输入值
-                self.execution_queue.append((node_id, None, None))
+        for node_index in self.graph.entry_indices:
+            # 无需查找输入端口，直接设为None，因为入口节点无需输入值
+            self.execution_queue.append((node_index, None, None, None))
         
         return len(self.execution_queue) > 0
+
+    def _route_result(self, node_index, node_result, skip_none=False):
+        """
+        按编译后的路由计划分发节点结果
+
+        同一输出端口的结果只取值一次。先对params类型连接调用set_params，再把inputs类型连接加入主执行队列，
+        有params入边的目标节点同时捕获其当前参数作为该条数据的参数快照：并发模式下任务开始运行时，
+        节点参数可能已被后续结果的params连接修改，运行时使用快照保证数据与参数一一对应
+
+        Args:
+            node_index: 源节点索引
+            node_result: 源节点运行结果
+            skip_none: 输出端口结果为None时是否跳过该端口的连接
+
+        Yields:
+            dict: 状态更新信息
+
+        Returns:
+            bool: 是否分发成功
+        """
+        inputs = []
+        for fanout in self.graph.fanouts[node_index]:
+            value = None
+            fetched = False
+            for route in fanout.routes:
+                self.run_connection = route.conn_id
+                yield self._create_status_update('运行中')
+                if not fetched:
+                    value = self._fetch_output(node_index, node_result, fanout.from_port_name)
+                    fetched = True
+                if value is None and skip_none:
+                    continue
+                if route.port_type == PORT_PARAMS:
+                    # 如果是params类型，立即调用set_params
+                    try:
+                        self.node_list[route.to_index].set_params(route.port_name, value)
+                    except Exception as e:
+                        # 从正在运行的连接数组中移除
+                        self.run_connection = None
+                        yield self._create_status_update('失败', f"设置节点 {route.to_node} 参数时发生错误: {str(e)}")
+                        return False
+                else:
+                    inputs.append((route, value))
+        # inputs类型连接在本结果的所有params连接生效后加入主执行队列
+        for route, value in inputs:
+            params = self.node_list[route.to_index].params if route.to_index in self.graph.params_targets else None
+            self.execution_queue.append((route.to_index, value, route.port_name, params))
+        self.run_connection = None
+        return True
         
-    def _process_stream_result(self, items):
+    def _process_event(self, event):
+        """
+        处理调度器事件队列中的一个事件
+
+        Args:
+            event: 事件元组 (event_type, node_index, payload)
+
+        Yields:
+            dict: 状态更新信息
+        """
+        event_type, node_index, payload = event
+        if event_type == EVENT_NODE_COMPLETE:
+            yield from self._process_node_complete(node_index, payload)
+        elif event_type == EVENT_NODE_ERROR:
+            self.busy_nodes[node_index] -= 1
+            self.inflight_count -= 1
+            yield from self._fail_node(node_index, payload)
+        elif event_type == EVENT_STREAM_RESULT:
+            self._release_stream_credit(node_index)
+            yield from self._process_stream_result(node_index, payload)
+            if self.checkpoint is not None:
+                self.checkpoint.handed(self.node_list[node_index].checkpoint_key(payload))
+        elif event_type == EVENT_STREAM_COMPLETE:
+            yield from self._process_stream_complete(node_index)
+        elif event_type == EVENT_STREAM_ERROR:
+            node_id = self.graph.node_ids[node_index]
+            self.active_stream_nodes.discard(node_id)
+            # 从正在运行的节点数组中移除
+            if node_id in self.run_nodes:
+                self.run_nodes.remove(node_id)
+            yield self._create_status_update('失败', f"流式节点 {node_id} 执行出错: {str(payload)}")
+        else:
+            yield self._create_status_update('失败', f"未知调度事件类型 {event_type}")
+
+    def _process_stream_complete(self, node_index):
+        """
+        处理流式节点线程完成事件
+
+        Args:
+            node_index: 流式节点索引
+
+        Yields:
+            dict: 状态更新信息
+        """
+        node_id = self.graph.node_ids[node_index]
+        # 从活动流式节点集合中移除
+        self.active_stream_nodes.discard(node_id)
+        # 从正在运行的节点数组中移除
+        if node_id in self.run_nodes:
+            self.run_nodes.remove(node_id)
+        # 流式节点执行完成时设置execution_count，与非流式节点逻辑一致
+        self._count_execution(node_id)
+        # 输出状态更新 - 流式节点完成
+        yield self._create_status_update('运行中')
+
+    def _process_stream_result(self, node_index, stream_result):
         """
         处理流式节点的结果
 
@@ -244,117 +481,49 @@ class WorkflowPipeline(BasePipeline):
         - yield只用于返回状态更新信息，不再返回队列项
 
         Args:
-            items: 流式结果项
+            node_index: 流式节点索引
+            stream_result: 流式节点产生的一条结果
 
         Yields:
             dict: 状态更新信息
         """
-        # 处理特殊的线程完成标记
-        if len(items) == 3 and items[2] == 'thread_complete':
-            node_id = items[0]
-            # 从活动流式节点集合中移除
-            self.active_stream_nodes.discard(node_id)
-            # 从正在运行的节点数组中移除
-            if node_id in self.run_nodes:
-                self.run_nodes.remove(node_id)
-            # 流式节点执行完成时设置execution_count，与非流式节点逻辑一致
-            if node_id not in self.execution_count:
-                self.execution_count[node_id] = 0
-            if self.max_executions > 0:
-                self.execution_count[node_id] += 1
-            else:
-                self.execution_count[node_id] = 1
-            # 更新执行过的节点列表
-            self.ran_nodes = [nid for nid, count in self.execution_count.items() if count > 0]
-            # 输出状态更新 - 流式节点完成
-            status_update = self._create_status_update('运行中')
-            # 标记任务完成
-            self.stream_results_queue.task_done()
-            
-            # 只yield状态更新信息
-            yield status_update
-            return
-        
-        stream_node_id, stream_result = items
-        
+        stream_node_id = self.graph.node_ids[node_index]
         try:
             # 处理每条流式输出的连接
-            if stream_node_id in self.connections:
-                for conn in self.connections[stream_node_id]:
-                    self.run_connection = conn["id"]
-                    yield self._create_status_update('运行中')
-                    from_port = conn["from_port"]
-                    to_node = conn["to_node"]
-                    to_port = conn["to_port"]
-
-                    if to_node in self.nodes:
-                        port_type, port_name = parse_port(to_port)
-                        if port_type == 'params':
-                            # 如果是params类型，立即调用set_params
-                            try:
-                                self.nodes[to_node].set_params(port_name, stream_result.get(from_port))
-                            except Exception as e:
-                                # 从正在运行的节点数组中移除
-                                self.run_connection = None
-                                if stream_node_id in self.run_nodes:
-                                    self.run_nodes.remove(stream_node_id)
-                                error_update = self._create_status_update('失败', f"设置节点 {to_node} 参数时发生错误: {str(e)}")
-                                self.stream_results_queue.task_done()
-                                yield error_update
-                                return
-                        elif port_type == 'inputs':
-                            # 如果是inputs类型，直接操作execution_queue
-                            queue_item = (to_node, stream_result.get(from_port), port_name)
-                            self.execution_queue.append(queue_item)
-                        else:
-                            # 未知端口类型，返回错误
-                            # 从正在运行的节点数组中移除
-                            self.run_connection = None
-                            if stream_node_id in self.run_nodes:
-                                self.run_nodes.remove(stream_node_id)
-                            error_update = self._create_status_update('失败', f"未知端口类型 {port_type}")
-                            self.stream_results_queue.task_done()
-                            yield error_update
-                            return
-                    self.run_connection = None
-            
-            # 标记任务完成
-            self.stream_results_queue.task_done()
-            
+            if not (yield from self._route_result(node_index, stream_result)):
+                # 从正在运行的节点数组中移除
+                if stream_node_id in self.run_nodes:
+                    self.run_nodes.remove(stream_node_id)
+                return
+
             # 输出状态更新 - 流式节点产生新结果
-            self.ran_nodes = [node_id for node_id, count in self.execution_count.items() if count > 0]
-            status_update = self._create_status_update('运行中')
-            
-            # 只yield状态更新信息
-            yield status_update
+            yield self._create_status_update('运行中')
             return
         except Exception as e:
             # 捕获异常并处理
             if stream_node_id in self.run_nodes:
                 self.run_nodes.remove(stream_node_id)
-            error_update = self._create_status_update('失败', f"处理流式节点 {stream_node_id} 结果时发生错误: {str(e)}")
-            self.stream_results_queue.task_done()
-            yield error_update
+            yield self._create_status_update('失败', f"处理流式节点 {stream_node_id} 结果时发生错误: {str(e)}")
             return
 
-    def _process_regular_node(self, current_node_id, input_value, port):
+    def _start_node(self, node_index, input_value, port, params=None):
         """
-        处理常规节点（非流式节点）的执行和结果处理
+        开始执行常规节点：记录运行状态、检查最大执行次数，流式节点在此启动工作线程
 
         Args:
-            current_node_id: 当前执行的节点ID
+            node_index: 节点索引
             input_value: 输入值
             port: 输入端口
+            params: 参数快照，流式节点在工作线程中使用，为None时使用节点的当前参数
 
         Yields:
             dict: 状态更新信息
+
+        Returns:
+            bool: 是否需要继续调用节点的run方法（流式节点或跳过执行时返回False）
         """
-        # 检查节点是否存在
-        if current_node_id not in self.nodes:
-            yield self._create_status_update('失败', f"节点 {current_node_id} 不存在于工作流中")
-            return
-        
-        current_node = self.nodes[current_node_id]
+        current_node_id = self.graph.node_ids[node_index]
+        current_node = self.node_list[node_index]
         
         # 确保当前节点在execution_count中，初始化为0
         if current_node_id not in self.execution_count:
@@ -371,118 +540,819 @@ class WorkflowPipeline(BasePipeline):
             # 从正在运行的节点数组中移除
             self.run_nodes.remove(current_node_id)
             # 输出状态更新 - 节点跳过执行
-            self.ran_nodes = [node_id for node_id, count in self.execution_count.items() if count > 0]
             yield self._create_status_update('运行中')
-            return
+            return False
+
+        # 检查节点是否为流式节点
+        if isinstance(current_node, StreamNode):
+            # 标记为活动流式节点
+            self.active_stream_nodes.add(current_node_id)
+            current_node.checkpoint = self.checkpoint
+            if current_node.max_pending_results and node_index not in self.stream_node_credits:
+                self.stream_node_credits[node_index] = threading.Semaphore(current_node.max_pending_results)
+            # 创建并启动线程
+            thread = threading.Thread(
+                target=self._stream_node_worker,  # 使用内部方法
+                args=(node_index, current_node, port, input_value, params),
+                daemon=True
+            )
+            self.stream_threads.append(thread)
+            thread.start()
+            return False
+        return True
+
+    def _count_execution(self, node_id, count=1):
+        """
+        记录节点执行次数，节点首次执行时加入已运行节点列表（增量维护ran_nodes）
+
+        Args:
+            node_id: 节点ID
+            count: 本次执行的次数
+        """
+        previous = self.execution_count.get(node_id, 0)
+        # 用户指定的逻辑：max_executions>0时增加计数，max_executions=0时永远设为1
+        if self.max_executions > 0:
+            self.execution_count[node_id] = previous + count
+        else:
+            self.execution_count[node_id] = 1
+        if previous == 0:
+            self.ran_nodes.append(node_id)
+
+    def _finish_node(self, node_index, node_result):
+        """
+        完成常规节点的执行：更新执行次数与运行状态，并分发节点结果
+
+        Args:
+            node_index: 节点索引
+            node_result: 节点运行结果
+
+        Yields:
+            dict: 状态更新信息
+        """
+        current_node_id = self.graph.node_ids[node_index]
+        self._count_execution(current_node_id)
+        
+        # 从正在运行的节点数组中移除
+        self.run_nodes.remove(current_node_id)
+        
+        # 处理节点运行结果
+        if node_result is not None:
+            # 输出状态更新 - 节点完成执行
+            yield self._create_status_update('运行中')
+            
+            # 处理节点的输出连接，输出为None的端口不向下游传递
+            if self.graph.fanouts[node_index]:
+                if not (yield from self._route_result(node_index, node_result, skip_none=True)):
+                    return
+                yield self._create_status_update('运行中')
+        else:
+            # 节点没有返回结果
+            yield self._create_status_update('运行中')
+
+    def _fail_node(self, node_index, error):
+        """
+        节点执行出错时输出失败状态
 
+        Args:
+            node_index: 节点索引
+            error: 异常对象
+
+        Yields:
+            dict: 状态更新信息
+        """
+        current_node_id = self.graph.node_ids[node_index]
+        # 从正在运行的节点数组中移除
+        if current_node_id in self.run_nodes:
+            self.run_nodes.remove(current_node_id)
+        yield self._create_status_update('失败', f"节点 {current_node_id} 执行出错: {str(error)}")
+
+    def _process_regular_node(self, node_index, input_value, port, params=None):
+        """
+        处理常规节点（非流式节点）的执行和结果处理，在主线程中顺序执行
+
+        Args:
+            node_index: 当前执行的节点索引
+            input_value: 输入值
+            port: 输入端口
+            params: 参数快照，为None时使用节点的当前参数
+
+        Yields:
+            dict: 状态更新信息
+        """
         try:
-            # 检查节点是否为流式节点
-            if isinstance(current_node, StreamNode):
-                # 标记为活动流式节点
-                self.active_stream_nodes.add(current_node_id)
-                # 创建并启动线程
-                thread = threading.Thread(
-                    target=self._stream_node_worker,  # 使用内部方法
-                    args=(current_node_id, current_node, port, input_value),
-                    daemon=True
-                )
-                self.stream_threads.append(thread)
-                thread.start()
+            if not (yield from self._start_node(node_index, input_value, port, params)):
                 return
-            else:
-                # 非流式节点，使用标准run方法
-                node_result = current_node.run(port, input_value)
-                # 用户指定的逻辑：max_executions>0时增加计数，max_executions=0时永远设为1
-                if self.max_executions > 0:
-                    self.execution_count[current_node_id] += 1
-                else:
-                    self.execution_count[current_node_id] = 1
-                
-                # 从正在运行的节点数组中移除
-                self.run_nodes.remove(current_node_id)
-                
-                # 处理节点运行结果
-                if node_result is not None:
-                    # 输出状态更新 - 节点完成执行
-                    self.ran_nodes = [node_id for node_id, count in self.execution_count.items() if count > 0]
-                    yield self._create_status_update('运行中')
-                    
-                    # 处理节点的输出连接
-                    if current_node_id in self.connections:
-                        for conn in self.connections[current_node_id]:
-                            self.run_connection = conn["id"]
-                            yield self._create_status_update('运行中')
-                            from_port = conn["from_port"]
-                            to_node = conn["to_node"]
-                            to_port = conn["to_port"]
-                            value = node_result.get(from_port)
-                            if value is None:
-                                continue
-                            if to_node in self.nodes:
-                                # 使用parse_port函数分解port
-                                port_type, port_name = parse_port(to_port)
-                                if port_type == 'params':
-                                    # 如果是params类型，立即调用set_params
-                                    try:
-                                        self.nodes[to_node].set_params(port_name, node_result.get(from_port))
-                                    except Exception as e:
-                                        # 从正在运行的连接数组中移除
-                                        self.run_connection = None
-                                        yield self._create_status_update('失败', f"设置节点 {to_node} 参数时发生错误: {str(e)}")
-                                        return
-                                elif port_type == 'inputs':
-                                    # 如果是inputs类型，加入主执行队列
-                                    self.execution_queue.append((to_node, node_result.get(from_port), port_name))
-                                else:
-                                    # 未知端口类型，返回错误
-                                    # 从正在运行的连接数组中移除
-                                    self.run_connection = None
-                                    yield self._create_status_update('失败', f"未知端口类型 {port_type}")
-                                    return
-                                    # 从正在运行的连接数组中移除
-                        self.run_connection = None
-                        yield self._create_status_update('运行中')
-                else:
-                    # 节点没有返回结果
-                    self.ran_nodes = [node_id for node_id, count in self.execution_count.items() if count > 0]
-                    yield self._create_status_update('运行中')
-                    return
+            # 非流式节点，使用标准run方法
+            node_result = self._run_node(node_index, port, input_value, params)
+            yield from self._finish_node(node_index, node_result)
         except Exception as e:
             # 节点执行错误
-            # 从正在运行的节点数组中移除
-            if current_node_id in self.run_nodes:
-                self.run_nodes.remove(current_node_id)
-            yield self._create_status_update('失败', f"节点 {current_node_id} 执行出错: {str(e)}")
+            yield from self._fail_node(node_index, e)
+
+    def _run_node(self, node_index, port=None, input_value=None, params=None):
+        """
+        运行常规节点并记录耗时
+
+        Args:
+            node_index: 节点索引
+            port: 输入端口（常量节点为None）
+            input_value: 输入值（常量节点为None）
+            params: 参数快照，为None时使用节点的当前参数
+
+        Returns:
+            NodeResult: 节点运行结果
+        """
+        node = self.node_list[node_index]
+        start = time.perf_counter()
+        if isinstance(node, ConstantNode):
+            node_result = node.run()
+        else:
+            with node.use_params(params):
+                node_result = node.run(port, input_value)
+        self.profiler.nodes[node_index].record_run(time.perf_counter() - start)
+        return node_result
+
+    def _fetch_output(self, node_index, node_result, port_name):
+        """
+        获取节点结果指定输出端口的数据，记录process_output耗时和输出数据量
+
+        Args:
+            node_index: 节点索引
+            node_result: 节点运行结果
+            port_name: 输出端口名称
+
+        Returns:
+            Any: 输出端口的数据
+        """
+        start = time.perf_counter()
+        value = node_result.get_output(port_name)
+        self.profiler.nodes[node_index].record_output(time.perf_counter() - start, value)
+        return value
+
+    def _submit_ready_nodes(self):
+        """
+        并发模式下将执行队列中可运行的节点提交到线程池
+
+        同一个thread_safe为False的节点同一时刻只会有一个任务在运行，
+        其余任务保留在执行队列中按原顺序等待
+
+        Yields:
+            dict: 状态更新信息
+        """
+        waiting = deque()
+        while self.execution_queue and self.inflight_count < self.max_workers:
+            node_index, input_value, port, params = self.execution_queue.popleft()
+            node = self.node_list[node_index]
+            if not node.thread_safe and self.busy_nodes[node_index]:
+                waiting.append((node_index, input_value, port, params))
+                continue
+            try:
+                if not (yield from self._start_node(node_index, input_value, port, params)):
+                    continue
+                self.busy_nodes[node_index] += 1
+                self.inflight_count += 1
+                # 任务使用分发时捕获的参数快照，不受之后的params连接影响
+                self.executor.submit(self._node_worker, node_index, port, input_value, params)
+            except Exception as e:
+                yield from self._fail_node(node_index, e)
+                return
+        # 被跳过的任务放回执行队列头部，保持原有顺序
+        self.execution_queue.extendleft(reversed(waiting))
+
+    def _node_worker(self, node_index, port, input_value, params=None):
+        """
+        线程池中运行常规节点的工作函数，运行结果作为事件投递给主循环
+
+        Args:
+            node_index: 节点索引
+            port: 输入端口
+            input_value: 输入值
+            params: 参数快照，为None时使用节点的当前参数
+        """
+        try:
+            node_result = self._run_node(node_index, port, input_value, params)
+        except Exception as e:
+            self._post_event(EVENT_NODE_ERROR, node_index, e)
             return
+        self._post_event(EVENT_NODE_COMPLETE, node_index, node_result)
+
+    def _process_node_complete(self, node_index, node_result):
+        """
+        处理线程池中节点运行完成事件
+
+        Args:
+            node_index: 节点索引
+            node_result: 节点运行结果
 
-    def _stream_node_worker(self, node_id, node, port, input_value):
+        Yields:
+            dict: 状态更新信息
+        """
+        self.busy_nodes[node_index] -= 1
+        self.inflight_count -= 1
+        try:
+            yield from self._finish_node(node_index, node_result)
+        except Exception as e:
+            yield from self._fail_node(node_index, e)
+
+    def _post_event(self, event_type, node_index, payload=None):
+        """
+        向调度器事件队列投递事件
+
+        队列已满时阻塞等待，但会定期检查停止标志，避免主循环退出后工作线程永久阻塞
+
+        Args:
+            event_type: 事件类型
+            node_index: 节点索引
+            payload: 事件数据
+
+        Returns:
+            bool: 是否投递成功（收到停止信号时返回False）
+        """
+        while not self.stop_event.is_set():
+            try:
+                self.event_queue.put((event_type, node_index, payload), timeout=self.event_timeout)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _acquire_stream_credit(self, node_index):
+        """
+        获取流式结果许可，主循环处理完该结果后归还
+
+        - 并发模式下主循环在执行队列非空时会暂缓处理流式结果，
+          全局许可数限制了暂缓结果的数量，使流式节点不会无限制地领先于下游节点
+        - 节点设置了max_pending_results时，另外限制该节点尚未被主循环处理的结果数量
+
+        Args:
+            node_index: 流式节点索引
+
+        Returns:
+            bool: 是否获取成功（收到停止信号时返回False）
+        """
+        for credits in (self.stream_node_credits.get(node_index), self.stream_credits):
+            if credits is None:
+                continue
+            while True:
+                if self.stop_event.is_set():
+                    return False
+                if credits.acquire(timeout=self.event_timeout):
+                    break
+        return True
+
+    def _release_stream_credit(self, node_index):
+        """
+        归还流式结果许可
+
+        Args:
+            node_index: 流式节点索引
+        """
+        node_credits = self.stream_node_credits.get(node_index)
+        if node_credits is not None:
+            node_credits.release()
+        if self.stream_credits is not None:
+            self.stream_credits.release()
+
+    def _stream_node_worker(self, node_index, node, port, input_value, params=None):
         """
         流式节点的工作线程函数
 
         Args:
-            node_id: 节点ID
+            node_index: 节点索引
+            node: 节点实例
+            port: 输入端口
+            input_value: 输入值
+            params: 参数快照，为None时使用节点的当前参数
+        """
+        with node.use_params(params):
+            self._run_stream_node(node_index, node, port, input_value)
+
+    def _run_stream_node(self, node_index, node, port, input_value):
+        """
+        在流式节点工作线程中遍历节点的流式输出并投递给主循环或下游阶段
+
+        Args:
+            node_index: 节点索引
             node: 节点实例
             port: 输入端口
             input_value: 输入值
         """
+        profile = self.profiler.nodes[node_index]
         try:
-            # 遍历流式输出的每条结果
+            # 遍历流式输出的每条结果，每条结果作为事件投递给主循环
+            start = time.perf_counter()
             for stream_result in node._stream_output(port, input_value):
-                # 将每条流式结果放入stream_results_queue
-                self.stream_results_queue.put((node_id, stream_result))
-            
-            # 线程完成时，从run_nodes中移除节点（通过结果队列传递）
-            self.stream_results_queue.put((node_id, None, 'thread_complete'))
+                # 流式节点每条结果的耗时为生成该结果所用的时间（不含向下游投递的时间）
+                profile.record_run(time.perf_counter() - start, 0)
+                if self.checkpoint is not None:
+                    # 到了断点提交时间时暂停投递，等待调度器处理完已交出的结果并提交
+                    self.checkpoint.wait_commit(self.stop_event, self.event_timeout)
+                if self.stages is not None:
+                    # 投递期间占用一个未完成任务计数，停止时主循环等待投递完成后再提交断点记录
+                    with self.pending_lock:
+                        self.pending_count += 1
+                    try:
+                        if self.draining.is_set():
+                            return
+                        # 流水线模式下直接投递到下游阶段队列，队列满时阻塞（背压）
+                        self._route_to_stages(node_index, stream_result)
+                        if self.stop_event.is_set():
+                            return
+                        if self.checkpoint is not None:
+                            self.checkpoint.handed(node.checkpoint_key(stream_result))
+                    finally:
+                        self._release_pending()
+                    start = time.perf_counter()
+                    continue
+                if self.draining.is_set():
+                    return
+                if not self._acquire_stream_credit(node_index):
+                    return
+                if not self._post_event(EVENT_STREAM_RESULT, node_index, stream_result):
+                    return
+                start = time.perf_counter()
+
+            # 线程完成时投递完成事件，由主循环从run_nodes中移除节点
+            self._post_event(EVENT_STREAM_COMPLETE, node_index)
         except Exception as e:
-            # 将异常放入队列而不是直接抛出
-            self.exception_queue.put((node_id, e))
+            # 将异常作为事件投递而不是直接抛出
+            self._post_event(EVENT_STREAM_ERROR, node_index, e)
+
+    def _run_sequential(self):
+        """
+        顺序调度：在主线程中逐个执行执行队列中的节点，
+        执行队列为空时阻塞等待流式节点事件
+
+        Yields:
+            dict: 状态更新信息
+        """
+        while self.execution_queue or self.active_stream_nodes:
+            if self._exit_requested():
+                # 被停止时处理完已交出的结果并提交，下次运行从此处继续
+                yield from self._stop_with_checkpoint()
+                return
+            self._commit_checkpoint()
+
+            # 优先处理主执行队列
+            if self.execution_queue:
+                node_index, input_value, port, params = self.execution_queue.popleft()
+                yield from self._process_regular_node(node_index, input_value, port, params)
+                continue
+
+            # 执行队列为空，阻塞等待流式节点事件，每次只处理一个事件
+            try:
+                event = self.event_queue.get(timeout=self.event_timeout)
+            except Empty:
+                # 等待超时，输出被限流合并的状态后回到循环开头检查退出信号
+                if self.status_suppressed:
+                    yield self._create_status_update('运行中')
+                continue
+            yield from self._process_event(event)
+
+    def _run_concurrent(self):
+        """
+        并发调度：执行队列中的节点任务提交到线程池并行运行，
+        主循环阻塞等待节点完成事件和流式节点事件
+
+        执行队列非空时暂缓处理流式结果，使下游节点优先获得线程池资源
+
+        Yields:
+            dict: 状态更新信息
+        """
+        while self.execution_queue or self.active_stream_nodes or self.inflight_count or self.deferred_events:
+            if self._exit_requested():
+                # 被停止时处理完已交出的结果并提交，下次运行从此处继续
+                yield from self._stop_with_checkpoint()
+                return
+            self._commit_checkpoint()
+
+            yield from self._submit_ready_nodes()
+
+            # 到了断点提交时间时暂缓处理流式结果，等待正在运行的任务完成后提交
+            draining = self.checkpoint is not None and self.checkpoint.due()
+
+            # 执行队列已清空时处理暂缓的流式结果
+            if not self.execution_queue and self.deferred_events and not draining:
+                yield from self._process_event(self.deferred_events.popleft())
+                continue
+
+            if not self.inflight_count and not self.active_stream_nodes:
+                continue
+
+            try:
+                event = self.event_queue.get(timeout=self.event_timeout)
+            except Empty:
+                # 等待超时，输出被限流合并的状态后回到循环开头检查退出信号
+                if self.status_suppressed:
+                    yield self._create_status_update('运行中')
+                continue
+            if event[0] == EVENT_STREAM_RESULT and (self.execution_queue or draining):
+                self.deferred_events.append(event)
+                continue
+            yield from self._process_event(event)
+
+    def _start_stages(self):
+        """为每个非流式节点创建流水线阶段并启动工作线程"""
+        self.stages = []
+        self.params_locks = [threading.Lock() for _ in self.node_list]
+        for node_index, node in enumerate(self.node_list):
+            if isinstance(node, StreamNode):
+                self.stages.append(None)
+                continue
+            # 非线程安全节点只使用一个工作线程
+            workers = max(1, self.max_workers) if node.thread_safe else 1
+            stage = PipelineStage(node_index, self.graph.node_ids[node_index], self.stage_queue_size, workers)
+            for worker_index in range(workers):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage,),
+                    name=f"workflow_stage_{stage.node_id}_{worker_index}",
+                    daemon=True
+                )
+                stage.threads.append(thread)
+                thread.start()
+            self.stages.append(stage)
+
+    def _stage_worker(self, stage):
+        """
+        流水线阶段的工作线程函数，从阶段输入队列取数据运行节点，并把结果投递到下游阶段
+
+        支持批量运行的节点（supports_batch）在params中设置batch_size大于1时，
+        每次最多收集batch_size条输入或等待max_wait_ms毫秒后合并为一次运行。
+        每条输入使用上游投递时捕获的参数快照运行，一批中参数快照不同的输入分组运行。
+
+        Args:
+            stage: 流水线阶段
+        """
+        node = self.node_list[stage.node_index]
+        while not self.stop_event.is_set():
+            try:
+                item = stage.queue.get(timeout=self.event_timeout)
+            except Empty:
+                continue
+            batch_size = node.params.get("batch_size", 1) if node.supports_batch else 1
+            items = [item]
+            if batch_size > 1:
+                items.extend(self._collect_batch(stage, batch_size - 1, node.params.get("max_wait_ms", 10) / 1000))
+            stage.begin()
+            start = time.perf_counter()
+            run_time = 0.0
+            blocked_time = 0.0
+            try:
+                # 检查是否超过最大执行次数（只有当max_executions > 0时才检查）
+                if self.max_executions > 0 and stage.processed >= self.max_executions:
+                    print(f"警告: 节点 {stage.node_id} 已达到最大执行次数 {self.max_executions}，跳过执行。")
+                else:
+                    if batch_size > 1:
+                        node_results = self._run_batch(stage.node_index, items)
+                        self.profiler.nodes[stage.node_index].record_run(time.perf_counter() - start, len(items))
+                    else:
+                        port, input_value, params = items[0]
+                        node_results = [self._run_node(stage.node_index, port, input_value, params)]
+                    run_time = time.perf_counter() - start
+                    # 按输入顺序逐条投递，输出为None的端口不向下游传递
+                    for node_result in node_results:
+                        if node_result is not None:
+                            blocked_time += self._route_to_stages(stage.node_index, node_result, skip_none=True)
+            except Exception as e:
+                stage.end(time.perf_counter() - start, blocked_time, len(items))
+                self._post_event(EVENT_NODE_ERROR, stage.node_index, e)
+                return
+            stage.end(run_time, blocked_time, len(items), batched=batch_size > 1)
+            self._post_event(EVENT_NODE_COMPLETE, stage.node_index, len(items))
+
+    def _run_batch(self, node_index, items):
+        """
+        批量运行节点，相邻且参数快照相同的输入合并为一次run_batch调用
+
+        Args:
+            node_index: 节点索引
+            items: 输入列表，元素为 (port, input_value, params)
+
+        Returns:
+            list: 按输入顺序排列的运行结果
+        """
+        node = self.node_list[node_index]
+        node_results = []
+        start = 0
+        while start < len(items):
+            params = items[start][2]
+            end = start + 1
+            while end < len(items) and items[end][2] is params:
+                end += 1
+            with node.use_params(params):
+                node_results.extend(node.run_batch([(port, input_value) for port, input_value, _ in items[start:end]]))
+            start = end
+        return node_results
+
+    def _collect_batch(self, stage, limit, max_wait):
+        """
+        从阶段输入队列继续收集输入，直到达到数量上限或等待超时
+
+        Args:
+            stage: 流水线阶段
+            limit: 最多再收集的条数
+            max_wait: 最长等待时间（秒）
+
+        Returns:
+            list: 收集到的输入，元素为 (port, input_value, params)
+        """
+        items = []
+        deadline = time.perf_counter() + max_wait
+        while len(items) < limit and not self.stop_event.is_set():
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    items.append(stage.queue.get(timeout=remaining))
+                else:
+                    items.append(stage.queue.get_nowait())
+            except Empty:
+                break
+        return items
+
+    def _route_to_stages(self, node_index, node_result, skip_none=False):
+        """
+        流水线模式下按路由计划把节点结果投递到下游阶段，在工作线程中调用
 
-    def predict(self, inputs: Dict = None):
+        params类型连接在目标节点的参数锁内更新参数并捕获快照，快照随inputs类型连接的数据一起投递，
+        目标阶段用快照运行该条数据。数据在队列中等待期间后续结果对参数的修改不会影响它，
+        多个上游工作线程同时修改同一节点的参数也不会丢失更新。
+
+        Args:
+            node_index: 源节点索引
+            node_result: 源节点运行结果
+            skip_none: 输出端口结果为None时是否跳过该端口的连接
+
+        Returns:
+            float: 因下游队列已满而阻塞的时间（秒）
+        """
+        updates = {}
+        inputs = []
+        for fanout in self.graph.fanouts[node_index]:
+            value = self._fetch_output(node_index, node_result, fanout.from_port_name)
+            if value is None and skip_none:
+                continue
+            for route in fanout.routes:
+                if route.port_type == PORT_PARAMS:
+                    updates.setdefault(route.to_index, []).append((route.port_name, value))
+                else:
+                    inputs.append((route, value))
+
+        snapshots = {}
+        for to_index, params_updates in updates.items():
+            node = self.node_list[to_index]
+            with self.params_locks[to_index]:
+                for port_name, value in params_updates:
+                    node.set_params(port_name, value)
+                snapshots[to_index] = node.params
+
+        blocked_time = 0.0
+        for route, value in inputs:
+            params = snapshots.get(route.to_index)
+            if params is None and route.to_index in self.graph.params_targets:
+                params = self.node_list[route.to_index].params
+            blocked_time += self._dispatch_to_stage(route.to_index, route.port_name, value, params)
+        return blocked_time
+
+    def _dispatch_to_stage(self, node_index, port, input_value, params=None):
+        """
+        向节点所在阶段的输入队列投递一条数据，队列满时阻塞等待
+
+        目标为流式节点时，由主循环负责启动流式节点线程
+
+        Args:
+            node_index: 目标节点索引
+            port: 输入端口
+            input_value: 输入值
+            params: 参数快照，为None时使用节点的当前参数
+
+        Returns:
+            float: 阻塞等待的时间（秒）
+        """
+        with self.pending_lock:
+            self.pending_count += 1
+        stage = self.stages[node_index]
+        if stage is None:
+            self._post_event(EVENT_STREAM_START, node_index, (port, input_value, params))
+            return 0.0
+        start = time.perf_counter()
+        while not self.stop_event.is_set():
+            try:
+                stage.queue.put((port, input_value, params), timeout=self.event_timeout)
+                break
+            except Full:
+                continue
+        return time.perf_counter() - start
+
+    def _release_pending(self, count=1):
+        """
+        主循环确认已投递的任务完成
+
+        Args:
+            count: 完成的任务数
+        """
+        with self.pending_lock:
+            self.pending_count -= count
+
+    def _feed_stages(self):
+        """
+        把主执行队列中的任务（入口节点、常量节点的输出）投递到各阶段
+
+        主循环不能阻塞在阶段队列上，队列已满的任务保留在执行队列中下次再试
+
+        Yields:
+            dict: 状态更新信息
+        """
+        while self.execution_queue:
+            node_index, input_value, port, params = self.execution_queue[0]
+            stage = self.stages[node_index]
+            if stage is None:
+                # 流式节点由主循环启动线程
+                self.execution_queue.popleft()
+                yield from self._start_node(node_index, input_value, port, params)
+                continue
+            try:
+                stage.queue.put_nowait((port, input_value, params))
+            except Full:
+                return
+            self.execution_queue.popleft()
+            with self.pending_lock:
+                self.pending_count += 1
+
+    def _run_pipelined(self):
+        """
+        流水线调度：每个运算节点作为独立阶段运行，阶段之间通过有界队列传递数据，
+        主循环只负责启动流式节点、汇总运行状态和处理错误
+
+        Yields:
+            dict: 状态更新信息
+        """
+        if not self.graph.acyclic:
+            raise ValueError("流水线模式不支持包含环路的工作流")
+        self._start_stages()
+
+        while self.execution_queue or self.active_stream_nodes or self.pending_count:
+            if self._exit_requested():
+                # 被停止时处理完已交出的结果并提交，下次运行从此处继续
+                yield from self._stop_with_checkpoint()
+                return
+            self._commit_checkpoint()
+
+            yield from self._feed_stages()
+
+            try:
+                event = self.event_queue.get(timeout=self.event_timeout)
+            except Empty:
+                # 等待超时，输出一次状态以便更新阶段队列深度
+                yield self._create_status_update('运行中')
+                continue
+
+            # 合并处理已到达的事件，只输出一次状态更新
+            events = [event]
+            while len(events) < self.event_queue.maxsize:
+                try:
+                    events.append(self.event_queue.get_nowait())
+                except Empty:
+                    break
+            for event in events:
+                event_type, node_index, payload = event
+                if event_type == EVENT_NODE_COMPLETE:
+                    # payload为本次运行处理的输入条数（批量运行时大于1）
+                    self._count_execution(self.graph.node_ids[node_index], payload)
+                    self._release_pending(payload)
+                elif event_type == EVENT_NODE_ERROR:
+                    yield from self._fail_node(node_index, payload)
+                    return
+                elif event_type == EVENT_STREAM_START:
+                    port, input_value, params = payload
+                    yield from self._start_node(node_index, input_value, port, params)
+                    self._release_pending()
+                else:
+                    yield from self._process_event(event)
+            yield self._create_status_update('运行中')
+
+    def _stop_with_checkpoint(self):
+        """
+        被停止时处理完已交给下游的结果，再强制提交断点记录
+
+        流式节点不再交出新的结果（尚未交出的结果不计入已完成的输入，续跑时重新处理），
+        已交出的结果继续运行到汇节点，最多等待checkpoint.drain_timeout秒；
+        超时则不提交，续跑时重做上次提交之后的输入
+
+        Yields:
+            dict: 状态更新信息
+        """
+        if self.checkpoint is None:
+            return
+        self.draining.set()
+        # 暂缓的流式结果尚未交给下游，直接丢弃
+        self.deferred_events.clear()
+        deadline = time.monotonic() + self.checkpoint.drain_timeout
+        while self.execution_queue or self.inflight_count or self.pending_count:
+            if time.monotonic() >= deadline:
+                print(f"警告: 停止时等待未完成任务超过 {self.checkpoint.drain_timeout} 秒，未提交断点记录")
+                return
+            if self.stages is not None:
+                yield from self._feed_stages()
+            elif self.executor is not None:
+                yield from self._submit_ready_nodes()
+            elif self.execution_queue:
+                node_index, input_value, port, params = self.execution_queue.popleft()
+                yield from self._process_regular_node(node_index, input_value, port, params)
+                continue
+            if not self.inflight_count and not self.pending_count:
+                continue
+
+            try:
+                event = self.event_queue.get(timeout=self.event_timeout)
+            except Empty:
+                continue
+            event_type, node_index, payload = event
+            if event_type == EVENT_STREAM_RESULT:
+                # 尚未交给下游的流式结果，丢弃并归还许可
+                self._release_stream_credit(node_index)
+            elif self.stages is None:
+                yield from self._process_event(event)
+            elif event_type == EVENT_NODE_COMPLETE:
+                self._count_execution(self.graph.node_ids[node_index], payload)
+                self._release_pending(payload)
+            elif event_type == EVENT_NODE_ERROR:
+                yield from self._fail_node(node_index, payload)
+                return
+            elif event_type == EVENT_STREAM_START:
+                # 不再启动下游流式节点
+                self._release_pending()
+            else:
+                yield from self._process_event(event)
+        self._commit_checkpoint(force=True)
+
+    def _commit_checkpoint(self, force=False):
+        """
+        没有未完成任务时提交断点记录，此时已交给下游的流式结果都已处理完毕，
+        汇节点的计数器与已完成的输入一致
+
+        Args:
+            force: 是否忽略提交间隔立即提交
+        """
+        if self.checkpoint is None or not (force or self.checkpoint.due()):
+            return
+        if self.execution_queue or self.inflight_count or self.pending_count:
+            return
+        # 已完成输入的输出必须先写入存储
+        self._flush_nodes()
+        node_states = {}
+        for node_id, node in self.nodes.items():
+            state = node.checkpoint_state()
+            if state is not None:
+                node_states[node_id] = state
+        self.checkpoint.commit(node_states)
+
+    def _flush_nodes(self):
+        """让所有节点把缓冲的输出写入存储（如后台写入的图像）"""
+        for node in self.nodes.values():
+            node.flush()
+
+    def _wait_previous_run(self, timeout: float = 10.0):
+        """
+        等待上一次运行遗留的流式节点线程、阶段线程和线程池任务结束
+
+        上一次运行结束时已设置stop_event，遗留线程在完成当前数据后即退出。
+
+        Args:
+            timeout: 每个线程的最长等待时间（秒）
+        """
+        threads = list(self.stream_threads)
+        if self.stages is not None:
+            threads.extend(thread for stage in self.stages if stage is not None for thread in stage.threads)
+        for thread in threads:
+            thread.join(timeout)
+            if thread.is_alive():
+                print(f"警告: 上一次运行的线程 {thread.name} 未能在 {timeout} 秒内退出")
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def _exit_requested(self):
+        """
+        检查是否收到外部退出信号
+
+        Returns:
+            bool: 是否需要退出
+        """
+        return self.exit_event is not None and self.exit_event.is_set()
+
+    def predict(self, inputs: Dict = None, exit_event: Any = None, checkpoint: Any = None):
         """
         执行工作流预测
 
+        主循环由事件队列驱动：执行队列为空时阻塞等待流式节点投递的事件，
+        等待超时后检查退出信号，不再空转占用CPU。
+
         Args:
             inputs (Dict, optional): 工作流的输入参数. Defaults to None
+            exit_event (Any, optional): 外部退出信号，需提供is_set方法（如threading.Event、multiprocessing.Event）. Defaults to None
+            checkpoint (Any, optional): 断点续跑记录（RunCheckpoint），流式节点跳过已完成的输入，
+                汇节点从记录中恢复计数器；正常完成时删除记录. Defaults to None
 
         Yields:
             dict: 包含以下信息的状态更新对象:
@@ -492,27 +1362,80 @@ class WorkflowPipeline(BasePipeline):
                 - result: 可选的工作流输出结果(仅在完成时返回)
                 - error: 可选的错误信息(仅在失败时返回)
                 - run_nodes: 正在运行的节点ID数组(运行中时返回)
+                - profile: 各节点的性能统计(仅在完成时返回)，包括运行次数、总耗时、p50/p95/p99耗时、
+                  process_output耗时、输入输出条数和输出的ndarray字节数
         """
+        # 等待上一次运行遗留的线程退出，避免其访问本次运行的状态
+        self._wait_previous_run()
         # 重置执行相关的成员变量
-        self.execution_queue = []
+        self.execution_queue = deque()
         self.ran_nodes = []
         self.run_nodes = []  # 正在运行的节点ID数组
         self.run_connection = None  # 正在运行的连接ID
         self.start_time = time.time()
-        self.stream_results_queue = Queue(maxsize=1000)  # 流式结果队列，设置最大容量为1000
+        self.event_queue = Queue(maxsize=1000)  # 调度器事件队列，设置最大容量为1000
         self.active_stream_nodes = set()  # 活动流式节点集合
-        self.exception_queue = Queue()  # 线程间通信的异常队列
         self.stream_threads = []  # 流式节点线程集合
-        
+        self.stop_event = threading.Event()
+        self.draining = threading.Event()
+        self.exit_event = exit_event
+        self.checkpoint = checkpoint
+        self.inflight_count = 0
+        self.deferred_events = deque()
+        self.stages = None
+        self.params_locks = None
+        self.pending_count = 0
+        self.prepare_info = None
+        self.last_status_time = 0.0
+        self.status_suppressed = False
+        self.sent_ran_count = 0
+        self.sent_run_nodes = None
+        self.sent_connection = None
+        if self.max_workers > 1 and not self.pipelined:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workflow_node")
+            self.stream_credits = threading.Semaphore(self.max_workers * 2)
+        else:
+            self.executor = None
+            self.stream_credits = None
+        self.stream_node_credits = {}
+
         try:
             # 输出准备中状态
             yield self._create_status_update('准备中')
             
-            self.initialize_nodes()
+            prepare_start = time.perf_counter()
+            warm = bool(self.nodes)
+            rebuilt_nodes = self.initialize_nodes()
             self.initialize_connections()
+            self.initialize_graph()
+            # 记录准备信息：cold为首次创建，warm为全部节点复用，partial为部分节点重建
+            if not warm:
+                start_mode = "cold"
+            elif rebuilt_nodes:
+                start_mode = "partial"
+            else:
+                start_mode = "warm"
+            self.prepare_info = {
+                "start_mode": start_mode,
+                "prepare_time": time.perf_counter() - prepare_start,
+                "rebuilt_nodes": rebuilt_nodes,
+                "models": model_registry.stats(),
+            }
+            if checkpoint is not None:
+                # 从断点续跑时恢复汇节点的计数器
+                if checkpoint.resumed:
+                    for node_id, state in checkpoint.node_states.items():
+                        if node_id in self.nodes:
+                            self.nodes[node_id].restore_checkpoint(state)
+                self.prepare_info["checkpoint"] = {
+                    "resumed": checkpoint.resumed,
+                    "completed_inputs": len(checkpoint.done),
+                }
 
             # 记录节点被执行的次数，防止无限循环
             self.execution_count = {node_id: 0 for node_id, node in self.nodes.items()}
+            self.busy_nodes = [0] * len(self.node_list)
+            self.profiler = WorkflowProfiler(self.graph.node_ids)
 
             # 首先处理所有常量节点
             constant_processor = self._process_constant_nodes()
@@ -529,70 +1452,40 @@ class WorkflowPipeline(BasePipeline):
                 yield self._create_status_update('失败', "无法确定工作流的入口节点，请确保工作流中包含没有入边的节点作为入口")
                 return
 
-            # 执行队列中的节点
-            while self.execution_queue or not self.stream_results_queue.empty() or self.active_stream_nodes or self.stream_threads:
-                # 检查异常队列
-                while not self.exception_queue.empty():
-                    node_id, error = self.exception_queue.get()
-                    self.active_stream_nodes.discard(node_id)
-                    # 从正在运行的节点数组中移除
-                    if node_id in self.run_nodes:
-                        self.run_nodes.remove(node_id)
-                    yield self._create_status_update('失败', f"流式节点 {node_id} 执行出错: {str(error)}")
-                    # 清理线程
-                    for thread in self.stream_threads:
-                        if thread.is_alive():
-                            # 注意：这里不能强制终止线程，只能等待其自然结束
-                            pass
+            # 执行队列中的节点，流式节点仍在运行时等待其事件
+            if self.pipelined:
+                scheduler = self._run_pipelined()
+            elif self.executor is not None:
+                scheduler = self._run_concurrent()
+            else:
+                scheduler = self._run_sequential()
+            for status_update in scheduler:
+                if status_update is None:
+                    # 被限流合并的状态
+                    continue
+                yield status_update
+                # 如果发生错误，状态更新中包含错误信息，应该终止处理
+                if status_update.get('status') == '失败':
                     return
+            if self._exit_requested():
+                return
 
-                # 优先处理流式节点产生的结果
-                # 修改为每次只处理一个流式结果，而不是循环处理所有结果
-                if not self.execution_queue and not self.stream_results_queue.empty():
-                    try:
-                        # 使用非阻塞方式获取队列元素，避免阻塞
-                        items = self.stream_results_queue.get_nowait()
-                        
-                        # 处理流式结果
-                        stream_processor = self._process_stream_result(items)
-                        
-                        # 处理流式结果处理器产生的状态更新
-                        for status_update in stream_processor:
-                            yield status_update
-                            # 如果发生错误，状态更新中包含错误信息，应该终止处理
-                            if isinstance(status_update, dict) and status_update.get('status') == '失败':
-                                # 清理线程
-                                for thread in self.stream_threads:
-                                    if thread.is_alive():
-                                        pass
-                                return
-                    except Empty:
-                        # 队列为空，跳过处理
-                        pass
-                
-                # 清理已完成的线程
-                self.stream_threads = [t for t in self.stream_threads if t.is_alive()]
-                
-                # 处理主执行队列
-                if self.execution_queue:
-                    current_node_id, input_value, port = self.execution_queue.pop(0)
-                    
-                    node_processor = self._process_regular_node(current_node_id, input_value, port)
-                    
-                    for status_update in node_processor:
-                        # 状态更新
-                        yield status_update
-                        # 如果发生错误，状态更新中包含错误信息，应该终止处理
-                        if status_update.get('status') == '失败':
-                            return
-
-            # 所有节点执行完毕，工作流完成，输出完成状态
+            # 所有节点执行完毕，等待缓冲的输出写完后输出完成状态
+            self._flush_nodes()
+            if checkpoint is not None:
+                checkpoint.finish()
             yield self._create_status_update('完成')
         except Exception as e:
             # 捕获所有其他异常
             yield self._create_status_update('失败', f"工作流执行时发生错误: {str(e)}")
-            # 清理线程
-            for thread in self.stream_threads:
-                if thread.is_alive():
-                    pass
-        return
+        finally:
+            # 通知仍在运行的流式节点线程退出（线程不能强制终止，只能等待其自然结束）
+            self.stop_event.set()
+            # 停止或失败时同样等待已提交的后台写入完成，写入错误只记录
+            try:
+                self._flush_nodes()
+            except Exception as e:
+                print(f"警告: 工作流结束时写入输出失败: {str(e)}")
+            if self.executor is not None:
+                # 取消尚未开始的任务，正在运行的任务不等待其结束（下次运行前再等待）
+                self.executor.shutdown(wait=False, cancel_futures=True)
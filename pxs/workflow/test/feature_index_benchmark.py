@@ -0,0 +1,122 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.common.feature_library import FeatureLibrary
+from pxs.workflow.common.feature_index import IVFIndex
+
+
+def make_library(size, dim, samples_per_identity, rng):
+    """
+    生成聚类结构的测试特征库：每个身份一个中心，每个特征为中心加噪声，模拟重识别特征
+
+    Args:
+        size: 特征数量
+        dim: 特征维度
+        samples_per_identity: 每个身份的特征数
+        rng: 随机数生成器
+
+    Returns:
+        tuple: (特征库, 身份中心)
+    """
+    centers = rng.standard_normal((max(1, size // samples_per_identity), dim), dtype=np.float32)
+    labels = rng.integers(0, len(centers), size)
+    vectors = centers[labels] + 0.6 * rng.standard_normal((size, dim), dtype=np.float32)
+    return FeatureLibrary([f"library_{index}" for index in range(size)], vectors), centers
+
+
+def top_k(rows, similarities, k):
+    """
+    取相似度最高的k个行号
+
+    Args:
+        rows: 候选行号
+        similarities: 候选相似度
+        k: 数量
+
+    Returns:
+        set: 行号集合
+    """
+    if len(rows) > k:
+        selected = np.argpartition(-similarities, k - 1)[:k]
+        rows = rows[selected]
+    return set(rows.tolist())
+
+
+def evaluate(library, queries, metric, k, search):
+    """
+    统计近似搜索的召回率和耗时
+
+    Args:
+        library: 特征库
+        queries: 查询矩阵
+        metric: 相似度度量方法
+        k: 召回率统计的前k个结果
+        search: 搜索函数，参数为查询向量，返回 (候选行号, 相似度)
+
+    Returns:
+        tuple: (recall@k, 每次查询毫秒数)
+    """
+    all_rows = np.arange(len(library))
+    hits = 0
+    elapsed = 0.0
+    for query in queries:
+        expected = top_k(all_rows, library.similarities(query, metric), k)
+        start = time.perf_counter()
+        rows, similarities = search(query)
+        elapsed += time.perf_counter() - start
+        hits += len(top_k(rows, similarities, k) & expected)
+    return hits / (k * len(queries)), elapsed / len(queries) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="特征库近似最近邻索引召回率和耗时基准测试")
+    parser.add_argument("--size", type=int, default=200000, help="特征库大小")
+    parser.add_argument("--dim", type=int, default=256, help="特征维度")
+    parser.add_argument("--queries", type=int, default=100, help="查询次数")
+    parser.add_argument("--k", type=int, default=5, help="召回率统计的前k个结果")
+    parser.add_argument("--metric", type=str, default="cosine", choices=["cosine", "euclidean", "manhattan"],
+                        help="相似度度量方法")
+    parser.add_argument("--nlist", type=int, default=0, help="聚类数，0表示取 4*sqrt(特征数)")
+    parser.add_argument("--nprobe", type=str, default="1,4,16,64", help="比较的聚类数，逗号分隔")
+    parser.add_argument("--pq_m", type=int, default=32, help="ivfpq的乘积量化子空间数")
+    parser.add_argument("--refine", type=int, default=200, help="ivfpq计算精确相似度的候选数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    library, centers = make_library(args.size, args.dim, 10, rng)
+    # 查询为已知身份的新特征
+    queries = centers[rng.integers(0, len(centers), args.queries)] \
+        + 0.6 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    all_rows = np.arange(len(library))
+    recall, latency = evaluate(library, queries, args.metric, args.k,
+                               lambda query: (all_rows, library.similarities(query, args.metric)))
+    print(f"精确搜索：特征库 {args.size}，维度 {args.dim}，{latency:.2f}毫秒/查询")
+
+    index_dir = tempfile.mkdtemp(prefix="pxs_feature_index_benchmark_")
+    for kind, pq_m in (("ivf", 0), ("ivfpq", args.pq_m)):
+        start = time.perf_counter()
+        index = IVFIndex.build(library, nlist=args.nlist, pq_m=pq_m)
+        build_time = time.perf_counter() - start
+        index_path = os.path.join(index_dir, f"{kind}.npz")
+        index.save(index_path)
+        start = time.perf_counter()
+        index = IVFIndex.load(index_path)
+        load_time = time.perf_counter() - start
+        print(f"{kind}：nlist {index.nlist}，建立 {build_time:.1f}秒，加载 {load_time * 1000:.0f}毫秒，"
+              f"索引文件 {os.path.getsize(index_path) / 1024 / 1024:.1f}MB")
+        for nprobe in [int(value) for value in args.nprobe.split(",")]:
+            recall, latency = evaluate(
+                library, queries, args.metric, args.k,
+                lambda query: index.search(library, query, args.metric, nprobe=nprobe, refine=args.refine))
+            print(f"  nprobe {nprobe}：recall@{args.k} {recall:.3f}，{latency:.2f}毫秒/查询")
@@ -0,0 +1,83 @@
+import sys
+import os
+import time
+import json
+import tempfile
+import argparse
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.nodes.feature_match import FeatureMatchNode
+
+
+def prepare_gallery(gallery_dir, size, dim, files, rng):
+    """
+    生成测试用的JSON特征库，特征平均分布在多个文件中
+
+    Args:
+        gallery_dir: 特征库目录
+        size: 特征数量
+        dim: 特征维度
+        files: 文件数量
+        rng: 随机数生成器
+    """
+    os.makedirs(gallery_dir, exist_ok=True)
+    for file_index, rows in enumerate(np.array_split(np.arange(size), files)):
+        vectors = rng.standard_normal((len(rows), dim), dtype=np.float32)
+        with open(os.path.join(gallery_dir, f"gallery_{file_index:04d}.json"), "w", encoding="utf-8") as f:
+            json.dump([{"index": index, "feature": vector.tolist()} for index, vector in enumerate(vectors)], f)
+
+
+def load_node(gallery_dir, compile_library):
+    """
+    创建特征匹配节点并计时特征库加载
+
+    Args:
+        gallery_dir: 特征库目录
+        compile_library: 是否编译特征库
+
+    Returns:
+        tuple: (特征匹配节点, 加载秒数)
+    """
+    start = time.perf_counter()
+    node = FeatureMatchNode({"id": "feature_match_1", "name": "特征匹配", "type": "feature_match",
+                             "params": {"path": gallery_dir, "threshold": 0.1, "compile": compile_library}}, None)
+    return node, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="特征库加载基准测试")
+    parser.add_argument("--size", type=int, default=100000, help="特征数量")
+    parser.add_argument("--dim", type=int, default=512, help="特征维度")
+    parser.add_argument("--files", type=int, default=100, help="JSON文件数量")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    gallery_dir = tempfile.mkdtemp(prefix="pxs_feature_library_benchmark_")
+    print(f"生成特征库：{args.size} 个特征，维度 {args.dim}，{args.files} 个JSON文件")
+    prepare_gallery(gallery_dir, args.size, args.dim, args.files, rng)
+
+    json_node, json_time = load_node(gallery_dir, False)
+    print(f"解析JSON加载：{json_time:.2f}秒")
+    _, compile_time = load_node(gallery_dir, True)
+    print(f"解析JSON并编译：{compile_time:.2f}秒")
+    compiled_node, compiled_time = load_node(gallery_dir, True)
+    print(f"加载编译后的特征库（内存映射）：{compiled_time * 1000:.1f}毫秒")
+
+    # 两种方式加载的特征库匹配结果一致
+    query = {"index": 0, "feature": rng.standard_normal(args.dim, dtype=np.float32)}
+    expected = json_node.run("features", query).value
+    result = compiled_node.run("features", query).value
+    assert result["best_match"] == expected["best_match"], (result["best_match"], expected["best_match"])
+    assert result["matched_count"] == expected["matched_count"]
+
+    # 修改一个源文件后重新编译
+    source_path = os.path.join(gallery_dir, "gallery_0000.json")
+    os.utime(source_path, ns=(time.time_ns(), time.time_ns()))
+    _, recompile_time = load_node(gallery_dir, True)
+    print(f"源文件修改后重新编译：{recompile_time:.2f}秒")
@@ -0,0 +1,232 @@
+import sys
+import os
+import time
+import json
+import tempfile
+import argparse
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.nodes.feature_match import FeatureMatchNode
+from pxs.workflow.common.features import FeatureBatch
+from pxs.workflow.common.feature_library import FeatureLibrary
+
+
+def prepare_library(library_dir, size, dim, rng):
+    """
+    生成测试用的特征库文件
+
+    Args:
+        library_dir: 特征库目录
+        size: 特征数量
+        dim: 特征维度
+        rng: 随机数生成器
+
+    Returns:
+        np.ndarray: 特征库矩阵
+    """
+    os.makedirs(library_dir, exist_ok=True)
+    library = rng.standard_normal((size, dim), dtype=np.float32)
+    with open(os.path.join(library_dir, "library.json"), "w", encoding="utf-8") as f:
+        json.dump([{"index": index, "feature": feature.tolist()} for index, feature in enumerate(library)], f)
+    return library
+
+
+def create_node(library=None, library_dir=None, metric="cosine", threshold=0.1, top_k=0):
+    """
+    创建特征匹配节点，library不为None时直接使用内存中的特征库（跳过生成大文件）
+
+    Args:
+        library: 特征库矩阵
+        library_dir: 特征库目录
+        metric: 相似度度量方法
+        threshold: 匹配阈值
+        top_k: 每个特征最多输出的匹配数
+
+    Returns:
+        FeatureMatchNode: 特征匹配节点
+    """
+    params = {"metric": metric, "threshold": threshold, "top_k": top_k}
+    if library_dir is not None:
+        params["path"] = library_dir
+    node = FeatureMatchNode({"id": "feature_match_1", "name": "特征匹配", "type": "feature_match",
+                             "params": params}, None)
+    if library is not None:
+        node.library = FeatureLibrary([f"library_{index}" for index in range(len(library))], library)
+    return node
+
+
+def legacy_payload(raw_features):
+    """
+    旧的特征节点输出：每个特征转换为Python列表
+
+    Args:
+        raw_features: 模型输出的特征列表
+
+    Returns:
+        list: 特征列表
+    """
+    return [{"index": index, "feature": feature.tolist()} for index, feature in enumerate(raw_features)]
+
+
+def batch_payload(raw_features):
+    """
+    新的特征节点输出：合并为连续的float32矩阵
+
+    Args:
+        raw_features: 模型输出的特征列表
+
+    Returns:
+        FeatureBatch: 一批特征向量
+    """
+    return FeatureBatch(np.stack(raw_features))
+
+
+def legacy_similarities(library, feature, metric):
+    """
+    逐个特征计算相似度（旧的实现方式），作为对照
+
+    Args:
+        library: 特征库矩阵
+        feature: 查询向量
+        metric: 相似度度量方法
+
+    Returns:
+        np.ndarray: 相似度
+    """
+    result = np.empty(len(library))
+    for index, library_feature in enumerate(library):
+        if metric == "cosine":
+            norm = np.linalg.norm(feature) * np.linalg.norm(library_feature)
+            result[index] = np.dot(feature, library_feature) / norm if norm else 0.0
+        elif metric == "euclidean":
+            result[index] = 1.0 / (1.0 + np.linalg.norm(feature - library_feature))
+        else:
+            result[index] = 1.0 / (1.0 + np.sum(np.abs(feature - library_feature)))
+    return result
+
+
+def run_payload(sizes, dim, crops, repeat, rng):
+    """
+    比较两种特征节点输出从输出到匹配完成的耗时
+
+    Args:
+        sizes: 特征库大小列表
+        dim: 特征维度
+        crops: 每张图像的裁剪（特征）数
+        repeat: 重复次数
+        rng: 随机数生成器
+    """
+    raw_features = list(rng.standard_normal((crops, dim), dtype=np.float32))
+    for size in sizes:
+        library_dir = tempfile.mkdtemp(prefix="pxs_feature_match_benchmark_")
+        prepare_library(library_dir, size, dim, rng)
+        node = create_node(library_dir=library_dir)
+        timings = []
+        for make_payload in (legacy_payload, batch_payload):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                node.run("features", make_payload(raw_features))
+            timings.append((time.perf_counter() - start) / repeat / crops * 1e6)
+        print(f"特征库 {size}，维度 {dim}：列表输出 {timings[0]:.1f}微秒/裁剪，FeatureBatch输出 {timings[1]:.1f}微秒/裁剪")
+
+
+def run_engine(sizes, dim, queries, rng):
+    """
+    比较逐个计算和矩阵计算相似度的单次查询耗时，并检查结果一致
+
+    Args:
+        sizes: 特征库大小列表
+        dim: 特征维度
+        queries: 查询次数
+        rng: 随机数生成器
+    """
+    for size in sizes:
+        library = rng.standard_normal((size, dim), dtype=np.float32)
+        features = rng.standard_normal((queries, dim), dtype=np.float32)
+        for metric in ("cosine", "euclidean", "manhattan"):
+            node = create_node(library=library, metric=metric)
+            # 逐个计算较慢，大特征库只查询一次
+            legacy_queries = features[:max(1, min(queries, 20000 // size))]
+            start = time.perf_counter()
+            expected = [legacy_similarities(library, feature, metric) for feature in legacy_queries]
+            legacy_time = (time.perf_counter() - start) / len(legacy_queries)
+            start = time.perf_counter()
+            results = [node.run("features", {"index": 0, "feature": feature}).value for feature in features]
+            vector_time = (time.perf_counter() - start) / len(features)
+            for result, similarities in zip(results, expected):
+                best = result["best_match"]
+                assert best["feature_id"] == f"library_{int(np.argmax(similarities))}", (metric, best)
+                assert abs(best["similarity"] - similarities.max()) < 1e-4 * max(1.0, abs(similarities.max()))
+            print(f"特征库 {size}，维度 {dim}，{metric}：逐个计算 {legacy_time * 1000:.2f}毫秒/查询，"
+                  f"矩阵计算 {vector_time * 1000:.3f}毫秒/查询，加速 {legacy_time / vector_time:.0f}倍")
+
+
+def run_batch(sizes, dim, faces_list, top_k, threshold, repeat, rng):
+    """
+    比较逐个特征匹配和批量匹配一帧中所有特征的耗时，并检查结果一致
+
+    Args:
+        sizes: 特征库大小列表
+        dim: 特征维度
+        faces_list: 每帧特征数列表
+        top_k: 每个特征最多输出的匹配数
+        threshold: 匹配阈值
+        repeat: 重复次数
+        rng: 随机数生成器
+    """
+    for size in sizes:
+        library = rng.standard_normal((size, dim), dtype=np.float32)
+        node = create_node(library=library, threshold=threshold, top_k=top_k)
+        for faces in faces_list:
+            payload = FeatureBatch(rng.standard_normal((faces, dim), dtype=np.float32))
+            # 逐个特征匹配（旧的实现方式）
+            start = time.perf_counter()
+            for _ in range(repeat):
+                expected = [{"index": item["index"], "matchs": node._match_with_library(item["feature"], node.library)}
+                            for item in payload]
+            single_time = (time.perf_counter() - start) / repeat
+            start = time.perf_counter()
+            for _ in range(repeat):
+                results = node.run("features", payload).value
+            batch_time = (time.perf_counter() - start) / repeat
+            for result, reference in zip(results, expected):
+                assert result["index"] == reference["index"]
+                assert result["matchs"]["best_match"]["feature_id"] == reference["matchs"]["best_match"]["feature_id"]
+                # 矩阵乘法和逐个计算的舍入不同，相似度紧邻阈值的特征可能一边满足一边不满足
+                matched = {match["feature_id"] for match in result["matchs"]["all_matches"]}
+                for match in reference["matchs"]["all_matches"]:
+                    assert match["feature_id"] in matched or match["similarity"] < threshold + 1e-5
+            matches = sum(len(result["matchs"]["all_matches"]) for result in results)
+            print(f"特征库 {size}，每帧 {faces} 个特征，top_k {top_k}：逐个匹配 {single_time * 1000:.2f}毫秒/帧，"
+                  f"批量匹配 {batch_time * 1000:.2f}毫秒/帧，输出 {matches} 个匹配")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="特征匹配节点基准测试")
+    parser.add_argument("--mode", choices=["payload", "engine", "batch"], default="engine",
+                        help="payload: 比较特征节点输出格式；engine: 比较相似度计算方式；batch: 比较逐个和批量匹配")
+    parser.add_argument("--dim", type=int, default=512, help="特征维度")
+    parser.add_argument("--crops", type=int, default=16, help="每张图像的裁剪（特征）数（payload模式）")
+    parser.add_argument("--queries", type=int, default=20, help="查询次数（engine模式）")
+    parser.add_argument("--sizes", type=str, default="1000,10000,100000", help="特征库大小，逗号分隔")
+    parser.add_argument("--faces", type=str, default="1,8,32,64", help="每帧特征数，逗号分隔（batch模式）")
+    parser.add_argument("--top_k", type=int, default=5, help="每个特征最多输出的匹配数（batch模式）")
+    parser.add_argument("--threshold", type=float, default=0.0, help="匹配阈值（batch模式）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数（payload、batch模式）")
+    args = parser.parse_args()
+
+    sizes = [int(value) for value in args.sizes.split(",")]
+    rng = np.random.default_rng(0)
+    if args.mode == "payload":
+        run_payload(sizes, args.dim, args.crops, args.repeat, rng)
+    elif args.mode == "batch":
+        run_batch(sizes, args.dim, [int(value) for value in args.faces.split(",")], args.top_k, args.threshold,
+                  args.repeat, rng)
+    else:
+        run_engine(sizes, args.dim, args.queries, rng)
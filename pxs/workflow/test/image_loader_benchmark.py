@@ -0,0 +1,185 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow import create_workflow
+from pxs.workflow.common.image_io import read_image
+from pxs.workflow.common.scan import scan_files
+from pxs.workflow.nodes.load_image_stream import LoadImageStreamNode
+from scheduler_benchmark import register_bench_nodes
+
+
+def prepare_jpegs(image_dir, count, width, height):
+    """
+    生成测试用的JPEG文件，内容为放大的随机色块加少量噪声，压缩率接近真实照片
+
+    Args:
+        image_dir: 图像目录
+        count: 图像数量
+        width: 图像宽度
+        height: 图像高度
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    for i in range(count):
+        blocks = np.random.randint(0, 255, (max(1, height // 64), max(1, width // 64), 3), dtype=np.uint8)
+        image = cv2.resize(blocks, (width, height), interpolation=cv2.INTER_CUBIC)
+        noise = np.random.randint(0, 8, (height, width, 3), dtype=np.uint8)
+        image = cv2.add(image, noise)
+        cv2.imwrite(os.path.join(image_dir, f"image_{i:05d}.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def run_stream_benchmark(image_dir, workers, prefetch, ordered):
+    """
+    测量流式加载图像节点的吞吐量
+
+    Args:
+        image_dir: 图像目录
+        workers: 解码线程数
+        prefetch: 最多提前读取的图像数，0表示使用默认值
+        ordered: 是否按文件顺序输出
+    """
+    params = {"path": image_dir, "workers": workers, "ordered": ordered}
+    if prefetch > 0:
+        params["prefetch"] = prefetch
+    node = LoadImageStreamNode({"id": "load_image_stream_1", "name": "加载图像(流式)", "type": "load_image_stream",
+                                "params": params}, None)
+    count = 0
+    start = time.perf_counter()
+    for _ in node._stream_output(None, None):
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"workers={workers} prefetch={prefetch or '默认'} ordered={ordered}: "
+          f"{count}张，{elapsed:.3f}秒，{count / elapsed:.1f}张/秒")
+
+
+def run_memory_benchmark(image_dir, chunk_size):
+    """
+    测量加载图像节点在工作流中运行时的内存峰值
+
+    工作流为 load_image -> bench_pass，使用tracemalloc统计numpy分配的解码图像内存
+
+    Args:
+        image_dir: 图像目录
+        chunk_size: 分块大小，0表示一次性加载全部图像
+    """
+    register_bench_nodes()
+    params = {"path": image_dir}
+    if chunk_size > 0:
+        params["chunk_size"] = chunk_size
+    config = {
+        "nodes": [
+            {"id": "load_image_1", "type": "load_image", "data": {"name": "加载图像", "params": params}},
+            {"id": "pass_1", "type": "bench_pass", "data": {"params": {}}},
+        ],
+        "edges": [
+            {"id": "edge_1", "source": "load_image_1", "sourceHandle": "outputs.images",
+             "target": "pass_1", "targetHandle": "inputs.value"},
+        ],
+    }
+    workflow = create_workflow(config)
+    tracemalloc.start()
+    start = time.perf_counter()
+    last_status = None
+    for last_status in workflow.predict():
+        pass
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(os.listdir(image_dir))
+    print(f"{count}张 chunk_size={chunk_size or '不分块'}: 状态 {last_status.get('status')}，"
+          f"{elapsed:.3f}秒，内存峰值 {peak / 1024 / 1024:.1f}MB")
+
+
+def run_decode_benchmark(image_dir, max_side):
+    """
+    测量不同解码选项下单张图像的解码耗时和解码后的像素内存
+
+    Args:
+        image_dir: 图像目录
+        max_side: 降分辨率解码的输出长边
+    """
+    file_paths = [os.path.join(image_dir, name) for name in sorted(os.listdir(image_dir))]
+    options = [
+        ("全尺寸RGB", {}),
+        ("全尺寸BGR", {"keep_bgr": True}),
+        (f"max_side={max_side} RGB", {"max_side": max_side}),
+        (f"max_side={max_side} BGR", {"max_side": max_side, "keep_bgr": True}),
+    ]
+    for label, kwargs in options:
+        start = time.perf_counter()
+        nbytes = 0
+        for file_path in file_paths:
+            image, scale = read_image(file_path, **kwargs)
+            nbytes += image.nbytes
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {elapsed / len(file_paths) * 1000:.1f}毫秒/张，"
+              f"{nbytes / len(file_paths) / 1024 / 1024:.2f}MB/张，缩放比例 {scale:.4f}")
+
+
+def run_scan_benchmark(count):
+    """
+    比较os.listdir逐个isfile与scan_files扫描大目录的耗时
+
+    Args:
+        count: 空文件数量
+    """
+    scan_dir = os.path.join(tempfile.mkdtemp(prefix="pxs_scan_benchmark_"), "files")
+    os.makedirs(scan_dir)
+    for i in range(count):
+        open(os.path.join(scan_dir, f"{i:07d}.jpg"), "w").close()
+
+    start = time.perf_counter()
+    listed = [name for name in os.listdir(scan_dir)
+              if os.path.isfile(os.path.join(scan_dir, name)) and os.path.splitext(name)[1].lower() == ".jpg"]
+    print(f"listdir+isfile: {len(listed)}个文件，{time.perf_counter() - start:.3f}秒")
+    for sort in ("name", "none"):
+        start = time.perf_counter()
+        files = scan_files(scan_dir, sort=sort)
+        next(files)
+        first = time.perf_counter() - start
+        total = 1 + sum(1 for _ in files)
+        print(f"scan_files sort={sort}: {total}个文件，{time.perf_counter() - start:.3f}秒，"
+              f"首个文件 {first * 1000:.2f}毫秒")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="图像加载节点基准测试")
+    parser.add_argument("--count", type=int, default=64, help="图像数量")
+    parser.add_argument("--width", type=int, default=4000, help="图像宽度")
+    parser.add_argument("--height", type=int, default=3000, help="图像高度")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="解码线程数")
+    parser.add_argument("--prefetch", type=int, default=0, help="最多提前读取的图像数，0表示使用默认值")
+    parser.add_argument("--unordered", action="store_true", help="先解码完成的图像先输出")
+    parser.add_argument("--mode", choices=["stream", "memory", "decode", "scan"], default="stream",
+                        help="stream: 流式加载吞吐量；memory: 一次性加载与分块加载的内存峰值；"
+                             "decode: 降分辨率解码；scan: 目录扫描（--count为文件数量）")
+    parser.add_argument("--chunk-size", type=int, default=8, help="memory模式的分块大小")
+    parser.add_argument("--max-side", type=int, default=640, help="decode模式的输出长边")
+    args = parser.parse_args()
+
+    if args.mode == "scan":
+        run_scan_benchmark(args.count)
+        sys.exit(0)
+
+    image_dir = os.path.join(tempfile.mkdtemp(prefix="pxs_image_loader_benchmark_"), "images")
+    prepare_jpegs(image_dir, args.count, args.width, args.height)
+    if args.mode == "decode":
+        run_decode_benchmark(image_dir, args.max_side)
+    elif args.mode == "memory":
+        run_memory_benchmark(image_dir, 0)
+        run_memory_benchmark(image_dir, args.chunk_size)
+    else:
+        print(f"CPU核数: {os.cpu_count()}")
+        for worker_count in args.workers:
+            run_stream_benchmark(image_dir, worker_count, args.prefetch, not args.unordered)
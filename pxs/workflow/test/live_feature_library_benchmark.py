@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+import threading
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.common.feature_library import FeatureLibrary
+from pxs.workflow.common.live_feature_library import LiveFeatureLibrary
+
+
+def run_enroll(size, dim, enrolls, rng):
+    """
+    比较逐个登记新特征时重建特征库和在线追加的耗时
+
+    Args:
+        size: 初始特征数量
+        dim: 特征维度
+        enrolls: 登记次数
+        rng: 随机数生成器
+    """
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    ids = [f"library_{index}" for index in range(size)]
+    new_vectors = rng.standard_normal((enrolls, dim), dtype=np.float32)
+
+    # 重建：每次登记后由全部特征重新创建特征库（相当于重新启动时重新加载）
+    features = dict(zip(ids, vectors))
+    start = time.perf_counter()
+    for index, vector in enumerate(new_vectors):
+        features[f"enrolled_{index}"] = vector
+        FeatureLibrary.from_dict(features)
+    rebuild_time = (time.perf_counter() - start) / enrolls
+
+    for wal_path in ("", os.path.join(tempfile.mkdtemp(prefix="pxs_live_library_benchmark_"), "library.wal")):
+        live = LiveFeatureLibrary(FeatureLibrary(ids, vectors), wal_path)
+        start = time.perf_counter()
+        for index, vector in enumerate(new_vectors):
+            live.append([f"enrolled_{index}"], vector[None, :])
+        append_time = (time.perf_counter() - start) / enrolls
+        live.close()
+        print(f"特征库 {size}，维度 {dim}：重建 {rebuild_time * 1000:.2f}毫秒/次，"
+              f"在线追加{'（预写日志+fsync）' if wal_path else ''} {append_time * 1000:.3f}毫秒/次，容量 {len(live.matrix)}")
+
+
+def run_concurrent(size, dim, seconds, rng):
+    """
+    统计后台持续更新时的查询耗时，并检查每次查询使用的快照一致
+
+    Args:
+        size: 初始特征数量
+        dim: 特征维度
+        seconds: 测试时长（秒）
+        rng: 随机数生成器
+    """
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    live = LiveFeatureLibrary(FeatureLibrary([f"library_{index}" for index in range(size)], vectors))
+    queries = rng.standard_normal((64, dim), dtype=np.float32)
+    stop = threading.Event()
+    updates = [0]
+
+    def writer():
+        writer_rng = np.random.default_rng(1)
+        while not stop.is_set():
+            batch = updates[0]
+            live.append([f"enrolled_{batch}_{index}" for index in range(8)],
+                        writer_rng.standard_normal((8, dim), dtype=np.float32))
+            if batch % 10 == 9:
+                live.delete([f"enrolled_{batch - 9}_{index}" for index in range(8)])
+            updates[0] += 1
+
+    for label, background in (("无更新", False), ("后台持续更新", True)):
+        thread = threading.Thread(target=writer) if background else None
+        if thread is not None:
+            thread.start()
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            snapshot = live.snapshot
+            similarities = snapshot.similarities(queries[count % len(queries)], "cosine")
+            best = int(np.argmax(similarities))
+            assert len(similarities) == len(snapshot.ids) and snapshot.ids[best] is not None
+            count += 1
+        elapsed = time.perf_counter() - start
+        if thread is not None:
+            stop.set()
+            thread.join()
+        print(f"{label}：{elapsed / count * 1000:.2f}毫秒/查询，更新 {updates[0]} 批，特征数 {live.count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在线更新特征库基准测试")
+    parser.add_argument("--sizes", type=str, default="10000,100000", help="初始特征数量，逗号分隔")
+    parser.add_argument("--dim", type=int, default=512, help="特征维度")
+    parser.add_argument("--enrolls", type=int, default=50, help="登记次数")
+    parser.add_argument("--seconds", type=float, default=3, help="并发测试时长（秒）")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in [int(value) for value in args.sizes.split(",")]:
+        run_enroll(size, args.dim, args.enrolls, rng)
+        run_concurrent(size, args.dim, args.seconds, rng)
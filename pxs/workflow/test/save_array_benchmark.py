@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+import json
+import tempfile
+import argparse
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.nodes.save_array import SaveArrayNode
+from pxs.workflow.nodes.save_textfile import SaveTextfileNode
+from pxs.workflow.common.array_store import load_shards
+
+
+def directory_size(directory):
+    """
+    计算目录中文件的总字节数
+
+    Args:
+        directory: 目录路径
+
+    Returns:
+        int: 总字节数
+    """
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+
+def run_array(features, output_dir, shard_size):
+    """
+    用保存数组节点逐条保存特征并加载回来
+
+    Args:
+        features: 特征矩阵
+        output_dir: 输出目录
+        shard_size: 分片行数
+
+    Returns:
+        tuple: (写入秒数, 加载秒数, 总字节数)
+    """
+    node = SaveArrayNode({"id": "save_array_1", "name": "保存数组", "type": "save_array",
+                          "params": {"path": output_dir, "filename": "features", "shard_size": shard_size,
+                                     "clear_dir": True}}, None)
+    start = time.perf_counter()
+    for index, feature in enumerate(features):
+        node.set_params("source", f"image_{index:06d}.jpg")
+        node.run("arrays", [{"index": 0, "feature": feature}])
+    node.close()
+    write_time = time.perf_counter() - start
+    start = time.perf_counter()
+    arrays, entries = load_shards(output_dir, "features")
+    loaded = np.concatenate(arrays)
+    load_time = time.perf_counter() - start
+    assert np.array_equal(loaded, features) and len(entries) == len(features)
+    return write_time, load_time, directory_size(output_dir)
+
+
+def run_jsonl(features, output_dir):
+    """
+    用保存文本文件节点（追加jsonl）逐条保存特征并解析回来
+
+    Args:
+        features: 特征矩阵
+        output_dir: 输出目录
+
+    Returns:
+        tuple: (写入秒数, 加载秒数, 总字节数)
+    """
+    node = SaveTextfileNode({"id": "save_textfile_1", "name": "保存文本文件", "type": "save_textfile",
+                             "params": {"path": output_dir, "filename": "features", "format": "jsonl",
+                                        "append": True, "clear_dir": True}}, None)
+    start = time.perf_counter()
+    for index, feature in enumerate(features):
+        node.run("object", {"filename": f"image_{index:06d}.jpg", "index": 0, "feature": feature})
+    node.close()
+    write_time = time.perf_counter() - start
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, "features_0.jsonl"), "r", encoding="utf-8") as f:
+        loaded = np.array([json.loads(line)["feature"] for line in f], dtype=np.float32)
+    load_time = time.perf_counter() - start
+    assert np.array_equal(loaded, features)
+    return write_time, load_time, directory_size(output_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="保存数组节点基准测试")
+    parser.add_argument("--count", type=int, default=20000, help="特征数量")
+    parser.add_argument("--dim", type=int, default=512, help="特征维度")
+    parser.add_argument("--shard-size", type=int, default=10000, help="分片行数")
+    args = parser.parse_args()
+
+    features = np.random.default_rng(0).standard_normal((args.count, args.dim), dtype=np.float32)
+    for name, (write_time, load_time, size) in (
+        ("npy分片", run_array(features, tempfile.mkdtemp(prefix="pxs_save_array_benchmark_"), args.shard_size)),
+        ("追加jsonl", run_jsonl(features, tempfile.mkdtemp(prefix="pxs_save_array_benchmark_"))),
+    ):
+        print(f"{name}: 写入 {write_time / args.count * 1e6:.1f}微秒/条，加载 {load_time:.3f}秒，"
+              f"共 {size / 1024 / 1024:.1f}MB")
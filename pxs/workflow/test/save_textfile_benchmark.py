@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.nodes.save_textfile import SaveTextfileNode
+
+
+def make_items(count, dim):
+    """
+    生成测试用的识别结果，每条包含文件名、检测框、得分和特征向量
+
+    Args:
+        count: 结果数量
+        dim: 特征维度
+
+    Returns:
+        list: 结果字典列表
+    """
+    rng = np.random.default_rng(0)
+    return [{
+        "filename": f"image_{i:06d}.jpg",
+        "boxes": rng.random((3, 4), dtype=np.float32) * 640,
+        "scores": rng.random(3, dtype=np.float32),
+        "label": np.int64(i % 10),
+        "feature": rng.random(dim, dtype=np.float32),
+    } for i in range(count)]
+
+
+def run_save(items, output_dir, params):
+    """
+    用保存文本文件节点逐条保存结果
+
+    Args:
+        items: 结果列表
+        output_dir: 输出目录
+        params: 节点参数（path以外的选项）
+
+    Returns:
+        tuple: (总耗时秒数, 输出文件数, 输出总字节数)
+    """
+    node = SaveTextfileNode({"id": "save_textfile_1", "name": "保存文本文件", "type": "save_textfile",
+                             "params": {"path": output_dir, "filename": "result", "clear_dir": True, **params}}, None)
+    start = time.perf_counter()
+    for item in items:
+        node.run("object", item)
+    node.flush()
+    elapsed = time.perf_counter() - start
+    node.close()
+    files = os.listdir(output_dir)
+    return elapsed, len(files), sum(os.path.getsize(os.path.join(output_dir, name)) for name in files)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="保存文本文件节点基准测试")
+    parser.add_argument("--count", type=int, default=20000, help="结果数量")
+    parser.add_argument("--dim", type=int, default=128, help="特征维度")
+    args = parser.parse_args()
+
+    items = make_items(args.count, args.dim)
+    output_dir = tempfile.mkdtemp(prefix="pxs_save_textfile_benchmark_")
+    cases = [
+        ("每条一个json文件", {"format": "json"}),
+        ("追加jsonl", {"format": "jsonl", "append": True}),
+        ("追加jsonl，每文件5000条", {"format": "jsonl", "append": True, "max_items": 5000}),
+    ]
+    for name, params in cases:
+        elapsed, file_count, size = run_save(items, output_dir, params)
+        print(f"{name}: {elapsed / args.count * 1e6:.1f}微秒/条，{file_count}个文件，共 {size / 1024 / 1024:.1f}MB")
@@ -0,0 +1,365 @@
+import sys
+import os
+import json
+import time
+import types
+import tempfile
+import argparse
+from collections import deque
+
+import cv2
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow import create_workflow
+from pxs.workflow.nodes.base_node import ComputeNode, StreamNode, NodeResult
+from pxs.workflow.nodes.load_image_stream import LoadImageStreamNode
+from pxs.workflow.common.graph import compile_graph, PORT_PARAMS
+from pxs.workflow.common.utils import parse_port
+# 预先导入节点模块，避免模块导入耗时计入CPU时间
+import pxs.workflow.nodes.save_textfile  # noqa: F401
+
+
+def prepare_images(image_dir, count, size=64):
+    """
+    生成测试用的图像文件
+
+    Args:
+        image_dir: 图像目录
+        count: 图像数量
+        size: 图像边长
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    for i in range(count):
+        image = np.random.randint(0, 255, (size, size, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(image_dir, f"image_{i:05d}.png"), image)
+
+
+def build_config(image_dir, output_dir):
+    """
+    构建测试工作流：流式加载图像 -> 保存文件名文本
+
+    Args:
+        image_dir: 图像目录
+        output_dir: 输出目录
+
+    Returns:
+        dict: 工作流配置
+    """
+    return {
+        "nodes": [
+            {
+                "id": "load_image_stream_1",
+                "type": "load_image_stream",
+                "data": {"name": "加载图像(流式)", "params": {"path": image_dir}},
+            },
+            {
+                "id": "save_textfile_1",
+                "type": "save_textfile",
+                "data": {"name": "保存文本文件", "params": {"path": output_dir, "format": "txt"}},
+            },
+        ],
+        "edges": [
+            {
+                "id": "edge_1",
+                "source": "load_image_stream_1",
+                "sourceHandle": "outputs.filename",
+                "target": "save_textfile_1",
+                "targetHandle": "inputs.object",
+            }
+        ],
+    }
+
+
+def run_benchmark(count, read_delay):
+    """
+    测量流式节点等待磁盘时调度器的CPU占用
+
+    通过给LoadImageStreamNode._read_image增加延时模拟慢速磁盘，
+    工作线程在等待期间不占用CPU，因此进程CPU时间/墙钟时间即为调度主循环的空闲占用。
+
+    Args:
+        count: 图像数量
+        read_delay: 每张图像的读取延时（秒）
+    """
+    work_dir = tempfile.mkdtemp(prefix="pxs_scheduler_benchmark_")
+    image_dir = os.path.join(work_dir, "images")
+    output_dir = os.path.join(work_dir, "output")
+    prepare_images(image_dir, count)
+
+    # 模拟慢速磁盘
+    original_read_image = LoadImageStreamNode._read_image
+
+    def slow_read_image(self, file_path):
+        time.sleep(read_delay)
+        return original_read_image(self, file_path)
+
+    LoadImageStreamNode._read_image = slow_read_image
+    try:
+        workflow = create_workflow(build_config(image_dir, output_dir))
+        status_count = 0
+        last_status = None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        for status in workflow.predict():
+            status_count += 1
+            last_status = status
+        wall_time = time.perf_counter() - wall_start
+        cpu_time = time.process_time() - cpu_start
+    finally:
+        LoadImageStreamNode._read_image = original_read_image
+
+    print(f"最终状态: {last_status.get('status')}")
+    print(f"图像数量: {count}，单张读取延时: {read_delay * 1000:.1f}ms，状态更新数: {status_count}")
+    print(f"墙钟时间: {wall_time:.3f}秒，CPU时间: {cpu_time:.3f}秒")
+    print(f"CPU占用率: {cpu_time / wall_time * 100:.1f}%")
+
+
+class BenchSourceNode(StreamNode):
+    """基准测试流式源节点，快速产生指定数量的小数据"""
+
+    def _stream_output(self, port, data):
+        for index in range(self.params.get("count", 0)):
+            yield NodeResult({"value": index}, self)
+
+    def process_output(self, result, port=None):
+        return result["value"]
+
+
+class BenchPassNode(ComputeNode):
+    """基准测试透传节点，不做任何计算，只用于测量调度开销"""
+
+    def _run_compute(self, port, data):
+        return NodeResult(data, self)
+
+
+class BenchSleepNode(ComputeNode):
+    """基准测试延时节点，按params.delay休眠后透传数据，模拟耗时的运算阶段"""
+
+    def _run_compute(self, port, data):
+        time.sleep(self.params.get("delay", 0.0))
+        return NodeResult(data, self)
+
+
+def register_bench_nodes():
+    """将基准测试节点注册为pxs.workflow.nodes下的模块，使工作流可以按类型名加载"""
+    bench_nodes = (("bench_source", BenchSourceNode), ("bench_pass", BenchPassNode), ("bench_sleep", BenchSleepNode))
+    for node_type, node_class in bench_nodes:
+        module = types.ModuleType(f"pxs.workflow.nodes.{node_type}")
+        setattr(module, node_class.__name__, node_class)
+        sys.modules[module.__name__] = module
+
+
+def build_dispatch_config(count):
+    """
+    构建6节点测试工作流：source -> pass_1 -> (pass_2 -> pass_4, pass_3 -> pass_5)
+
+    Args:
+        count: 流式源节点产生的数据条数
+
+    Returns:
+        dict: 工作流配置
+    """
+    nodes = [{"id": "source", "type": "bench_source", "data": {"params": {"count": count}}}]
+    for index in range(1, 6):
+        nodes.append({"id": f"pass_{index}", "type": "bench_pass", "data": {"params": {}}})
+    links = [("source", "pass_1"), ("pass_1", "pass_2"), ("pass_1", "pass_3"), ("pass_2", "pass_4"), ("pass_3", "pass_5")]
+    edges = [
+        {"id": f"edge_{index}", "source": source, "sourceHandle": "outputs.value", "target": target, "targetHandle": "inputs.value"}
+        for index, (source, target) in enumerate(links)
+    ]
+    return {"nodes": nodes, "edges": edges}
+
+
+def run_dispatch_benchmark(count, status_interval=0.0, status_delta=False):
+    """
+    测量调度器每条流式数据的分发开销
+
+    所有节点均为空操作，耗时全部来自调度主循环（路由、状态更新等）。
+    每条状态更新都做一次JSON序列化，模拟工作流管理器写日志的开销。
+
+    Args:
+        count: 流式数据条数
+        status_interval: 运行中状态的最小输出间隔（秒）
+        status_delta: 是否输出增量状态
+    """
+    register_bench_nodes()
+    workflow = create_workflow(
+        build_dispatch_config(count), status_interval=status_interval, status_delta=status_delta
+    )
+    status_count = 0
+    status_bytes = 0
+    last_status = None
+    wall_start = time.perf_counter()
+    for status in workflow.predict():
+        status_count += 1
+        status_bytes += len(json.dumps(status, ensure_ascii=False))
+        last_status = status
+    wall_time = time.perf_counter() - wall_start
+
+    print(f"最终状态: {last_status.get('status')}")
+    print(f"数据条数: {count}，节点数: 6，状态更新数: {status_count}，序列化后共 {status_bytes / 1024:.1f}KB")
+    print(f"墙钟时间: {wall_time:.3f}秒，每条数据调度开销: {wall_time / count * 1e6:.1f}微秒")
+    run_routing_benchmark(workflow, count)
+
+
+def legacy_route(nodes, connections, node_id, node_result, queue):
+    """
+    编译路由计划之前的结果分发方式（作为对照）：按节点ID查找连接字典，
+    每条连接都重新解析源端口和目标端口
+
+    Args:
+        nodes: 节点实例字典
+        connections: {源节点ID: [连接信息, ...]}
+        node_id: 源节点ID
+        node_result: 源节点运行结果
+        queue: 执行队列
+    """
+    if node_id in connections:
+        for conn in connections[node_id]:
+            value = node_result.get(conn["from_port"])
+            if value is None:
+                continue
+            if conn["to_node"] in nodes:
+                port_type, port_name = parse_port(conn["to_port"])
+                if port_type == 'params':
+                    nodes[conn["to_node"]].set_params(port_name, node_result.get(conn["from_port"]))
+                elif port_type == 'inputs':
+                    queue.append((conn["to_node"], node_result.get(conn["from_port"]), port_name))
+
+
+def compiled_route(node_list, fanouts, node_index, node_result, queue):
+    """
+    按编译后的路由计划分发结果（与WorkflowPipeline._route_result相同，不含状态更新）
+
+    Args:
+        node_list: 按节点索引排列的节点实例
+        fanouts: 按节点索引排列的输出端口扇出列表
+        node_index: 源节点索引
+        node_result: 源节点运行结果
+        queue: 执行队列
+    """
+    for fanout in fanouts[node_index]:
+        value = node_result.get_output(fanout.from_port_name)
+        if value is None:
+            continue
+        for route in fanout.routes:
+            if route.port_type == PORT_PARAMS:
+                node_list[route.to_index].set_params(route.port_name, value)
+            else:
+                queue.append((route.to_index, value, route.port_name))
+
+
+def run_routing_benchmark(workflow, count):
+    """
+    在同一工作流图上比较旧的逐条连接解析分发和编译后的路由计划分发的耗时
+
+    两种方式都把每条数据从source依次分发到所有下游节点，节点本身不运行，
+    只测量路由开销；状态更新的开销两种方式相同，不计入。
+
+    Args:
+        workflow: 已运行过的工作流（使用其节点实例和edges配置）
+        count: 数据条数
+    """
+    nodes = workflow.nodes
+    connections = {}
+    for edge in workflow.config["edges"]:
+        connections.setdefault(edge["source"], []).append({
+            "id": edge["id"], "to_node": edge["target"],
+            "from_port": edge["sourceHandle"], "to_port": edge["targetHandle"]
+        })
+    graph = compile_graph(nodes, workflow.config["edges"])
+    node_list = [nodes[node_id] for node_id in graph.node_ids]
+
+    queue = deque()
+    start = time.perf_counter()
+    for index in range(count):
+        queue.append(("source", {"value": index}))
+        while queue:
+            node_id, value = queue.popleft()[:2]
+            legacy_route(nodes, connections, node_id, NodeResult(value, nodes[node_id]), queue)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in range(count):
+        queue.append((graph.node_index["source"], {"value": index}))
+        while queue:
+            node_index, value = queue.popleft()[:2]
+            compiled_route(node_list, graph.fanouts, node_index, NodeResult(value, node_list[node_index]), queue)
+    compiled_time = time.perf_counter() - start
+
+    print(f"路由分发（不含状态更新）：逐条解析连接 {legacy_time / count * 1e6:.1f}微秒/条，"
+          f"编译路由计划 {compiled_time / count * 1e6:.1f}微秒/条，加速 {legacy_time / compiled_time:.1f}倍")
+
+
+def build_pipeline_config(count, delay, stages=3):
+    """
+    构建线性测试工作流：source -> sleep_1 -> ... -> sleep_N
+
+    Args:
+        count: 流式源节点产生的数据条数
+        delay: 每个阶段处理单条数据的延时（秒）
+        stages: 延时阶段数量
+
+    Returns:
+        dict: 工作流配置
+    """
+    nodes = [{"id": "source", "type": "bench_source", "data": {"params": {"count": count}}}]
+    edges = []
+    previous = "source"
+    for index in range(1, stages + 1):
+        node_id = f"sleep_{index}"
+        nodes.append({"id": node_id, "type": "bench_sleep", "data": {"params": {"delay": delay}}})
+        edges.append({"id": f"edge_{index}", "source": previous, "sourceHandle": "outputs.value",
+                      "target": node_id, "targetHandle": "inputs.value"})
+        previous = node_id
+    return {"nodes": nodes, "edges": edges}
+
+
+def run_pipeline_benchmark(count, delay):
+    """
+    比较顺序模式与流水线模式的吞吐量
+
+    每个阶段处理单条数据耗时delay，顺序模式总耗时约为 count * stages * delay，
+    流水线模式下各阶段重叠执行，总耗时约为 count * delay。
+
+    Args:
+        count: 流式数据条数
+        delay: 每个阶段处理单条数据的延时（秒）
+    """
+    register_bench_nodes()
+    for pipelined in (False, True):
+        workflow = create_workflow(build_pipeline_config(count, delay), pipelined=pipelined)
+        last_status = None
+        wall_start = time.perf_counter()
+        for status in workflow.predict():
+            last_status = status
+        wall_time = time.perf_counter() - wall_start
+        mode = "流水线" if pipelined else "顺序"
+        print(f"[{mode}] 最终状态: {last_status.get('status')}，墙钟时间: {wall_time:.3f}秒，"
+              f"吞吐量: {count / wall_time:.1f}条/秒")
+        for node_id, stage in last_status.get("stages", {}).items():
+            print(f"    阶段 {node_id}: 处理 {stage['processed']} 条，利用率 {stage['utilization'] * 100:.1f}%，"
+                  f"背压阻塞 {stage['blocked_time']:.3f}秒")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="工作流调度器基准测试")
+    parser.add_argument("--mode", choices=["idle", "dispatch", "pipeline"], default="idle",
+                        help="idle: 流式节点等待磁盘时的CPU占用；dispatch: 每条数据的调度开销；"
+                             "pipeline: 顺序模式与流水线模式的吞吐量对比")
+    parser.add_argument("--count", type=int, default=50, help="图像数量（idle）或数据条数（dispatch）")
+    parser.add_argument("--delay", type=float, default=0.05, help="单张图像读取延时或单阶段处理延时（秒）")
+    parser.add_argument("--status-interval", type=float, default=0.0, help="运行中状态的最小输出间隔（秒，仅dispatch）")
+    parser.add_argument("--status-delta", action="store_true", help="输出增量状态（仅dispatch）")
+    args = parser.parse_args()
+    if args.mode == "dispatch":
+        run_dispatch_benchmark(args.count, args.status_interval, args.status_delta)
+    elif args.mode == "pipeline":
+        run_pipeline_benchmark(args.count, args.delay)
+    else:
+        run_benchmark(args.count, args.delay)
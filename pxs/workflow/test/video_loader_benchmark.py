@@ -0,0 +1,95 @@
+import sys
+import os
+import time
+import tempfile
+import argparse
+
+import cv2
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from pxs.workflow.nodes.load_video_stream import LoadVideoStreamNode
+
+
+def prepare_video(video_path, frame_count, width, height, fps):
+    """
+    生成测试用的视频文件，每帧画面为移动的色块，左上角绘制帧序号
+
+    Args:
+        video_path: 视频文件路径
+        frame_count: 帧数
+        width: 帧宽度
+        height: 帧高度
+        fps: 帧率
+    """
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"无法创建视频 {video_path}")
+    background = cv2.resize(np.random.randint(0, 255, (height // 32, width // 32, 3), dtype=np.uint8),
+                            (width, height), interpolation=cv2.INTER_CUBIC)
+    for index in range(frame_count):
+        frame = np.roll(background, index * 4, axis=1)
+        cv2.putText(frame, str(index), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+
+
+def read_frames(video_path, params):
+    """
+    用加载视频节点读取视频，返回输出帧的帧序号、时间和耗时
+
+    Args:
+        video_path: 视频文件路径
+        params: 节点参数（path以外的选项）
+
+    Returns:
+        tuple: (帧序号列表, 时间列表, 耗时秒数)
+    """
+    node = LoadVideoStreamNode({"id": "load_video_stream_1", "name": "加载视频(流式)", "type": "load_video_stream",
+                                "params": {"path": video_path, **params}}, None)
+    indices = []
+    timestamps = []
+    start = time.perf_counter()
+    for result in node._stream_output(None, None):
+        indices.append(result.value["frame_index"])
+        timestamps.append(result.value["timestamp"])
+    return indices, timestamps, time.perf_counter() - start
+
+
+def check_frames(video_path, fps):
+    """
+    检查抽帧和定位结果
+
+    Args:
+        video_path: 视频文件路径
+        fps: 视频帧率
+    """
+    indices, _, _ = read_frames(video_path, {"frame_stride": 5})
+    assert indices[:3] == [0, 5, 10], indices[:3]
+    indices, timestamps, _ = read_frames(video_path, {"target_fps": fps / 3})
+    assert indices[:3] == [0, 3, 6], indices[:3]
+    indices, timestamps, _ = read_frames(video_path, {"start_time": 2.0, "end_time": 3.0})
+    assert indices[0] == round(2.0 * fps) and abs(timestamps[0] - 2.0) < 1e-6, (indices[0], timestamps[0])
+    assert len(indices) == round(fps), len(indices)
+    print("抽帧与定位检查通过")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="加载视频节点基准测试")
+    parser.add_argument("--frames", type=int, default=600, help="视频帧数")
+    parser.add_argument("--width", type=int, default=1920, help="帧宽度")
+    parser.add_argument("--height", type=int, default=1080, help="帧高度")
+    parser.add_argument("--fps", type=float, default=30.0, help="视频帧率")
+    args = parser.parse_args()
+
+    video_path = os.path.join(tempfile.mkdtemp(prefix="pxs_video_loader_benchmark_"), "video.mp4")
+    prepare_video(video_path, args.frames, args.width, args.height, args.fps)
+    check_frames(video_path, args.fps)
+    for params in ({}, {"frame_stride": 5}, {"target_fps": 2}, {"frame_stride": 5, "max_side": 640}):
+        indices, _, elapsed = read_frames(video_path, params)
+        print(f"{params or '逐帧'}: 输出{len(indices)}帧，{elapsed:.3f}秒，"
+              f"按视频帧计 {args.frames / elapsed:.1f}帧/秒")
@@ -0,0 +1,97 @@
+from typing import Any, Dict, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+
+from .pipeline import WorkflowPipeline
+
+"""
+常驻工作流缓存，在同一进程的多次运行之间保留已初始化的节点和模型
+"""
+
+# 运行中状态的默认最小输出间隔（秒），即每秒最多输出10条运行中状态
+DEFAULT_STATUS_INTERVAL = 0.1
+
+
+def definition_hash(definition: Dict[str, Any]) -> str:
+    """
+    计算工作流定义的哈希值
+
+    Args:
+        definition (Dict[str, Any]): 工作流定义
+
+    Returns:
+        str: 定义内容的SHA1摘要（键排序后计算，与字典顺序无关）
+    """
+    content = json.dumps(definition, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class WorkflowCache:
+    """工作流实例缓存
+
+    按工作流ID保存WorkflowPipeline实例及其定义哈希：
+    - 定义未变化时直接复用实例，所有节点和模型保持常驻
+    - 定义变化时更新配置和调度选项，下次运行只重建配置变化的节点
+    超过容量时按最近最少使用的顺序释放，释放时关闭实例的所有节点
+    """
+
+    def __init__(self, capacity: int = 2, status_delta: bool = False) -> None:
+        """
+        初始化工作流缓存
+
+        Args:
+            capacity (int, optional): 最多常驻的工作流数量. Defaults to 2
+            status_delta (bool, optional): 工作流实例是否输出增量状态. Defaults to False
+        """
+        self.capacity = capacity
+        self.status_delta = status_delta
+        self.entries = OrderedDict()  # {workflow_id: (definition_hash, WorkflowPipeline)}
+
+    def acquire(self, workflow_id: str, definition: Dict[str, Any]) -> Tuple[WorkflowPipeline, str]:
+        """
+        获取可运行指定工作流定义的实例
+
+        Args:
+            workflow_id (str): 工作流ID
+            definition (Dict[str, Any]): 工作流定义
+
+        Returns:
+            Tuple[WorkflowPipeline, str]: 工作流实例及定义哈希
+        """
+        digest = definition_hash(definition)
+        entry = self.entries.pop(workflow_id, None)
+        if entry is None:
+            # 调度选项可在工作流定义中配置
+            workflow = WorkflowPipeline(
+                definition,
+                max_workers=definition.get('max_workers', 0),
+                pipelined=definition.get('pipelined', False),
+                stage_queue_size=definition.get('stage_queue_size', 8),
+                status_interval=definition.get('status_interval', DEFAULT_STATUS_INTERVAL),
+                status_delta=self.status_delta
+            )
+        else:
+            cached_digest, workflow = entry
+            if cached_digest != digest:
+                workflow.update_config(definition)
+                workflow.max_workers = definition.get('max_workers', 0)
+                workflow.pipelined = definition.get('pipelined', False)
+                workflow.stage_queue_size = definition.get('stage_queue_size', 8)
+                workflow.status_interval = definition.get('status_interval', DEFAULT_STATUS_INTERVAL)
+        self.entries[workflow_id] = (digest, workflow)
+        while len(self.entries) > self.capacity:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            evicted.close()
+        return workflow, digest
+
+    def discard(self, workflow_id: str) -> None:
+        """
+        释放指定工作流的缓存实例
+
+        Args:
+            workflow_id (str): 工作流ID
+        """
+        entry = self.entries.pop(workflow_id, None)
+        if entry is not None:
+            entry[1].close()
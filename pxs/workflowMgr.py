@@ -8,9 +8,13 @@ import re
 from datetime import datetime
 import threading
 import signal
+import atexit
 
 import pxs.paddlexCfg as cfg
-from pxs.workflow.pipeline import WorkflowPipeline
+from pxs.workflow.worker import WorkflowCache
+from pxs.workflow.common.status import StatusAccumulator
+from pxs.workflow.common.run_log import RunLogWriter, read_log_page
+from pxs.workflow.common.checkpoint import RunCheckpoint, DEFAULT_CHECKPOINT_INTERVAL, DEFAULT_DRAIN_TIMEOUT
 
 # 创建Flask蓝图
 workflow_mgr = Blueprint('workflow_mgr', __name__)
@@ -38,8 +42,36 @@ current_workflow_process = None
 # 用于进程间通信的队列
 workflow_status_queue = multiprocessing.Queue(maxsize=1000)
 
-def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status_queue, exit_event):
-    """工作流执行进程函数
+# 常驻工作流进程，多次运行之间保持节点和模型常驻
+workflow_worker_process = None
+# 向常驻工作流进程发送运行命令的队列
+workflow_command_queue = multiprocessing.Queue()
+# 常驻工作流进程空闲（当前运行已结束）的事件标志
+workflow_idle_event = multiprocessing.Event()
+
+def workflow_worker_func(command_queue, status_queue, exit_event, idle_event):
+    """常驻工作流进程函数，循环接收运行命令，已初始化的节点和模型在多次运行之间保持常驻
+
+    Args:
+        command_queue: 命令队列，元素为 ('run', workflow_id, workflow_definition, workflow_dir, resume) 或 ('exit',)
+        status_queue: 状态队列
+        exit_event: 退出事件标志
+        idle_event: 空闲事件标志，每次运行结束后设置
+    """
+    workflow_cache = WorkflowCache(status_delta=True)
+    while True:
+        command = command_queue.get()
+        if command[0] == 'exit':
+            break
+        _, workflow_id, workflow_definition, workflow_dir, resume = command
+        try:
+            workflow_process_func(workflow_id, workflow_definition, workflow_dir, status_queue, exit_event, workflow_cache, resume)
+        finally:
+            idle_event.set()
+
+
+def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status_queue, exit_event, workflow_cache=None, resume=True):
+    """工作流执行函数，在常驻工作流进程中运行
     
     Args:
         workflow_id: 工作流ID
@@ -47,50 +79,75 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
         workflow_dir: 工作流目录
         status_queue: 状态队列
         exit_event: 退出事件标志
+        workflow_cache: 工作流实例缓存，为None时每次新建实例
+        resume: 工作流定义启用断点续跑（checkpoint）时，是否从上次中断处继续
     """
     # 定义日志文件路径
     log_file_path = os.path.join(workflow_dir, 'log.txt')
-    log_file = None
+    log_writer = None
     
     try:
-        # 打开日志文件，使用写入模式
-        log_file = open(log_file_path, 'w', encoding='utf-8')
+        # 创建日志写入器，由独立线程批量写入日志，日志选项可在工作流定义中配置
+        log_writer = RunLogWriter(
+            log_file_path,
+            log_format=workflow_definition.get('log_format', 'text'),
+            max_bytes=workflow_definition.get('log_max_bytes', 20 * 1024 * 1024),
+            backup_count=workflow_definition.get('log_backup_count', 3)
+        )
         
         # 创建工作流实例并执行推理
-        workflow = WorkflowPipeline(workflow_definition)
+        # 获取工作流实例，定义未变化时复用常驻的节点和模型
+        if workflow_cache is None:
+            workflow_cache = WorkflowCache(status_delta=True)
+        workflow, definition_digest = workflow_cache.acquire(workflow_id, workflow_definition)
+
+        # 启用断点续跑时，记录已完成的输入，停止后再次运行跳过这些输入
+        checkpoint = None
+        if workflow_definition.get('checkpoint', False):
+            checkpoint = RunCheckpoint(
+                workflow_dir,
+                definition_digest,
+                resume=resume,
+                interval=workflow_definition.get('checkpoint_interval', DEFAULT_CHECKPOINT_INTERVAL),
+                drain_timeout=workflow_definition.get('checkpoint_drain_timeout', DEFAULT_DRAIN_TIMEOUT)
+            )
         
         logging.info(f'工作流 {workflow_id} 已启动')
         
         # 执行工作流并获取状态
         last_status = None
+        prepare_logged = False
+        # 工作流输出增量状态，日志中直接记录增量状态，状态队列中放入还原后的完整状态
+        status_accumulator = StatusAccumulator()
         try:
-            for result in workflow.predict():
+            for result in workflow.predict(exit_event=exit_event, checkpoint=checkpoint):
+                # 节点初始化完成后记录冷/热启动信息
+                if not prepare_logged and workflow.prepare_info is not None:
+                    prepare_logged = True
+                    prepare_entry = {'workflow_id': workflow_id, 'status': 'prepared', 'definition_hash': definition_digest, **workflow.prepare_info}
+                    logging.info(f'工作流 {workflow_id} 启动方式：{prepare_entry["start_mode"]}，准备耗时：{prepare_entry["prepare_time"]:.3f}秒')
+                    log_writer.write(prepare_entry)
+
                 # 检查是否收到退出信号
                 if exit_event.is_set():
                     logging.info(f'工作流 {workflow_id} 收到退出信号')
-                    break
+                    if checkpoint is None:
+                        break
+                    # 启用断点续跑时由工作流自行停止，停止前提交已处理完的结果
+                    continue
                 
-                # 缓存最后一条运行状态到队列中
-                last_status = result
+                # 缓存最后一条运行状态到队列中（还原为完整状态，前端按完整状态显示）
+                last_status = status_accumulator.apply(result)
                 # 如果队列已满，则移除最早的元素
                 if status_queue.full():
                     try:
                         status_queue.get_nowait()
                     except:
                         pass
-                status_data = {'workflow_id': workflow_id, 'status': 'running', 'data': result}
-                status_queue.put(status_data)
+                status_queue.put({'workflow_id': workflow_id, 'status': 'running', 'data': last_status})
                 
-                # 将状态数据写入日志文件
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                log_entry = f'[{timestamp}] {json.dumps(status_data, ensure_ascii=False)}\n'
-                
-                try:
-                    if log_file and not log_file.closed:
-                        log_file.write(log_entry)
-                        log_file.flush()  # 确保数据写入磁盘
-                except Exception as log_e:
-                    logging.error(f'写入日志失败：{str(log_e)}')
+                # 将状态数据写入日志文件（运行中状态为增量状态）
+                log_writer.write({'workflow_id': workflow_id, 'status': 'running', 'data': result})
         except Exception as inner_e:
             logging.error(f'工作流 {workflow_id} 执行过程中出错：{str(inner_e)}')
             # 发送错误状态
@@ -103,14 +160,7 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
             status_queue.put(error_status)
             
             # 将错误状态写入日志文件
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            log_entry = f'[{timestamp}] {json.dumps(error_status, ensure_ascii=False)}\n'
-            try:
-                if log_file and not log_file.closed:
-                    log_file.write(log_entry)
-                    log_file.flush()
-            except Exception as log_e:
-                logging.error(f'写入错误日志失败：{str(log_e)}')
+            log_writer.write(error_status)
         
         # 工作流执行完成或被中断
         if status_queue.full():
@@ -119,6 +169,15 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
             except:
                 pass
         
+        # 将节点性能统计写入日志文件旁的profile.json
+        if last_status and 'profile' in last_status:
+            profile_path = os.path.join(workflow_dir, 'profile.json')
+            try:
+                with open(profile_path, 'w', encoding='utf-8') as profile_file:
+                    json.dump(last_status['profile'], profile_file, ensure_ascii=False, indent=4)
+            except Exception as profile_e:
+                logging.error(f'写入性能统计失败：{str(profile_e)}')
+        
         if exit_event.is_set():
             # 工作流被中断
             complete_status = {'workflow_id': workflow_id, 'status': 'stopped', 'message': '工作流已被停止'}
@@ -129,14 +188,7 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
         status_queue.put(complete_status)
         
         # 将完成状态写入日志文件
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-        log_entry = f'[{timestamp}] {json.dumps(complete_status, ensure_ascii=False)}\n'
-        try:
-            if log_file and not log_file.closed:
-                log_file.write(log_entry)
-                log_file.flush()
-        except Exception as log_e:
-            logging.error(f'写入完成日志失败：{str(log_e)}')
+        log_writer.write(complete_status)
         
         logging.info(f'工作流 {workflow_id} 已完成')
     except Exception as e:
@@ -151,20 +203,20 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
         status_queue.put(error_status)
         
         # 将错误状态写入日志文件
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-        log_entry = f'[{timestamp}] {json.dumps(error_status, ensure_ascii=False)}\n'
-        try:
-            with open(log_file_path, 'a', encoding='utf-8') as temp_log_file:
-                temp_log_file.write(log_entry)
-        except Exception as log_e:
-            logging.error(f'写入错误日志失败：{str(log_e)}')
+        if log_writer is not None:
+            log_writer.write(error_status)
+        else:
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+            log_entry = f'[{timestamp}] {json.dumps(error_status, ensure_ascii=False)}\n'
+            try:
+                with open(log_file_path, 'a', encoding='utf-8') as temp_log_file:
+                    temp_log_file.write(log_entry)
+            except Exception as log_e:
+                logging.error(f'写入错误日志失败：{str(log_e)}')
     finally:
-        # 确保关闭日志文件
-        try:
-            if log_file and not log_file.closed:
-                log_file.close()
-        except Exception as close_e:
-            logging.warning(f'关闭日志文件时出错：{str(close_e)}')
+        # 写入缓冲区中剩余的日志并关闭日志文件
+        if log_writer is not None:
+            log_writer.close()
         
         # 在进程中无法直接修改主进程的全局变量，需要通过队列通知
         if status_queue.full():
@@ -175,6 +227,38 @@ def workflow_process_func(workflow_id, workflow_definition, workflow_dir, status
         status_queue.put({'workflow_id': workflow_id, 'status': 'stopped', 'process_completed': True})
 
 
+def ensure_workflow_worker():
+    """
+    确保常驻工作流进程正在运行，不存在或已退出时重新启动
+    :return: 常驻工作流进程
+    """
+    global workflow_worker_process
+    if workflow_worker_process is None or not workflow_worker_process.is_alive():
+        workflow_worker_process = multiprocessing.Process(
+            target=workflow_worker_func,
+            args=(workflow_command_queue, workflow_status_queue, exit_event, workflow_idle_event)
+        )
+        # 在Windows上，设置daemon=True可能会导致进程无法正确终止
+        workflow_worker_process.daemon = False
+        workflow_worker_process.start()
+        logging.info('常驻工作流进程已启动')
+    return workflow_worker_process
+
+
+@atexit.register
+def shutdown_workflow_worker():
+    """主进程退出时通知常驻工作流进程退出，超时后强制终止"""
+    global workflow_worker_process
+    if workflow_worker_process is None or not workflow_worker_process.is_alive():
+        return
+    exit_event.set()
+    workflow_command_queue.put(('exit',))
+    workflow_worker_process.join(timeout=3)
+    if workflow_worker_process.is_alive():
+        workflow_worker_process.terminate()
+    workflow_worker_process = None
+
+
 def init():
     """初始化工作流管理器，加载工作流配置"""
     global workflows_root, workflows_config_path, workflows
@@ -398,6 +482,8 @@ def run_workflow(workflow_id):
         # 检查是否有正在运行的工作流
         if current_workflow_id is not None:
             return jsonify({'success': False, 'error': f'工作流 {current_workflow_id} 正在运行，请先停止'}), 400
+        # 启用断点续跑的工作流默认从上次中断处继续，请求中resume为false时从头运行
+        resume = bool((request.get_json(silent=True) or {}).get('resume', True))
         # 在线程中运行工作流
         current_workflow_id = workflow_id
         
@@ -406,15 +492,11 @@ def run_workflow(workflow_id):
         # 清空队列
         while not workflow_status_queue.empty():
             workflow_status_queue.get()
-        # 启动工作流进程
+        # 发送运行命令到常驻工作流进程
         global current_workflow_process
-        current_workflow_process = multiprocessing.Process(
-            target=workflow_process_func,
-            args=(workflow_id, workflow_definition, workflow_dir, workflow_status_queue, exit_event)
-        )
-        # 在Windows上，设置daemon=True可能会导致进程无法正确终止
-        current_workflow_process.daemon = False
-        current_workflow_process.start()
+        workflow_idle_event.clear()
+        current_workflow_process = ensure_workflow_worker()
+        workflow_command_queue.put(('run', workflow_id, workflow_definition, workflow_dir, resume))
         return jsonify({'success': True, 'message': f'工作流 {workflow_id} 已开始运行'}), 200
     except Exception as e:
         current_workflow_id = None
@@ -428,7 +510,7 @@ def stop_workflow(workflow_id):
     :param workflow_id: 工作流ID
     :return: JSON格式的停止结果
     """
-    global current_workflow_id, current_workflow_process
+    global current_workflow_id, current_workflow_process, workflow_worker_process
     
     if current_workflow_id != workflow_id:
         return jsonify({'success': False, 'error': f'工作流 {workflow_id} 未在运行'}), 400
@@ -437,15 +519,24 @@ def stop_workflow(workflow_id):
         # 首先尝试优雅地通知工作流进程退出
         exit_event.set()
         
-        # 给工作流进程一些时间来清理资源并退出
+        # 给工作流一些时间来清理资源并结束本次运行，常驻进程本身继续保留
         graceful_timeout = 3  # 优雅退出等待时间（秒）
+        # 启用断点续跑时，工作流停止前要处理完已交出的结果并提交断点记录，等待时间相应延长
+        try:
+            with open(os.path.join(workflows_root, workflow_id, 'workflow.json'), 'r', encoding='utf-8') as f:
+                workflow_definition = json.load(f)
+        except Exception:
+            workflow_definition = {}
+        if workflow_definition.get('checkpoint', False):
+            graceful_timeout += workflow_definition.get('checkpoint_drain_timeout', DEFAULT_DRAIN_TIMEOUT)
+        stopped_gracefully = True
         if current_workflow_process and current_workflow_process.is_alive():
             logging.info(f'等待工作流 {workflow_id} 优雅退出...')
-            current_workflow_process.join(timeout=graceful_timeout)
+            stopped_gracefully = workflow_idle_event.wait(timeout=graceful_timeout)
         
-        # 如果进程仍然存活，尝试强制终止
+        # 如果本次运行仍未结束，尝试强制终止常驻进程（已常驻的模型随之释放）
         force_terminated = False
-        if current_workflow_process and current_workflow_process.is_alive():
+        if not stopped_gracefully and current_workflow_process and current_workflow_process.is_alive():
             try:
                 logging.warning(f'工作流 {workflow_id} 未能优雅退出，尝试强制终止...')
                 current_workflow_process.terminate()
@@ -478,6 +569,8 @@ def stop_workflow(workflow_id):
         workflow_status_queue.put(stop_status)
         
         # 重置全局变量
+        if force_terminated:
+            workflow_worker_process = None
         current_workflow_id = None
         current_workflow_process = None
         
@@ -614,13 +707,19 @@ def get_current_workflow():
 def get_workflow_logs(workflow_id):
     """
     获取指定工作流的运行日志
+    未指定offset时返回整个日志文件；指定offset时按字节偏移分页返回，
+    查询参数：offset（起始字节偏移，取上一页的next_offset）、limit（最多读取的字节数，默认64KB）、
+    part（0为当前日志文件，1、2...为滚动备份log.txt.1、log.txt.2...，默认0）
     :param workflow_id: 工作流ID
-    :return: JSON格式的日志内容或错误信息
+    :return: 日志文件、JSON格式的分页日志内容或错误信息
     """
     try:
         # 构建日志文件路径
         workflow_dir = os.path.join(workflows_root, workflow_id)
         log_file_path = os.path.join(workflow_dir, 'log.txt')
+        part = request.args.get('part', 0, type=int)
+        if part > 0:
+            log_file_path = f'{log_file_path}.{part}'
         
         # 检查工作流目录是否存在
         if not os.path.exists(workflow_dir):
@@ -630,7 +729,11 @@ def get_workflow_logs(workflow_id):
         if not os.path.exists(log_file_path):
             return jsonify({'success': True, 'logs': '', 'message': '日志文件不存在'}), 200
         
-        return send_file(log_file_path)
+        offset = request.args.get('offset', None, type=int)
+        if offset is None:
+            return send_file(log_file_path)
+        limit = request.args.get('limit', 64 * 1024, type=int)
+        return jsonify({'success': True, **read_log_page(log_file_path, offset, limit)}), 200
     except Exception as e:
         logging.error(f"读取工作流日志失败: {str(e)}")
         return jsonify({'success': False, 'error': f'读取日志文件失败：{str(e)}'}), 500
@@ -60,11 +60,13 @@ export const nodeTypes = {
     save_image: markRaw(defineAsyncComponent(() => import(`/components/nodes/save_image.vue`))),
     load_image: markRaw(defineAsyncComponent(() => import(`/components/nodes/load_file.vue`))),
     load_image_stream: markRaw(defineAsyncComponent(() => import(`/components/nodes/load_file.vue`))),
+    load_video_stream: markRaw(defineAsyncComponent(() => import(`/components/nodes/load_video_stream.vue`))),
     number_const: markRaw(defineAsyncComponent(() => import(`/components/nodes/const.vue`))),
     text_const: markRaw(defineAsyncComponent(() => import(`/components/nodes/const.vue`))),
     bool_const: markRaw(defineAsyncComponent(() => import(`/components/nodes/const.vue`))),
     note: markRaw(defineAsyncComponent(() => import(`/components/nodes/base/NoteNode.vue`))),
     save_textfile: markRaw(defineAsyncComponent(() => import(`/components/nodes/save_textfile.vue`))),
+    save_array: markRaw(defineAsyncComponent(() => import(`/components/nodes/save_array.vue`))),
     feature_match: markRaw(defineAsyncComponent(() => import(`/components/nodes/feature_match.vue`))),
 };
 export const menuItems = [
@@ -79,6 +81,10 @@ export const menuItems = [
                 label: '加载图像(流式)',
                 type: 'load_image_stream'
             },
+            {
+                label: '加载视频(流式)',
+                type: 'load_video_stream'
+            },
             {
                 label: '保存图像',
                 type: 'save_image'
@@ -87,6 +93,10 @@ export const menuItems = [
                 label: '保存文本文件',
                 type: 'save_textfile'
             },
+            {
+                label: '保存数组',
+                type: 'save_array'
+            },
         ]
     },
     {
@@ -154,7 +164,7 @@ export function createNodeData(type, data = {}) {
             break;
         case 'load_image':
             newNode.data.name = '加载图像';
-            newNode.data.outputs = ['images', 'count'];
+            newNode.data.outputs = ['images', 'count', 'scales'];
             newNode.data.params = {
                 path: ''
             };
@@ -162,12 +172,27 @@ export function createNodeData(type, data = {}) {
             break;
         case 'load_image_stream':
             newNode.data.name = '加载图像(流式)';
-            newNode.data.outputs = ['images', 'filename'];
+            newNode.data.outputs = ['images', 'filename', 'scales'];
             newNode.data.params = {
                 path: ''
             };
             newNode.data.color = '#705400';
             break;
+        case 'load_video_stream':
+            newNode.data.name = '加载视频(流式)';
+            newNode.data.outputs = ['images', 'filename', 'frame_index', 'timestamp', 'scales'];
+            newNode.data.params = {
+                path: '',
+                recursive: false,
+                frame_stride: 1,
+                target_fps: 0,
+                start_time: 0,
+                end_time: 0,
+                max_side: 0,
+                keep_bgr: false
+            };
+            newNode.data.color = '#705400';
+            break;
         case 'save_image':
             newNode.data.name = '保存图像';
             newNode.data.inputs = ['images'];
@@ -220,6 +245,8 @@ export function createNodeData(type, data = {}) {
                     infer_params_def: data.params.infer_params ? deepClone(data.params.infer_params) : {},
                     model_params:{},
                     infer_params:{},
+                    batch_size: 1,
+                    max_wait_ms: 10,
                 },
                 inputs: data.inputs,
                 outputs: data.outputs
@@ -234,17 +261,37 @@ export function createNodeData(type, data = {}) {
                 format: 'json',
                 path: '',
                 filename: 'file',
+                clear_dir: false,
+                append: false
+            };
+            newNode.data.color = '#21455F';
+            break;
+        case 'save_array':
+            newNode.data.name = '保存数组';
+            newNode.data.inputs = ['arrays'];
+            newNode.data.outputs = ['paths'];
+            newNode.data.params = {
+                dtype: '',
+                path: '',
+                filename: 'array',
+                source: '',
+                shard_size: 10000,
                 clear_dir: false
             };
             newNode.data.color = '#21455F';
             break;
         case 'feature_match':
             newNode.data.name = '特征匹配';
-            newNode.data.inputs = ['features'];
+            newNode.data.inputs = ['features', 'enroll', 'delete'];
             newNode.data.outputs = ['matches'];
             newNode.data.params = {
                 metric: 'cosine',
-                threshold: 0.5
+                threshold: 0.5,
+                top_k: 0,
+                index: 'exact',
+                nprobe: 8,
+                index_path: '',
+                live: false
             };
             newNode.data.color = '#1F4D27';
             break;